@@ -1,7 +1,28 @@
 from __future__ import annotations
 
-from app.db.session import UnitOfWork
+from collections.abc import Callable
+from functools import partial
+
+from app.cache.memory import ReadCache, read_cache
+from app.db.session import UnitOfWork, replica_router
+from app.notifications.price_events import PriceEventBus, price_events
 
 
 def get_uow() -> UnitOfWork:
-    return UnitOfWork()
+    return UnitOfWork(router=replica_router)
+
+
+def get_read_uow() -> UnitOfWork:
+    return UnitOfWork(read_only=True, router=replica_router)
+
+
+def get_uow_factory() -> Callable[[], UnitOfWork]:
+    return partial(UnitOfWork, router=replica_router)
+
+
+def get_read_cache() -> ReadCache | None:
+    return read_cache
+
+
+def get_price_events() -> PriceEventBus:
+    return price_events
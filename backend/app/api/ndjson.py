@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any
+
+from starlette.requests import ClientDisconnect
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+MAX_LINE_BYTES = 64 * 1024
+
+
+@dataclass(frozen=True)
+class NdjsonLine:
+    line: int
+    value: Any = None
+    error: str | None = None
+
+
+async def iter_ndjson(
+    chunks: AsyncIterator[bytes], max_line_bytes: int = MAX_LINE_BYTES
+) -> AsyncIterator[NdjsonLine]:
+    """Decode newline-delimited JSON from a byte stream, one line at a time.
+
+    Blank lines are skipped but still counted. A line longer than
+    ``max_line_bytes`` is reported as an error and ends the stream, since
+    there is no way to resynchronise without buffering it.
+    """
+    buffer = b""
+    line_number = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for raw in lines:
+            line_number += 1
+            if raw.strip():
+                yield _decode(line_number, raw)
+        if len(buffer) > max_line_bytes:
+            yield NdjsonLine(line_number + 1, error="line exceeds maximum length")
+            return
+    if buffer.strip():
+        yield _decode(line_number + 1, buffer)
+
+
+def _decode(line_number: int, raw: bytes) -> NdjsonLine:
+    try:
+        return NdjsonLine(line_number, value=json.loads(raw))
+    except ValueError:
+        return NdjsonLine(line_number, error="invalid JSON")
+
+
+def dump_ndjson(value: dict[str, Any]) -> bytes:
+    return json.dumps(value, default=str, separators=(",", ":")).encode() + b"\n"
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """Streaming response whose body is produced while the request is still read.
+
+    ``StreamingResponse`` listens on ``receive`` for disconnects, which would
+    swallow request-body chunks the generator has not consumed yet. The
+    generator here reads the request stream itself, which surfaces client
+    disconnects as ``ClientDisconnect``.
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        try:
+            await self.stream_response(send)
+        except OSError as exc:
+            raise ClientDisconnect() from exc
+        if self.background is not None:
+            await self.background()
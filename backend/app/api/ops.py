@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends
+
+from app.api.deps import get_read_cache
+from app.db.pool import pool_stats
+from app.db.session import engine, read_engine, replica_router
+
+router = APIRouter(prefix="/ops")
+
+
+@router.get("/cache")
+async def cache_stats(cache=Depends(get_read_cache)):
+    if cache is None:
+        return {"enabled": False}
+    return {"enabled": True, **cache.stats()}
+
+
+@router.get("/db-pool")
+async def db_pool_stats():
+    stats = pool_stats(engine)
+    if read_engine is not None:
+        stats["replica"] = pool_stats(read_engine)
+    return stats
+
+
+@router.get("/replica")
+async def replica_stats():
+    return replica_router.stats()
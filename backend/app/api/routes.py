@@ -1,34 +1,91 @@
 from __future__ import annotations
 
+import json
 import logging
+from collections.abc import AsyncIterator, Callable
+from datetime import datetime
+from typing import Annotated
 
-from fastapi import APIRouter, Depends, HTTPException, Response, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError as PayloadValidationError
 
-from app.api.deps import get_uow
-from app.repositories.sqlalchemy import SqlAlchemyReferralRepository, SqlAlchemyUserRepository
+from app.api.deps import (
+    get_price_events,
+    get_read_cache,
+    get_read_uow,
+    get_uow,
+    get_uow_factory,
+)
+from app.api.ndjson import (
+    NDJSON_MEDIA_TYPE,
+    DuplexStreamingResponse,
+    NdjsonLine,
+    dump_ndjson,
+    iter_ndjson,
+)
+from app.cache.memory import ReadCache
+from app.core.config import PRICE_ALERT_SYMBOLS
+from app.db.session import UnitOfWork
+from app.notifications.price_events import DROPPED_EVENT, PriceEventBus
+from app.repositories.sqlalchemy import (
+    SqlAlchemyPriceAlertSubscriptionRepository,
+    SqlAlchemyPriceSampleRepository,
+    SqlAlchemyReferralRepository,
+    SqlAlchemyUserRepository,
+)
 from app.schemas import (
+    PriceAlertCreateRequest,
+    PriceAlertListResponse,
+    PriceAlertResponse,
     ReferralCreateRequest,
+    ReferralPageResponse,
     ReferralResponse,
     ReferralSummaryResponse,
     UserResponse,
+    UserBatchItem,
+    UsersBatchUpsertRequest,
+    UsersBatchUpsertResponse,
     UserStatusResponse,
     UserUpsertRequest,
 )
 from app.usecases.errors import ConflictError, NotFoundError, ValidationError
-from app.usecases.referrals import CreateReferral, GetReferralSummary
-from app.usecases.users import GetUserStatus, UpsertUser
+from app.usecases.price_subscriptions import (
+    CreatePriceAlertSubscription,
+    DeletePriceAlertSubscription,
+    ListPriceAlertSubscriptions,
+)
+from app.usecases.prices import AUTO_RESOLUTION, GetPriceHistory
+from app.usecases.referrals import (
+    BULK_INVALID,
+    BulkCreateReferrals,
+    DEFAULT_PAGE_SIZE,
+    GetReferralSummary,
+    ListReferrals,
+    RegisterReferral,
+)
+from app.usecases.users import GetUserStatus, UpsertUser, UpsertUsers
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
+# Annotated with a ``None`` default so routes called directly (as in tests)
+# run uncached instead of receiving the ``Depends`` marker.
+CacheDep = Annotated[ReadCache | None, Depends(get_read_cache)]
+
+BULK_REFERRALS_BATCH_SIZE = 1000
+PRICE_POINTS_PER_CHUNK = 200
+# Comment line sent on an idle live stream so proxies keep the connection open.
+PRICE_STREAM_HEARTBEAT_SECONDS = 15.0
+
 
 @router.post("/users/upsert", response_model=UserResponse, status_code=status.HTTP_200_OK)
 async def upsert_user(
     payload: UserUpsertRequest,
     uow=Depends(get_uow),
 ):
-    async with uow:
+    async with uow.for_user(payload.telegram_id):
         users_repo = SqlAlchemyUserRepository(uow.session)
         usecase = UpsertUser(users_repo)
         try:
@@ -38,20 +95,47 @@ async def upsert_user(
         return UserResponse(**user.__dict__)
 
 
+@router.post(
+    "/users/upsert:batch",
+    response_model=UsersBatchUpsertResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def upsert_users_batch(
+    payload: UsersBatchUpsertRequest,
+    uow=Depends(get_uow),
+):
+    async with uow.for_user(*payload.telegram_ids):
+        users_repo = SqlAlchemyUserRepository(uow.session)
+        usecase = UpsertUsers(users_repo)
+        try:
+            results = await usecase.execute(payload.telegram_ids)
+        except ValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        logger.info(
+            "Batch upsert processed",
+            extra={
+                "size": len(results),
+                "created_count": sum(created for _, created in results),
+            },
+        )
+        return UsersBatchUpsertResponse(
+            users=[UserBatchItem(**user.__dict__, created=created) for user, created in results]
+        )
+
+
 @router.post("/referrals", response_model=ReferralResponse)
 async def create_referral(
     payload: ReferralCreateRequest,
     response: Response,
     uow=Depends(get_uow),
+    cache: CacheDep = None,
 ):
-    async with uow:
-        users_repo = SqlAlchemyUserRepository(uow.session)
-        upsert_user = UpsertUser(users_repo)
+    async with uow.for_user(payload.referrer_telegram_id, payload.referred_telegram_id):
         referrals_repo = SqlAlchemyReferralRepository(uow.session)
-        usecase = CreateReferral(referrals_repo)
+        usecase = RegisterReferral(
+            referrals_repo, cache.for_unit_of_work(uow) if cache else None
+        )
         try:
-            await upsert_user.execute(payload.referrer_telegram_id)
-            await upsert_user.execute(payload.referred_telegram_id)
             referral, created = await usecase.execute(
                 payload.referrer_telegram_id, payload.referred_telegram_id
             )
@@ -60,10 +144,95 @@ async def create_referral(
         except ConflictError as exc:
             raise HTTPException(status_code=409, detail=str(exc)) from exc
         response.status_code = status.HTTP_201_CREATED if created else status.HTTP_200_OK
-        logger.info("Referral processed", extra={"created": created})
+        logger.info("Referral processed", extra={"referral_created": created})
         return ReferralResponse(**referral.__dict__)
 
 
+@router.post("/referrals:bulk", response_class=DuplexStreamingResponse)
+async def bulk_create_referrals(
+    request: Request,
+    uow_factory=Depends(get_uow_factory),
+    cache: CacheDep = None,
+):
+    async def results() -> AsyncIterator[bytes]:
+        batch: list[NdjsonLine] = []
+        async for line in iter_ndjson(request.stream()):
+            batch.append(line)
+            if len(batch) < BULK_REFERRALS_BATCH_SIZE:
+                continue
+            rows, ok = await _process_referral_batch(batch, uow_factory, cache)
+            yield b"".join(rows)
+            if not ok:
+                return
+            batch = []
+        if batch:
+            rows, _ = await _process_referral_batch(batch, uow_factory, cache)
+            yield b"".join(rows)
+
+    return DuplexStreamingResponse(results(), media_type=NDJSON_MEDIA_TYPE)
+
+
+async def _process_referral_batch(
+    batch: list[NdjsonLine],
+    uow_factory: Callable[[], UnitOfWork],
+    cache: ReadCache | None,
+) -> tuple[list[bytes], bool]:
+    """Write one NDJSON batch in its own transaction and render per-line results."""
+    results: dict[int, dict] = {}
+    pairs: list[tuple[int, int]] = []
+    pair_lines: list[int] = []
+    for line in batch:
+        if line.error:
+            results[line.line] = {"line": line.line, "status": BULK_INVALID, "detail": line.error}
+            continue
+        try:
+            payload = ReferralCreateRequest.model_validate(line.value)
+        except PayloadValidationError:
+            results[line.line] = {
+                "line": line.line,
+                "status": BULK_INVALID,
+                "detail": "expected integer referrer_telegram_id and referred_telegram_id",
+            }
+            continue
+        pairs.append((payload.referrer_telegram_id, payload.referred_telegram_id))
+        pair_lines.append(line.line)
+
+    ok = True
+    if pairs:
+        try:
+            # for_user marks every id in the batch for read-your-writes routing.
+            uow = uow_factory().for_user(*{telegram_id for pair in pairs for telegram_id in pair})
+            async with uow:
+                usecase = BulkCreateReferrals(
+                    SqlAlchemyReferralRepository(uow.session),
+                    cache.for_unit_of_work(uow) if cache else None,
+                )
+                outcomes = await usecase.execute(pairs)
+        except Exception:
+            logger.exception("Bulk referral batch failed", extra={"first_line": batch[0].line})
+            ok = False
+            for line_number in pair_lines:
+                results[line_number] = {
+                    "line": line_number,
+                    "status": "error",
+                    "detail": "batch failed; stream aborted",
+                }
+        else:
+            for line_number, outcome in zip(pair_lines, outcomes):
+                result = {
+                    "line": line_number,
+                    "status": outcome.status,
+                    "referrer_telegram_id": outcome.referrer_telegram_id,
+                    "referred_telegram_id": outcome.referred_telegram_id,
+                }
+                if outcome.referral:
+                    result["referral_id"] = outcome.referral.id
+                if outcome.detail:
+                    result["detail"] = outcome.detail
+                results[line_number] = result
+    return [dump_ndjson(results[line.line]) for line in batch], ok
+
+
 @router.get(
     "/users/{telegram_id}/status",
     response_model=UserStatusResponse,
@@ -71,12 +240,13 @@ async def create_referral(
 )
 async def get_user_status(
     telegram_id: int,
-    uow=Depends(get_uow),
+    uow=Depends(get_read_uow),
+    cache: CacheDep = None,
 ):
-    async with uow:
+    async with uow.for_user(telegram_id):
         users_repo = SqlAlchemyUserRepository(uow.session)
         referrals_repo = SqlAlchemyReferralRepository(uow.session)
-        usecase = GetUserStatus(users_repo, referrals_repo)
+        usecase = GetUserStatus(users_repo, referrals_repo, cache)
         try:
             status_data = await usecase.execute(telegram_id)
         except ValidationError as exc:
@@ -86,6 +256,74 @@ async def get_user_status(
         return UserStatusResponse(**status_data)
 
 
+@router.post(
+    "/users/{telegram_id}/price-alerts",
+    response_model=PriceAlertResponse,
+    status_code=status.HTTP_201_CREATED,
+)
+async def create_price_alert(
+    telegram_id: int,
+    payload: PriceAlertCreateRequest,
+    uow=Depends(get_uow),
+):
+    async with uow.for_user(telegram_id):
+        usecase = CreatePriceAlertSubscription(
+            SqlAlchemyPriceAlertSubscriptionRepository(uow.session), PRICE_ALERT_SYMBOLS
+        )
+        try:
+            subscription = await usecase.execute(
+                telegram_id, payload.symbol, payload.direction, payload.threshold
+            )
+        except ValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return PriceAlertResponse(**subscription.__dict__)
+
+
+@router.get(
+    "/users/{telegram_id}/price-alerts",
+    response_model=PriceAlertListResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def list_price_alerts(
+    telegram_id: int,
+    uow=Depends(get_read_uow),
+):
+    async with uow.for_user(telegram_id):
+        usecase = ListPriceAlertSubscriptions(
+            SqlAlchemyPriceAlertSubscriptionRepository(uow.session)
+        )
+        try:
+            subscriptions = await usecase.execute(telegram_id)
+        except ValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return PriceAlertListResponse(
+            telegram_id=telegram_id,
+            alerts=[PriceAlertResponse(**item.__dict__) for item in subscriptions],
+        )
+
+
+@router.delete(
+    "/users/{telegram_id}/price-alerts/{alert_id}",
+    status_code=status.HTTP_204_NO_CONTENT,
+)
+async def delete_price_alert(
+    telegram_id: int,
+    alert_id: int,
+    uow=Depends(get_uow),
+) -> Response:
+    async with uow.for_user(telegram_id):
+        usecase = DeletePriceAlertSubscription(
+            SqlAlchemyPriceAlertSubscriptionRepository(uow.session)
+        )
+        try:
+            await usecase.execute(telegram_id, alert_id)
+        except ValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        except NotFoundError as exc:
+            raise HTTPException(status_code=404, detail=str(exc)) from exc
+    return Response(status_code=status.HTTP_204_NO_CONTENT)
+
+
 @router.get(
     "/referrals/{referrer_telegram_id}/summary",
     response_model=ReferralSummaryResponse,
@@ -93,13 +331,114 @@ async def get_user_status(
 )
 async def get_referral_summary(
     referrer_telegram_id: int,
-    uow=Depends(get_uow),
+    uow=Depends(get_read_uow),
+    cache: CacheDep = None,
 ):
-    async with uow:
+    async with uow.for_user(referrer_telegram_id):
         referrals_repo = SqlAlchemyReferralRepository(uow.session)
-        usecase = GetReferralSummary(referrals_repo)
+        usecase = GetReferralSummary(referrals_repo, cache)
         try:
             summary = await usecase.execute(referrer_telegram_id)
         except ValidationError as exc:
             raise HTTPException(status_code=400, detail=str(exc)) from exc
         return ReferralSummaryResponse(**summary)
+
+
+@router.get(
+    "/referrals/{referrer_telegram_id}/list",
+    response_model=ReferralPageResponse,
+    status_code=status.HTTP_200_OK,
+)
+async def list_referrals(
+    referrer_telegram_id: int,
+    limit: int = DEFAULT_PAGE_SIZE,
+    after: str | None = None,
+    uow=Depends(get_read_uow),
+):
+    async with uow.for_user(referrer_telegram_id):
+        referrals_repo = SqlAlchemyReferralRepository(uow.session)
+        usecase = ListReferrals(referrals_repo)
+        try:
+            page = await usecase.execute(referrer_telegram_id, limit, after)
+        except ValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+        return ReferralPageResponse(**page)
+
+
+@router.get("/prices/stream", response_class=StreamingResponse)
+async def stream_prices(
+    symbols: str | None = None,
+    events: PriceEventBus = Depends(get_price_events),
+):
+    """Server-sent events: ``price`` per stored sample, ``alert`` per price alert."""
+    wanted = [symbol.strip() for symbol in symbols.split(",") if symbol.strip()] if symbols else []
+    return StreamingResponse(
+        _price_event_stream(events, wanted),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+async def _price_event_stream(events: PriceEventBus, symbols: list[str]) -> AsyncIterator[bytes]:
+    # Subscribe inside the generator so the subscription is released on disconnect.
+    subscription = events.subscribe(symbols or None)
+    try:
+        yield b"retry: 3000\n\n"
+        while True:
+            event = await subscription.get(PRICE_STREAM_HEARTBEAT_SECONDS)
+            if event is None:
+                yield b": keep-alive\n\n"
+                continue
+            yield (
+                f"id: {event.id}\nevent: {event.event}\ndata: {json.dumps(event.data)}\n\n"
+            ).encode()
+            if event.event == DROPPED_EVENT:
+                return
+    finally:
+        subscription.close()
+
+
+@router.get("/prices/{symbol}", response_class=StreamingResponse)
+async def get_price_history(
+    symbol: str,
+    start: Annotated[datetime | None, Query(alias="from")] = None,
+    end: Annotated[datetime | None, Query(alias="to")] = None,
+    resolution: str = AUTO_RESOLUTION,
+    uow=Depends(get_read_uow),
+):
+    async with uow:
+        prices_repo = SqlAlchemyPriceSampleRepository(uow.session)
+        usecase = GetPriceHistory(prices_repo)
+        try:
+            history = await usecase.execute(symbol, start, end, resolution)
+        except ValidationError as exc:
+            raise HTTPException(status_code=400, detail=str(exc)) from exc
+    return StreamingResponse(_price_history_json(history), media_type="application/json")
+
+
+async def _price_history_json(history: dict) -> AsyncIterator[bytes]:
+    """Encode a price history as one JSON document, a chunk of points at a time."""
+    head = {
+        "symbol": history["symbol"],
+        "resolution": history["resolution"],
+        "from": history["from"].isoformat(),
+        "to": history["to"].isoformat(),
+    }
+    yield json.dumps(head)[:-1].encode() + b',"points":['
+    points = history["points"]
+    for start in range(0, len(points), PRICE_POINTS_PER_CHUNK):
+        chunk = ",".join(
+            json.dumps(
+                {
+                    "t": point.bucket_start.isoformat(),
+                    "open": point.open,
+                    "high": point.high,
+                    "low": point.low,
+                    "close": point.close,
+                    "count": point.sample_count,
+                }
+            )
+            for point in points[start : start + PRICE_POINTS_PER_CHUNK]
+        )
+        yield (b"," if start else b"") + chunk.encode()
+    yield b"]}"
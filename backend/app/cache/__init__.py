@@ -0,0 +1 @@
+"""Read-through caches for hot use-case results."""
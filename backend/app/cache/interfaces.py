@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from collections.abc import Awaitable, Callable
+from typing import Any, Protocol
+
+
+class ReadThroughCache(Protocol):
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        ...
+
+    async def invalidate(self, *keys: str) -> None:
+        ...
+
+
+class SharedCacheBackend(Protocol):
+    """Cache shared between processes (e.g. Redis).
+
+    Values are the plain dicts returned by use cases; a networked backend is
+    responsible for serialising them, including ``datetime`` fields.
+    """
+
+    async def get(self, key: str) -> Any | None:
+        ...
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        ...
+
+    async def delete(self, *keys: str) -> None:
+        ...
@@ -0,0 +1,70 @@
+"""Read cache invalidation across processes over PostgreSQL LISTEN/NOTIFY.
+
+Every API and bot process keeps its own ``ReadCache``. ``sync_read_cache``
+broadcasts the keys this process invalidates on
+``READ_CACHE_INVALIDATION_CHANNEL`` and drops the keys other processes
+broadcast, so a write in one process evicts the entry everywhere within a
+NOTIFY round trip instead of the TTL. A lost broadcast (listener reconnecting,
+queue full) falls back to the TTL bound.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import Sequence
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.cache.memory import ReadCache
+from app.core.config import READ_CACHE_INVALIDATION_CHANNEL
+from app.db.notify import NotifyPublisher, listen, notify_messages_total
+
+logger = logging.getLogger(__name__)
+
+# Identifies this process's broadcasts so it skips its own.
+PROCESS_ID = uuid.uuid4().hex
+# Keys per NOTIFY payload; keeps bulk invalidations below the payload limit.
+KEYS_PER_MESSAGE = 100
+
+
+def encode_invalidation(origin: str, keys: Sequence[str]) -> str:
+    return json.dumps({"origin": origin, "keys": list(keys)}, separators=(",", ":"))
+
+
+def apply_invalidation(cache: ReadCache, payload: str, origin: str = PROCESS_ID) -> None:
+    """Drop the keys in ``payload`` locally unless this process sent it."""
+    try:
+        message = json.loads(payload)
+        sender, keys = message["origin"], message["keys"]
+    except (ValueError, TypeError, KeyError):
+        notify_messages_total.inc(channel=READ_CACHE_INVALIDATION_CHANNEL, outcome="invalid")
+        logger.warning("Ignoring malformed cache invalidation payload=%r", payload[:200])
+        return
+    if sender != origin:
+        cache.invalidate_local(*keys)
+
+
+async def sync_read_cache(
+    engine: AsyncEngine,
+    cache: ReadCache,
+    channel: str = READ_CACHE_INVALIDATION_CHANNEL,
+    origin: str = PROCESS_ID,
+) -> None:
+    """Broadcast and apply invalidations for ``cache`` until cancelled."""
+    publisher = NotifyPublisher(engine, channel)
+
+    def broadcast(keys: Sequence[str]) -> None:
+        for start in range(0, len(keys), KEYS_PER_MESSAGE):
+            publisher.send(encode_invalidation(origin, keys[start : start + KEYS_PER_MESSAGE]))
+
+    cache.set_broadcast(broadcast)
+    try:
+        await asyncio.gather(
+            publisher.run(),
+            listen(engine, channel, lambda payload: apply_invalidation(cache, payload, origin)),
+        )
+    finally:
+        cache.set_broadcast(None)
@@ -0,0 +1,9 @@
+from __future__ import annotations
+
+
+def user_status_key(telegram_id: int) -> str:
+    return f"user_status:{telegram_id}"
+
+
+def referral_summary_key(referrer_telegram_id: int) -> str:
+    return f"referral_summary:{referrer_telegram_id}"
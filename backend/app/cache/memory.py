@@ -0,0 +1,257 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any
+
+from app.cache.interfaces import SharedCacheBackend
+from app.core.config import (
+    READ_CACHE_ENABLED,
+    READ_CACHE_MAX_ENTRIES,
+    READ_CACHE_SHARED_BACKEND,
+    READ_CACHE_TTL_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+_MISSING = object()
+# Invalidation generations are tracked per hash slot rather than per key so the
+# bookkeeping stays bounded; a collision only costs a skipped cache fill.
+_GENERATION_SLOTS = 4096
+
+
+class LRUCache:
+    """In-process LRU with a per-entry TTL and a hard bound on entries."""
+
+    def __init__(
+        self,
+        max_entries: int,
+        ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._max_entries = max_entries
+        self._ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: str) -> Any:
+        entry = self._entries.get(key)
+        if entry is None:
+            return _MISSING
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.expirations += 1
+            return _MISSING
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: str, value: Any) -> None:
+        self._entries[key] = (self._clock() + self._ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: str) -> None:
+        self._entries.pop(key, None)
+
+
+class ProcessLocalCacheBackend:
+    """``SharedCacheBackend`` kept in this process's memory, so it is not shared.
+
+    Only a stand-in for tests and single-process runs; a real backend (e.g.
+    Redis) is what other processes would see.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self._clock = clock
+        self._entries: dict[str, tuple[float, Any]] = {}
+
+    async def get(self, key: str) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: Any, ttl_seconds: float) -> None:
+        self._entries[key] = (self._clock() + ttl_seconds, value)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+
+class ReadCache:
+    """Read-through cache: local LRU first, then an optional shared backend.
+
+    Concurrent misses for the same key share a single load. A load whose key
+    was invalidated while it ran is returned to its caller but not stored, so
+    a slow read cannot overwrite a newer invalidation.
+
+    Other processes keep their own LRU. With a ``broadcast`` callback set
+    (``app.cache.invalidation``) every invalidation is also sent to them and
+    applied with ``invalidate_local``; without one, or when a broadcast is
+    lost, their copy stays stale for up to the local TTL.
+    """
+
+    def __init__(
+        self,
+        local: LRUCache,
+        shared: SharedCacheBackend | None = None,
+        shared_ttl_seconds: float = 60.0,
+    ) -> None:
+        self._local = local
+        self._shared = shared
+        self._shared_ttl_seconds = shared_ttl_seconds
+        self._generations = [0] * _GENERATION_SLOTS
+        self._broadcast: Callable[[Sequence[str]], None] | None = None
+        self._inflight: dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        value = self._local.get(key)
+        if value is not _MISSING:
+            self.hits += 1
+            return value
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(inflight)
+            except asyncio.CancelledError:
+                if not inflight.cancelled():
+                    raise
+                # The caller that owned the load was cancelled; load ourselves.
+                return await self.get_or_load(key, loader)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            value = await self._load(key, loader)
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Nobody may be waiting; mark the exception as retrieved.
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        generation = self._generation(key)
+        if self._shared is not None:
+            value = await self._shared_get(key)
+            if value is not None:
+                self.hits += 1
+                if self._generation(key) == generation:
+                    self._local.set(key, value)
+                return value
+        self.misses += 1
+        value = await loader()
+        if self._generation(key) == generation:
+            self._local.set(key, value)
+            if self._shared is not None:
+                await self._shared_set(key, value)
+        return value
+
+    def set_broadcast(self, broadcast: Callable[[Sequence[str]], None] | None) -> None:
+        """Send every later invalidation to other processes through ``broadcast``."""
+        self._broadcast = broadcast
+
+    async def invalidate(self, *keys: str) -> None:
+        self.invalidate_local(*keys)
+        if self._broadcast is not None and keys:
+            self._broadcast(keys)
+        if self._shared is not None and keys:
+            try:
+                await self._shared.delete(*keys)
+            except Exception:
+                logger.exception("Shared cache delete failed keys=%s", keys)
+
+    def invalidate_local(self, *keys: str) -> None:
+        """Drop ``keys`` from this process only, e.g. on another process's broadcast."""
+        for key in keys:
+            self._generations[hash(key) % _GENERATION_SLOTS] += 1
+            self._local.delete(key)
+        self.invalidations += len(keys)
+
+    def for_unit_of_work(self, uow) -> "UnitOfWorkReadCache":
+        return UnitOfWorkReadCache(self, uow)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self._local.evictions,
+            "expirations": self._local.expirations,
+            "invalidations": self.invalidations,
+            "entries": len(self._local),
+        }
+
+    def _generation(self, key: str) -> int:
+        return self._generations[hash(key) % _GENERATION_SLOTS]
+
+    async def _shared_get(self, key: str) -> Any | None:
+        try:
+            return await self._shared.get(key)
+        except Exception:
+            logger.exception("Shared cache get failed key=%s", key)
+            return None
+
+    async def _shared_set(self, key: str, value: Any) -> None:
+        try:
+            await self._shared.set(key, value, self._shared_ttl_seconds)
+        except Exception:
+            logger.exception("Shared cache set failed key=%s", key)
+
+
+class UnitOfWorkReadCache:
+    """``ReadCache`` view for writers: invalidates now and again after commit.
+
+    The second pass drops values that concurrent readers loaded from the
+    pre-commit state between the first invalidation and the commit.
+    """
+
+    def __init__(self, cache: ReadCache, uow) -> None:
+        self._cache = cache
+        self._uow = uow
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]) -> Any:
+        return await self._cache.get_or_load(key, loader)
+
+    async def invalidate(self, *keys: str) -> None:
+        await self._cache.invalidate(*keys)
+        self._uow.after_commit(lambda: self._cache.invalidate(*keys))
+
+
+def build_read_cache() -> ReadCache | None:
+    if not READ_CACHE_ENABLED:
+        return None
+    shared = ProcessLocalCacheBackend() if READ_CACHE_SHARED_BACKEND == "memory" else None
+    return ReadCache(
+        LRUCache(READ_CACHE_MAX_ENTRIES, READ_CACHE_TTL_SECONDS),
+        shared=shared,
+        shared_ttl_seconds=READ_CACHE_TTL_SECONDS,
+    )
+
+
+read_cache = build_read_cache()
@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.logging import request_id_ctx_var
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DB_QUERY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+# The same statement this many times in one request is reported as a likely N+1.
+N_PLUS_ONE_THRESHOLD = 5
+# Per-request statement log kept for the summary; counts stay exact beyond it.
+MAX_RECORDED_STATEMENTS = 200
+
+db_queries_total = registry.counter(
+    "db_queries_total", "SQL statements executed.", ("dialect",)
+)
+db_query_duration_seconds = registry.histogram(
+    "db_query_duration_seconds", "SQL statement execution time.", ("dialect",), DB_QUERY_BUCKETS
+)
+db_n_plus_one_total = registry.counter(
+    "db_n_plus_one_total", "Requests that repeated one statement past the N+1 threshold."
+)
+
+
+@dataclass(frozen=True)
+class QueryRecord:
+    statement: str
+    seconds: float
+
+
+@dataclass
+class QueryStats:
+    """Statements run within one request/update; shared by reference across tasks."""
+
+    request_id: str = "-"
+    count: int = 0
+    seconds: float = 0.0
+    statements: list[QueryRecord] = field(default_factory=list)
+    repeats: dict[str, int] = field(default_factory=dict)
+
+    def record(self, statement: str, seconds: float) -> None:
+        self.count += 1
+        self.seconds += seconds
+        self.repeats[statement] = self.repeats.get(statement, 0) + 1
+        if len(self.statements) < MAX_RECORDED_STATEMENTS:
+            self.statements.append(QueryRecord(statement, seconds))
+
+    def repeated(self, threshold: int = N_PLUS_ONE_THRESHOLD) -> dict[str, int]:
+        return {
+            statement: count
+            for statement, count in self.repeats.items()
+            if count >= threshold
+        }
+
+
+query_stats_ctx_var: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def start_query_stats() -> QueryStats:
+    stats = QueryStats(request_id=request_id_ctx_var.get())
+    query_stats_ctx_var.set(stats)
+    return stats
+
+
+def _shorten(statement: str, limit: int = 200) -> str:
+    flat = " ".join(statement.split())
+    return flat if len(flat) <= limit else flat[: limit - 3] + "..."
+
+
+def log_query_summary(stats: QueryStats, label: str) -> None:
+    """One summary line per request, plus a warning per likely N+1 pattern."""
+    if stats.count == 0:
+        return
+    slowest = max(stats.statements, key=lambda record: record.seconds, default=None)
+    logger.info(
+        "SQL summary for %s: %d statements in %.1fms (slowest %.1fms: %s)",
+        label,
+        stats.count,
+        stats.seconds * 1000,
+        slowest.seconds * 1000 if slowest else 0.0,
+        _shorten(slowest.statement) if slowest else "-",
+    )
+    repeated = stats.repeated()
+    if repeated:
+        db_n_plus_one_total.inc()
+    for statement, count in repeated.items():
+        logger.warning(
+            "Possible N+1 in %s: statement ran %d times: %s", label, count, _shorten(statement)
+        )
+
+
+@contextmanager
+def track_queries(label: str | None = None) -> Iterator[QueryStats]:
+    """Collect statements run in this context; logs a summary when ``label`` is set."""
+    stats = QueryStats(request_id=request_id_ctx_var.get())
+    token = query_stats_ctx_var.set(stats)
+    try:
+        yield stats
+    finally:
+        query_stats_ctx_var.reset(token)
+        if label is not None:
+            log_query_summary(stats, label)
+
+
+@contextmanager
+def assert_max_queries(limit: int) -> Iterator[QueryStats]:
+    """Fail if the block runs more than ``limit`` SQL statements.
+
+    Meant for tests pinning the query budget of a route or use case.
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > limit:
+        listing = "\n".join(f"  {_shorten(record.statement)}" for record in stats.statements)
+        raise AssertionError(
+            f"expected at most {limit} SQL statements, ran {stats.count}:\n{listing}"
+        )
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    conn.info.setdefault("query_started_at", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:
+    started = conn.info["query_started_at"].pop()
+    elapsed = time.perf_counter() - started
+    dialect = conn.dialect.name
+    db_queries_total.inc(dialect=dialect)
+    db_query_duration_seconds.observe(elapsed, dialect=dialect)
+    stats = query_stats_ctx_var.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def _handle_error(exception_context) -> None:
+    connection = exception_context.connection
+    if connection is not None:
+        started = connection.info.get("query_started_at")
+        if started:
+            started.pop()
+
+
+def install() -> None:
+    """Attach query timing to every engine in the process (idempotent)."""
+    if event.contains(Engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(Engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(Engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(Engine, "handle_error", _handle_error)
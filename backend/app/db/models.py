@@ -1,9 +1,11 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import ClassVar
 
 from sqlalchemy import (
     BigInteger,
+    Boolean,
     CheckConstraint,
     DateTime,
     Float,
@@ -12,6 +14,7 @@ from sqlalchemy import (
     String,
     UniqueConstraint,
     func,
+    text,
 )
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column
 
@@ -46,12 +49,36 @@ class Referral(Base):
             "referrer_telegram_id <> referred_telegram_id",
             name="ck_referrals_no_self_referral",
         ),
-        Index("ix_referrals_referrer", "referrer_telegram_id"),
+        Index(
+            "ix_referrals_referrer_created_id", "referrer_telegram_id", "created_at", "id"
+        ),
         Index("ix_referrals_referred", "referred_telegram_id"),
     )
 
 
+class ReferrerStats(Base):
+    """Per-referrer referral counter maintained in the same transaction as inserts."""
+
+    __tablename__ = "referrer_stats"
+
+    referrer_telegram_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    referral_count: Mapped[int] = mapped_column(
+        BigInteger, server_default="0", nullable=False
+    )
+    updated_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+
+
 class PriceSample(Base):
+    """Raw price sample; on PostgreSQL range-partitioned by day (migration 0006).
+
+    The partitioned PostgreSQL table's primary key is ``(id, created_at)``
+    because the partition key has to be part of it. The model keeps ``id``
+    alone: ids still come from one sequence so they stay unique, and a
+    composite key would stop SQLite from autoincrementing ``id``.
+    """
+
     __tablename__ = "price_samples"
 
     id: Mapped[int] = mapped_column(Integer, primary_key=True)
@@ -62,3 +89,67 @@ class PriceSample(Base):
     )
 
     __table_args__ = (Index("ix_price_samples_symbol_created", "symbol", "created_at"),)
+
+
+class _PriceRollup:
+    """OHLC candle of one symbol over one bucket, merged in as samples arrive."""
+
+    bucket_seconds: ClassVar[int]
+
+    symbol: Mapped[str] = mapped_column(String(32), primary_key=True)
+    bucket_start: Mapped[datetime] = mapped_column(DateTime(timezone=True), primary_key=True)
+    open: Mapped[float] = mapped_column(Float, nullable=False)
+    high: Mapped[float] = mapped_column(Float, nullable=False)
+    low: Mapped[float] = mapped_column(Float, nullable=False)
+    close: Mapped[float] = mapped_column(Float, nullable=False)
+    sample_count: Mapped[int] = mapped_column(Integer, nullable=False)
+
+
+class PriceRollup1m(_PriceRollup, Base):
+    __tablename__ = "price_rollups_1m"
+    bucket_seconds = 60
+
+
+class PriceRollup1h(_PriceRollup, Base):
+    __tablename__ = "price_rollups_1h"
+    bucket_seconds = 3600
+
+
+class PriceRollup1d(_PriceRollup, Base):
+    __tablename__ = "price_rollups_1d"
+    bucket_seconds = 86400
+
+
+PRICE_ROLLUPS: tuple[type[_PriceRollup], ...] = (PriceRollup1m, PriceRollup1h, PriceRollup1d)
+
+
+class PriceAlertSubscription(Base):
+    """A user's one-shot price alert; deactivated when the worker fires it."""
+
+    __tablename__ = "price_alert_subscriptions"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    telegram_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
+    symbol: Mapped[str] = mapped_column(String(32), nullable=False)
+    direction: Mapped[str] = mapped_column(String(8), nullable=False)
+    threshold: Mapped[float] = mapped_column(Float, nullable=False)
+    active: Mapped[bool] = mapped_column(Boolean, server_default=text("true"), nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True), server_default=func.now(), nullable=False
+    )
+    triggered_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+    __table_args__ = (
+        CheckConstraint(
+            "direction IN ('above', 'below')", name="ck_price_alert_subscriptions_direction"
+        ),
+        CheckConstraint("threshold > 0", name="ck_price_alert_subscriptions_threshold"),
+        Index("ix_price_alert_subscriptions_telegram_id", "telegram_id", "id"),
+        # The worker pages through active subscriptions by id.
+        Index(
+            "ix_price_alert_subscriptions_active_id",
+            "id",
+            postgresql_where=text("active"),
+            sqlite_where=text("active"),
+        ),
+    )
@@ -0,0 +1,132 @@
+"""Fan-out between processes over PostgreSQL LISTEN/NOTIFY.
+
+A ``NotifyPublisher`` queues text payloads and sends whatever has queued up
+with one ``pg_notify`` statement per batch; ``listen`` holds one pooled
+connection in ``LISTEN`` and hands every payload to a callback. Used for the
+live price stream (``app.notifications.price_relay``) and read cache
+invalidation (``app.cache.invalidation``).
+
+Only PostgreSQL through asyncpg is supported (``notify_supported``).
+Delivery is best effort: payloads sent while a listener is reconnecting are
+lost, and ones that do not fit the queue or a failed batch are dropped.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads are capped at 8000 bytes by PostgreSQL.
+MAX_PAYLOAD_BYTES = 8000
+
+# One statement per drained batch; NOTIFY is delivered when it commits.
+_NOTIFY_MANY = text(
+    "SELECT pg_notify(:channel, payload) FROM unnest(CAST(:payloads AS text[])) AS payload"
+)
+
+notify_messages_total = registry.counter(
+    "notify_messages_total",
+    "LISTEN/NOTIFY messages by channel and outcome (sent, received, dropped, invalid).",
+    ("channel", "outcome"),
+)
+
+
+def notify_supported(engine: AsyncEngine) -> bool:
+    return engine.dialect.name == "postgresql" and engine.dialect.driver == "asyncpg"
+
+
+class NotifyPublisher:
+    """Sends payloads on ``channel`` from ``run``; ``send`` never waits."""
+
+    def __init__(self, engine: AsyncEngine, channel: str, max_pending: int = 10_000) -> None:
+        self._engine = engine
+        self.channel = channel
+        self._pending: asyncio.Queue[str] = asyncio.Queue(maxsize=max_pending)
+
+    def send(self, payload: str) -> bool:
+        """Queue ``payload``; False if it was dropped (too large or queue full)."""
+        if len(payload.encode()) >= MAX_PAYLOAD_BYTES:
+            notify_messages_total.inc(channel=self.channel, outcome="dropped")
+            logger.warning("NOTIFY payload too large channel=%s", self.channel)
+            return False
+        try:
+            self._pending.put_nowait(payload)
+        except asyncio.QueueFull:
+            notify_messages_total.inc(channel=self.channel, outcome="dropped")
+            return False
+        return True
+
+    async def run(self) -> None:
+        while True:
+            payloads = [await self._pending.get()]
+            while not self._pending.empty():
+                payloads.append(self._pending.get_nowait())
+            try:
+                async with self._engine.begin() as conn:
+                    await conn.execute(
+                        _NOTIFY_MANY, {"channel": self.channel, "payloads": payloads}
+                    )
+            except Exception:
+                notify_messages_total.inc(len(payloads), channel=self.channel, outcome="dropped")
+                logger.exception(
+                    "Failed to send notifications channel=%s count=%s",
+                    self.channel,
+                    len(payloads),
+                )
+            else:
+                notify_messages_total.inc(len(payloads), channel=self.channel, outcome="sent")
+
+
+async def listen(
+    engine: AsyncEngine,
+    channel: str,
+    on_payload: Callable[[str], None],
+    retry_seconds: float = 5.0,
+) -> None:
+    """Call ``on_payload`` for every NOTIFY on ``channel`` until cancelled.
+
+    Holds one pooled connection; when it is lost the listener reconnects
+    after ``retry_seconds``.
+    """
+    while True:
+        try:
+            async with engine.connect() as conn:
+                raw = await conn.get_raw_connection()
+                driver = raw.driver_connection
+                lost = asyncio.get_running_loop().create_future()
+
+                def on_notify(connection: Any, pid: int, channel: str, payload: str) -> None:
+                    notify_messages_total.inc(channel=channel, outcome="received")
+                    try:
+                        on_payload(payload)
+                    except Exception:
+                        logger.exception("Notification handler failed channel=%s", channel)
+
+                def on_terminate(connection: Any) -> None:
+                    if not lost.done():
+                        lost.set_result(None)
+
+                driver.add_termination_listener(on_terminate)
+                await driver.add_listener(channel, on_notify)
+                logger.info("Listening for notifications channel=%s", channel)
+                try:
+                    await lost
+                finally:
+                    driver.remove_termination_listener(on_terminate)
+                    if not driver.is_closed():
+                        await driver.remove_listener(channel, on_notify)
+            logger.warning("Notification listener connection lost channel=%s", channel)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Notification listener failed channel=%s", channel)
+        await asyncio.sleep(retry_seconds)
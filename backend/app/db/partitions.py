@@ -0,0 +1,141 @@
+"""Daily range partitions of ``price_samples`` on PostgreSQL.
+
+Migration 0006 partitions the table by ``created_at``, one partition per UTC
+day named ``price_samples_pYYYYMMDD``. ``maintain_price_partitions`` creates
+the upcoming days ahead of time and drops days that fell out of retention,
+which is a catalog operation instead of a bulk DELETE. Other dialects, and
+databases that have not run the migration, are left untouched.
+"""
+
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from datetime import date, datetime, time, timedelta, timezone
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+logger = logging.getLogger(__name__)
+
+PARENT_TABLE = "price_samples"
+PARTITION_PREFIX = "price_samples_p"
+
+_IS_PARTITIONED = text(
+    """
+    SELECT EXISTS (
+        SELECT 1 FROM pg_partitioned_table AS pt
+        JOIN pg_class AS c ON c.oid = pt.partrelid
+        WHERE c.relname = :table AND pg_table_is_visible(c.oid)
+    )
+    """
+)
+_LIST_PARTITIONS = text(
+    """
+    SELECT child.relname FROM pg_inherits AS i
+    JOIN pg_class AS parent ON parent.oid = i.inhparent
+    JOIN pg_class AS child ON child.oid = i.inhrelid
+    WHERE parent.relname = :table AND pg_table_is_visible(parent.oid)
+    """
+)
+
+
+def partition_name(day: date) -> str:
+    return f"{PARTITION_PREFIX}{day:%Y%m%d}"
+
+
+def partition_day(name: str) -> date | None:
+    """The day a partition covers, or None for other tables (e.g. the default one)."""
+    if not name.startswith(PARTITION_PREFIX):
+        return None
+    try:
+        return datetime.strptime(name[len(PARTITION_PREFIX) :], "%Y%m%d").date()
+    except ValueError:
+        return None
+
+
+def plan_partitions(
+    existing: Iterable[str],
+    now: datetime,
+    days_ahead: int,
+    retention: timedelta | None,
+) -> tuple[list[date], list[str]]:
+    """Days to create (today through ``days_ahead``) and partitions to drop.
+
+    A partition is dropped once its whole day is older than ``now - retention``.
+    """
+    existing_days = {name: partition_day(name) for name in existing}
+    present = {day for day in existing_days.values() if day is not None}
+    today = now.astimezone(timezone.utc).date()
+    to_create = [
+        today + timedelta(days=offset)
+        for offset in range(days_ahead + 1)
+        if today + timedelta(days=offset) not in present
+    ]
+    to_drop: list[str] = []
+    if retention is not None:
+        cutoff = now - retention
+        to_drop = sorted(
+            name
+            for name, day in existing_days.items()
+            if day is not None and _day_start(day + timedelta(days=1)) <= cutoff
+        )
+    return to_create, to_drop
+
+
+def _day_start(day: date) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=timezone.utc)
+
+
+async def is_partitioned(session: AsyncSession) -> bool:
+    if session.get_bind().dialect.name != "postgresql":
+        return False
+    return bool(await session.scalar(_IS_PARTITIONED, {"table": PARENT_TABLE}))
+
+
+async def maintain_price_partitions(
+    session: AsyncSession,
+    now: datetime,
+    days_ahead: int = 7,
+    retention: timedelta | None = None,
+) -> dict[str, list[str]] | None:
+    """Create upcoming daily partitions and drop expired ones.
+
+    Returns None when ``price_samples`` is not partitioned.
+
+    Each DDL statement runs in a savepoint, so a partition that cannot be
+    created (its day already has rows in the default partition) is logged
+    and skipped without losing the rest of the run.
+    """
+    if not await is_partitioned(session):
+        return None
+    existing = (await session.execute(_LIST_PARTITIONS, {"table": PARENT_TABLE})).scalars()
+    to_create, to_drop = plan_partitions(existing, now, days_ahead, retention)
+    created: list[str] = []
+    for day in to_create:
+        name = partition_name(day)
+        try:
+            async with session.begin_nested():
+                await session.execute(
+                    text(
+                        f'CREATE TABLE IF NOT EXISTS "{name}" PARTITION OF {PARENT_TABLE} '
+                        f"FOR VALUES FROM ('{_day_start(day).isoformat()}') "
+                        f"TO ('{_day_start(day + timedelta(days=1)).isoformat()}')"
+                    )
+                )
+        except Exception:
+            logger.exception("Failed to create price sample partition %s", name)
+            continue
+        created.append(name)
+    dropped: list[str] = []
+    for name in to_drop:
+        try:
+            async with session.begin_nested():
+                await session.execute(text(f'DROP TABLE IF EXISTS "{name}"'))
+        except Exception:
+            logger.exception("Failed to drop price sample partition %s", name)
+            continue
+        dropped.append(name)
+    if created or dropped:
+        logger.info("Price sample partitions created=%s dropped=%s", created, dropped)
+    return {"created": created, "dropped": dropped}
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, replace
+from typing import Any
+
+from sqlalchemy.engine import make_url
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core import config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class PoolProfile:
+    name: str
+    pool_size: int
+    max_overflow: int
+    pool_timeout: float
+    pool_recycle: int
+    pool_pre_ping: bool
+    statement_cache_size: int
+
+
+# Worst-case connections per replica are pool_size + max_overflow; size the
+# fleet against Postgres max_connections with that sum, not pool_size.
+POOL_PROFILES = {
+    "api": PoolProfile("api", 10, 10, 10.0, 1800, True, 500),
+    "bot": PoolProfile("bot", 4, 4, 10.0, 1800, True, 500),
+    "worker": PoolProfile("worker", 2, 0, 30.0, 1800, True, 100),
+}
+
+
+def _override(value: str | None, cast, current):
+    if value is None or value == "":
+        return current
+    try:
+        return cast(value)
+    except ValueError:
+        logger.warning("Invalid pool override %r; keeping %r", value, current)
+        return current
+
+
+def _as_bool(value: str) -> bool:
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def resolve_pool_profile(name: str | None = None) -> PoolProfile:
+    """Profile ``name`` (default ``DB_POOL_PROFILE``) with DB_POOL_* overrides."""
+    name = name or config.DB_POOL_PROFILE
+    profile = POOL_PROFILES.get(name)
+    if profile is None:
+        logger.warning("Unknown DB_POOL_PROFILE=%s; using 'api'", name)
+        profile = POOL_PROFILES["api"]
+    return replace(
+        profile,
+        pool_size=_override(config.DB_POOL_SIZE, int, profile.pool_size),
+        max_overflow=_override(config.DB_POOL_MAX_OVERFLOW, int, profile.max_overflow),
+        pool_timeout=_override(config.DB_POOL_TIMEOUT_SECONDS, float, profile.pool_timeout),
+        pool_recycle=_override(config.DB_POOL_RECYCLE_SECONDS, int, profile.pool_recycle),
+        pool_pre_ping=_override(config.DB_POOL_PRE_PING, _as_bool, profile.pool_pre_ping),
+        statement_cache_size=_override(
+            config.DB_STATEMENT_CACHE_SIZE, int, profile.statement_cache_size
+        ),
+    )
+
+
+class PoolMetrics:
+    """Checkout wait counters; updated from whichever thread runs the pool."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, waited: float, timed_out: bool) -> None:
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+            self.wait_seconds_total += waited
+            self.wait_seconds_max = max(self.wait_seconds_max, waited)
+
+    def snapshot(self) -> dict[str, float | int]:
+        with self._lock:
+            attempts = self.checkouts + self.timeouts
+            return {
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.timeouts,
+                "checkout_wait_seconds_total": round(self.wait_seconds_total, 6),
+                "checkout_wait_seconds_avg": (
+                    round(self.wait_seconds_total / attempts, 6) if attempts else 0.0
+                ),
+                "checkout_wait_seconds_max": round(self.wait_seconds_max, 6),
+            }
+
+
+class InstrumentedAsyncPool(AsyncAdaptedQueuePool):
+    """Queue pool that times how long each checkout waits for a connection."""
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - started, timed_out=False)
+        return connection
+
+
+def engine_options(database_url: str, profile: PoolProfile | None = None) -> dict[str, Any]:
+    """``create_async_engine`` keyword arguments for ``database_url``.
+
+    Only server databases get a sized pool; SQLite keeps SQLAlchemy's defaults.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() != "postgresql":
+        return {}
+    profile = profile or resolve_pool_profile()
+    options: dict[str, Any] = {
+        "poolclass": InstrumentedAsyncPool,
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+        "pool_timeout": profile.pool_timeout,
+        "pool_recycle": profile.pool_recycle,
+        "pool_pre_ping": profile.pool_pre_ping,
+    }
+    if url.get_driver_name() == "asyncpg":
+        options["connect_args"] = {
+            "prepared_statement_cache_size": profile.statement_cache_size,
+            "statement_cache_size": profile.statement_cache_size,
+        }
+    return options
+
+
+def pool_stats(engine: AsyncEngine) -> dict[str, Any]:
+    """Live occupancy of ``engine``'s pool plus checkout wait counters."""
+    pool = engine.sync_engine.pool
+    stats: dict[str, Any] = {"pool": type(pool).__name__}
+    if isinstance(pool, AsyncAdaptedQueuePool):
+        stats.update(
+            size=pool.size(),
+            checked_out=pool.checkedout(),
+            idle=pool.checkedin(),
+            overflow=max(pool.overflow(), 0),
+            max_overflow=pool._max_overflow,
+            timeout_seconds=pool.timeout(),
+        )
+    metrics = getattr(pool, "metrics", None)
+    if isinstance(metrics, PoolMetrics):
+        stats.update(metrics.snapshot())
+    return stats
+
+
+async def log_pool_stats(engine: AsyncEngine, interval_seconds: float) -> None:
+    """Log ``pool_stats`` every ``interval_seconds`` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        logger.info("Database pool stats: %s", pool_stats(engine))
@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections.abc import Awaitable, Callable, Iterable
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+logger = logging.getLogger(__name__)
+
+# Zero while the replica has replayed everything it received, so an idle
+# primary does not read as lag.
+_POSTGRES_REPLICA_LAG = text(
+    "SELECT CASE"
+    " WHEN NOT pg_is_in_recovery() THEN 0"
+    " WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)"
+    " END"
+)
+
+# Sticky entries are pruned once the map grows past this many telegram ids.
+_STICKY_PRUNE_THRESHOLD = 10_000
+
+
+async def replica_lag_seconds(session: AsyncSession) -> float:
+    """Replay lag of the database behind ``session``; 0 for non-Postgres."""
+    if session.get_bind().dialect.name != "postgresql":
+        return 0.0
+    result = await session.execute(_POSTGRES_REPLICA_LAG)
+    return float(result.scalar_one())
+
+
+class ReplicaRouter:
+    """Chooses the replica for read-only units of work when it is safe to.
+
+    Reads stay on the primary while the replica lags more than
+    ``max_lag_seconds`` (or the lag probe fails), and for ``sticky_seconds``
+    after this process committed a write for one of the read's telegram ids.
+    Stickiness is per process.
+    """
+
+    def __init__(
+        self,
+        replica: async_sessionmaker[AsyncSession] | None,
+        max_lag_seconds: float = 5.0,
+        lag_check_interval_seconds: float = 2.0,
+        sticky_seconds: float = 10.0,
+        lag_probe: Callable[[AsyncSession], Awaitable[float]] = replica_lag_seconds,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._replica = replica
+        self._max_lag_seconds = max_lag_seconds
+        self._lag_check_interval_seconds = lag_check_interval_seconds
+        self._sticky_seconds = sticky_seconds
+        self._lag_probe = lag_probe
+        self._clock = clock
+        self._sticky_until: dict[int, float] = {}
+        self._lag_checked_at: float | None = None
+        self._replica_healthy = False
+        self._lag_lock = asyncio.Lock()
+        self.replica_reads = 0
+        self.lag_fallbacks = 0
+        self.sticky_fallbacks = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self._replica is not None
+
+    async def choose(
+        self, telegram_ids: Iterable[int] = ()
+    ) -> async_sessionmaker[AsyncSession] | None:
+        """Replica session factory for this read, or ``None`` for the primary."""
+        if self._replica is None:
+            return None
+        if self._is_sticky(telegram_ids):
+            self.sticky_fallbacks += 1
+            return None
+        if not await self._replica_is_fresh():
+            self.lag_fallbacks += 1
+            return None
+        self.replica_reads += 1
+        return self._replica
+
+    def mark_written(self, telegram_ids: Iterable[int]) -> None:
+        if self._replica is None or self._sticky_seconds <= 0:
+            return
+        now = self._clock()
+        until = now + self._sticky_seconds
+        for telegram_id in telegram_ids:
+            self._sticky_until[telegram_id] = until
+        if len(self._sticky_until) > _STICKY_PRUNE_THRESHOLD:
+            self._sticky_until = {
+                key: value for key, value in self._sticky_until.items() if value > now
+            }
+
+    def stats(self) -> dict[str, int | bool]:
+        return {
+            "enabled": self.enabled,
+            "replica_healthy": self._replica_healthy,
+            "replica_reads": self.replica_reads,
+            "lag_fallbacks": self.lag_fallbacks,
+            "sticky_fallbacks": self.sticky_fallbacks,
+        }
+
+    def _is_sticky(self, telegram_ids: Iterable[int]) -> bool:
+        now = self._clock()
+        return any(self._sticky_until.get(telegram_id, 0.0) > now for telegram_id in telegram_ids)
+
+    async def _replica_is_fresh(self) -> bool:
+        if not self._lag_check_due():
+            return self._replica_healthy
+        async with self._lag_lock:
+            if self._lag_check_due():
+                self._replica_healthy = await self._probe()
+                self._lag_checked_at = self._clock()
+        return self._replica_healthy
+
+    def _lag_check_due(self) -> bool:
+        return (
+            self._lag_checked_at is None
+            or self._clock() - self._lag_checked_at >= self._lag_check_interval_seconds
+        )
+
+    async def _probe(self) -> bool:
+        try:
+            async with self._replica() as session:
+                lag = await self._lag_probe(session)
+        except Exception:
+            logger.warning("Replica lag check failed; reading from primary", exc_info=True)
+            return False
+        if lag > self._max_lag_seconds:
+            logger.warning("Replica lag %.1fs exceeds limit; reading from primary", lag)
+            return False
+        return True
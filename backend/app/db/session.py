@@ -1,47 +1,165 @@
 from __future__ import annotations
 
-from collections.abc import AsyncIterator
+from collections.abc import AsyncIterator, Awaitable, Callable
 
 import logging
+from weakref import WeakKeyDictionary
 
-from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
 
-from app.core.config import DATABASE_URL
+from app.core.config import (
+    DATABASE_READ_URL,
+    DATABASE_URL,
+    READ_YOUR_WRITES_SECONDS,
+    REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+    REPLICA_MAX_LAG_SECONDS,
+)
+from app.db import instrumentation
+from app.db.pool import engine_options
+from app.db.replica import ReplicaRouter
 from app.usecases.errors import DatabaseConnectionError
 
 logger = logging.getLogger(__name__)
 
-engine = create_async_engine(DATABASE_URL, echo=False, future=True)
+instrumentation.install()
+
+engine = create_async_engine(
+    DATABASE_URL, echo=False, future=True, **engine_options(DATABASE_URL)
+)
 SessionFactory = async_sessionmaker(engine, expire_on_commit=False, class_=AsyncSession)
 
+read_engine = (
+    create_async_engine(
+        DATABASE_READ_URL, echo=False, future=True, **engine_options(DATABASE_READ_URL)
+    )
+    if DATABASE_READ_URL
+    else None
+)
+ReadSessionFactory = (
+    async_sessionmaker(read_engine, expire_on_commit=False, class_=AsyncSession)
+    if read_engine is not None
+    else None
+)
+replica_router = ReplicaRouter(
+    ReadSessionFactory,
+    max_lag_seconds=REPLICA_MAX_LAG_SECONDS,
+    lag_check_interval_seconds=REPLICA_LAG_CHECK_INTERVAL_SECONDS,
+    sticky_seconds=READ_YOUR_WRITES_SECONDS,
+)
+
 
 async def get_session() -> AsyncIterator[AsyncSession]:
     async with SessionFactory() as session:
         yield session
 
 
+_autocommit_engines: WeakKeyDictionary[AsyncEngine, AsyncEngine] = WeakKeyDictionary()
+
+
+def _autocommit_engine(session_factory: async_sessionmaker[AsyncSession]) -> AsyncEngine | None:
+    """Autocommit view of ``session_factory``'s engine, sharing its pool."""
+    bind = session_factory.kw.get("bind")
+    if not isinstance(bind, AsyncEngine):
+        return None
+    autocommit = _autocommit_engines.get(bind)
+    if autocommit is None:
+        autocommit = bind.execution_options(isolation_level="AUTOCOMMIT")
+        _autocommit_engines[bind] = autocommit
+    return autocommit
+
+
+def _is_connection_failure(exc: BaseException | None) -> bool:
+    if isinstance(exc, (OSError, PoolTimeoutError)):
+        return True
+    if isinstance(exc, DBAPIError):
+        return exc.connection_invalidated or isinstance(exc.orig, OSError)
+    return False
+
+
 class UnitOfWork:
-    def __init__(self, session_factory: async_sessionmaker[AsyncSession] = SessionFactory) -> None:
+    """Transaction scope over one session.
+
+    No connection is taken until the first statement runs, and COMMIT is
+    only sent if a transaction actually started. ``read_only=True`` runs each
+    statement in autocommit mode, so reads pay no BEGIN/COMMIT round trips;
+    use it only for work that never writes.
+
+    With ``read_only=True`` and a ``router`` the session may come from the
+    read replica; ``for_user`` names the telegram ids the work concerns so
+    reads can stay on the primary right after this process wrote for them.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = SessionFactory,
+        *,
+        read_only: bool = False,
+        router: ReplicaRouter | None = None,
+    ) -> None:
         self._session_factory = session_factory
+        self._read_only = read_only
+        self._router = router
+        self._telegram_ids: tuple[int, ...] = ()
         self.session: AsyncSession | None = None
+        self._after_commit: list[Callable[[], Awaitable[None]]] = []
+
+    @property
+    def read_only(self) -> bool:
+        return self._read_only
+
+    def for_user(self, *telegram_ids: int) -> "UnitOfWork":
+        self._telegram_ids += telegram_ids
+        return self
+
+    def after_commit(self, callback: Callable[[], Awaitable[None]]) -> None:
+        """Run ``callback`` once the transaction has committed successfully."""
+        self._after_commit.append(callback)
 
     async def __aenter__(self) -> "UnitOfWork":
-        self.session = self._session_factory()
-        try:
-            await self.session.begin()
-        except (OSError, SQLAlchemyError) as exc:
-            logger.exception("Failed to open database session")
-            await self.session.close()
-            self.session = None
-            raise DatabaseConnectionError("Database connection failed") from exc
+        session_factory = self._session_factory
+        if self._read_only and self._router is not None:
+            session_factory = await self._router.choose(self._telegram_ids) or session_factory
+        autocommit = _autocommit_engine(session_factory) if self._read_only else None
+        self.session = (
+            session_factory(bind=autocommit) if autocommit is not None else session_factory()
+        )
         return self
 
     async def __aexit__(self, exc_type, exc, tb) -> None:
         if not self.session:
             return
+        session = self.session
+        callbacks, self._after_commit = self._after_commit, []
         if exc_type:
-            await self.session.rollback()
-        else:
-            await self.session.commit()
-        await self.session.close()
+            try:
+                await session.close()
+            except Exception:
+                logger.warning("Failed to close database session", exc_info=True)
+            if _is_connection_failure(exc):
+                logger.exception("Database connection failed", exc_info=exc)
+                raise DatabaseConnectionError("Database connection failed") from exc
+            return
+        try:
+            if session.in_transaction() and not self._read_only:
+                await session.commit()
+        except Exception as commit_exc:
+            await session.close()
+            if _is_connection_failure(commit_exc):
+                logger.exception("Database connection failed on commit")
+                raise DatabaseConnectionError("Database connection failed") from commit_exc
+            raise
+        await session.close()
+        if self._router is not None and not self._read_only:
+            self._router.mark_written(self._telegram_ids)
+        for callback in callbacks:
+            try:
+                await callback()
+            except Exception:
+                logger.exception("After-commit callback failed")
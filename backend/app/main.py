@@ -1,6 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+import time
+from collections.abc import Awaitable, Callable
+from functools import partial
 
 if __package__ in (None, ""):
     from pathlib import Path
@@ -8,11 +12,22 @@ if __package__ in (None, ""):
 
     sys.path.append(str(Path(__file__).resolve().parents[1]))
 
-from fastapi import FastAPI, Request, status
+from fastapi import FastAPI, Request, Response, status
 from fastapi.responses import JSONResponse
 
+from app.api.ops import router as ops_router
 from app.api.routes import router
+from app.cache.invalidation import sync_read_cache
+from app.cache.memory import read_cache
+from app.core.config import BOT_MODE, PRICE_WORKER_EMBEDDED
 from app.core.logging import set_request_id, setup_logging
+from app.core.metrics import CONTENT_TYPE, CallbackMetric, registry
+from app.db.instrumentation import log_query_summary, start_query_stats
+from app.db.notify import notify_supported
+from app.db.pool import pool_stats
+from app.db.session import engine, read_engine
+from app.notifications.price_events import price_events
+from app.notifications.price_relay import listen_price_events, relay_supported
 from app.usecases.errors import DatabaseConnectionError
 
 setup_logging()
@@ -20,6 +35,146 @@ logger = logging.getLogger(__name__)
 
 app = FastAPI(title="Referral API", version="0.1.0")
 app.include_router(router)
+app.include_router(ops_router)
+
+if BOT_MODE == "webhook":
+    from bot.webhook import setup_webhook
+
+    setup_webhook(app)
+
+
+def _run_in_background(app: FastAPI, run: Callable[[], Awaitable[None]]) -> None:
+    """Start ``run()`` as a task on startup and cancel it on shutdown."""
+    tasks: list[asyncio.Task] = []
+
+    async def start() -> None:
+        tasks.append(asyncio.create_task(run()))
+
+    async def stop() -> None:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    app.add_event_handler("startup", start)
+    app.add_event_handler("shutdown", stop)
+
+
+if read_cache is not None and notify_supported(engine):
+    # Writes in other API replicas or the bot evict this process's cached reads.
+    _run_in_background(app, partial(sync_read_cache, engine, read_cache))
+
+if relay_supported(engine):
+    # Every replica streams the worker's events, whichever process runs it.
+    _run_in_background(app, partial(listen_price_events, engine, price_events))
+
+if PRICE_WORKER_EMBEDDED:
+    from app.worker.main import run_price_worker
+
+    # Without the relay only this process sees the embedded worker's events.
+    _run_in_background(
+        app,
+        partial(run_price_worker, events=None if relay_supported(engine) else price_events),
+    )
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP requests handled.", ("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Time until response headers are sent.",
+    ("method", "route", "status"),
+)
+http_requests_in_flight = registry.gauge(
+    "http_requests_in_flight", "HTTP requests currently being handled."
+)
+http_request_db_queries = registry.histogram(
+    "http_request_db_queries",
+    "SQL statements executed per request.",
+    ("route",),
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 50, 100),
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Time spent in SQL per request.", ("route",)
+)
+database_connection_errors_total = registry.counter(
+    "database_connection_errors_total", "Requests failed with DatabaseConnectionError."
+)
+
+
+def _cache_events():
+    stats = read_cache.stats() if read_cache is not None else {}
+    for event in ("hits", "misses", "evictions", "expirations", "invalidations"):
+        if event in stats:
+            yield {"event": event}, stats[event]
+
+
+def _cache_entries():
+    if read_cache is not None:
+        yield {}, read_cache.stats()["entries"]
+
+
+def _pools():
+    yield "primary", pool_stats(engine)
+    if read_engine is not None:
+        yield "replica", pool_stats(read_engine)
+
+
+def _pool_connections():
+    for pool, stats in _pools():
+        for state in ("checked_out", "idle", "overflow"):
+            if state in stats:
+                yield {"pool": pool, "state": state}, stats[state]
+
+
+def _pool_wait_seconds():
+    for pool, stats in _pools():
+        if "checkout_wait_seconds_total" in stats:
+            yield {"pool": pool}, stats["checkout_wait_seconds_total"]
+
+
+def _pool_timeouts():
+    for pool, stats in _pools():
+        if "checkout_timeouts" in stats:
+            yield {"pool": pool}, stats["checkout_timeouts"]
+
+
+registry.register(
+    CallbackMetric(
+        "read_cache_events_total", "Read cache events.", _cache_events, ("event",), "counter"
+    )
+)
+registry.register(CallbackMetric("read_cache_entries", "Read cache entries.", _cache_entries))
+registry.register(
+    CallbackMetric(
+        "db_pool_connections",
+        "Pooled connections by state.",
+        _pool_connections,
+        ("pool", "state"),
+    )
+)
+registry.register(
+    CallbackMetric(
+        "db_pool_checkout_wait_seconds_total",
+        "Time spent waiting for a pooled connection.",
+        _pool_wait_seconds,
+        ("pool",),
+        "counter",
+    )
+)
+registry.register(
+    CallbackMetric(
+        "db_pool_checkout_timeouts_total",
+        "Connection checkouts that timed out.",
+        _pool_timeouts,
+        ("pool",),
+        "counter",
+    )
+)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(content=registry.render(), media_type=CONTENT_TYPE)
 
 
 @app.exception_handler(DatabaseConnectionError)
@@ -27,6 +182,7 @@ async def database_connection_error_handler(
     request: Request, exc: DatabaseConnectionError
 ) -> JSONResponse:
     logger.warning("Database connection error", extra={"path": request.url.path})
+    database_connection_errors_total.inc()
     return JSONResponse(
         status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
         content={"detail": str(exc)},
@@ -36,6 +192,25 @@ async def database_connection_error_handler(
 @app.middleware("http")
 async def add_request_id(request: Request, call_next):
     request_id = set_request_id(request.headers.get("X-Request-ID"))
-    response = await call_next(request)
+    query_stats = start_query_stats()
+    http_requests_in_flight.inc()
+    started = time.perf_counter()
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+    finally:
+        http_requests_in_flight.dec()
+        # Label by route template, not raw path, to keep series cardinality bounded.
+        matched = request.scope.get("route")
+        route = getattr(matched, "path", "unmatched")
+        elapsed = time.perf_counter() - started
+        http_requests_total.inc(method=request.method, route=route, status=status_code)
+        http_request_duration_seconds.observe(
+            elapsed, method=request.method, route=route, status=status_code
+        )
+        http_request_db_queries.observe(query_stats.count, route=route)
+        http_request_db_seconds.observe(query_stats.seconds, route=route)
+        log_query_summary(query_stats, f"{request.method} {route}")
     response.headers["X-Request-ID"] = request_id
     return response
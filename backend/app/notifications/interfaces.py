@@ -1,8 +1,14 @@
 from __future__ import annotations
 
-from typing import Protocol
+from typing import Any, Protocol
 
 
 class TelegramNotifier(Protocol):
-    async def send_message(self, text: str) -> None:
+    async def send_message(self, text: str, chat_id: int | str | None = None) -> None:
+        """Send ``text`` to ``chat_id``, or to the notifier's default chat."""
+        ...
+
+
+class PriceEventPublisher(Protocol):
+    def publish(self, event: str, data: dict[str, Any]) -> None:
         ...
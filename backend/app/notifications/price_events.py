@@ -0,0 +1,123 @@
+"""In-process pub/sub for live price samples and alerts.
+
+``PriceAlertService`` publishes to ``price_events``; each subscriber (one
+per streaming client) gets its own bounded queue. Publishing never waits: a
+subscriber whose queue is full is dropped, and its stream ends with a
+``dropped`` event so the client can reconnect, instead of slowing down the
+worker or growing memory without bound.
+
+Only publishers in the same process are seen. The API serves the stream of
+the price worker it embeds (``PRICE_WORKER_EMBEDDED=1``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import itertools
+import logging
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import Any
+
+from app.core.config import PRICE_STREAM_BUFFER_SIZE
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+PRICE_EVENT = "price"
+ALERT_EVENT = "alert"
+DROPPED_EVENT = "dropped"
+
+price_stream_subscribers = registry.gauge(
+    "price_stream_subscribers", "Connected live price stream clients."
+)
+price_stream_events_total = registry.counter(
+    "price_stream_events_total", "Events published to the live price stream.", ("event",)
+)
+price_stream_dropped_total = registry.counter(
+    "price_stream_dropped_total", "Live price stream clients dropped for falling behind."
+)
+
+
+@dataclass(frozen=True)
+class PriceEvent:
+    id: int
+    event: str
+    data: dict[str, Any]
+
+
+class PriceSubscription:
+    def __init__(self, bus: "PriceEventBus", symbols: frozenset[str] | None, size: int) -> None:
+        self._bus = bus
+        self.symbols = symbols
+        self._queue: asyncio.Queue[PriceEvent] = asyncio.Queue(maxsize=size)
+        self.dropped = False
+
+    def wants(self, event: PriceEvent) -> bool:
+        return self.symbols is None or event.data.get("symbol") in self.symbols
+
+    def offer(self, event: PriceEvent) -> bool:
+        try:
+            self._queue.put_nowait(event)
+        except asyncio.QueueFull:
+            return False
+        return True
+
+    def drop(self, last_id: int) -> None:
+        """Discard the backlog and leave only a final ``dropped`` event."""
+        self.dropped = True
+        while not self._queue.empty():
+            self._queue.get_nowait()
+        self._queue.put_nowait(PriceEvent(last_id, DROPPED_EVENT, {"reason": "slow consumer"}))
+
+    async def get(self, timeout: float) -> PriceEvent | None:
+        """Next event, or None if nothing arrives within ``timeout`` seconds."""
+        if not self._queue.empty():
+            return self._queue.get_nowait()
+        try:
+            return await asyncio.wait_for(self._queue.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    def close(self) -> None:
+        self._bus.unsubscribe(self)
+
+
+class PriceEventBus:
+    def __init__(self, buffer_size: int = PRICE_STREAM_BUFFER_SIZE) -> None:
+        self._buffer_size = buffer_size
+        self._subscribers: set[PriceSubscription] = set()
+        self._ids = itertools.count(1)
+
+    def __len__(self) -> int:
+        return len(self._subscribers)
+
+    def subscribe(self, symbols: Iterable[str] | None = None) -> PriceSubscription:
+        subscription = PriceSubscription(
+            self, frozenset(symbols) if symbols else None, self._buffer_size
+        )
+        self._subscribers.add(subscription)
+        price_stream_subscribers.inc()
+        return subscription
+
+    def unsubscribe(self, subscription: PriceSubscription) -> None:
+        if subscription in self._subscribers:
+            self._subscribers.discard(subscription)
+            price_stream_subscribers.dec()
+
+    def publish(self, event: str, data: dict[str, Any]) -> None:
+        """Fan ``data`` out to matching subscribers; never blocks."""
+        if not self._subscribers:
+            return
+        message = PriceEvent(next(self._ids), event, data)
+        price_stream_events_total.inc(event=event)
+        for subscription in list(self._subscribers):
+            if not subscription.wants(message) or subscription.offer(message):
+                continue
+            self.unsubscribe(subscription)
+            subscription.drop(message.id)
+            price_stream_dropped_total.inc()
+            logger.info("Dropped slow live price stream client")
+
+
+price_events = PriceEventBus()
@@ -0,0 +1,76 @@
+"""Live price events across processes over PostgreSQL LISTEN/NOTIFY.
+
+The price worker publishes to a ``PriceEventNotifier``, which sends each
+event as a ``NOTIFY`` on ``PRICE_EVENTS_CHANNEL``. Every API process runs
+``listen_price_events``, which republishes what arrives on its in-process
+``price_events`` bus, so any API replica can serve ``/prices/stream``
+whichever process runs the worker.
+
+Only PostgreSQL through asyncpg is supported (``relay_supported``); elsewhere
+the API streams the events of the worker it embeds. Delivery is best effort
+(see ``app.db.notify``), as with a client that reconnects to the stream.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import PRICE_EVENTS_CHANNEL
+from app.db.notify import NotifyPublisher, listen, notify_messages_total, notify_supported
+from app.notifications.interfaces import PriceEventPublisher
+
+logger = logging.getLogger(__name__)
+
+relay_supported = notify_supported
+
+
+def encode_event(event: str, data: dict[str, Any]) -> str:
+    return json.dumps({"event": event, "data": data}, separators=(",", ":"))
+
+
+def deliver(bus: PriceEventPublisher, payload: str) -> None:
+    """Publish one NOTIFY payload on ``bus``; malformed payloads are logged and skipped."""
+    try:
+        message = json.loads(payload)
+        event, data = message["event"], message["data"]
+    except (ValueError, TypeError, KeyError):
+        notify_messages_total.inc(channel=PRICE_EVENTS_CHANNEL, outcome="invalid")
+        logger.warning("Ignoring malformed price event payload=%r", payload[:200])
+        return
+    bus.publish(event, data)
+
+
+class PriceEventNotifier:
+    """``PriceEventPublisher`` that forwards events to other processes.
+
+    ``publish`` only queues the event, so it never waits on the database;
+    ``run`` sends whatever has queued up in one statement per batch.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        channel: str = PRICE_EVENTS_CHANNEL,
+        max_pending: int = 10_000,
+    ) -> None:
+        self._publisher = NotifyPublisher(engine, channel, max_pending)
+
+    def publish(self, event: str, data: dict[str, Any]) -> None:
+        self._publisher.send(encode_event(event, data))
+
+    async def run(self) -> None:
+        await self._publisher.run()
+
+
+async def listen_price_events(
+    engine: AsyncEngine,
+    bus: PriceEventPublisher,
+    channel: str = PRICE_EVENTS_CHANNEL,
+    retry_seconds: float = 5.0,
+) -> None:
+    """Republish NOTIFYs from ``channel`` on ``bus`` until cancelled."""
+    await listen(engine, channel, lambda payload: deliver(bus, payload), retry_seconds)
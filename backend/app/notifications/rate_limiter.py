@@ -0,0 +1,309 @@
+"""Outbound Telegram send scheduling.
+
+Telegram allows roughly 30 messages/s per bot and about one message/s per
+private chat (20/min per group). ``SendScheduler`` queues sends, releases
+them through a global token bucket plus one bucket per chat, sends
+interactive replies before bulk notifications, keeps each chat's messages
+in order, and on a 429 pauses everything for ``retry_after`` and retries.
+
+``RateLimitedSession`` plugs the scheduler into an aiogram ``Bot`` as a
+request middleware, so ``message.answer`` and notifier sends share it.
+Each process has its own scheduler: split the global budget between the
+bot and worker processes (``TELEGRAM_SEND_RATE_PER_SECOND``).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, TypeVar
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import (
+    BaseRequestMiddleware,
+    NextRequestMiddlewareType,
+)
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import TelegramMethod
+from aiogram.methods.base import Response
+
+from app.core.config import TELEGRAM_SEND_MAX_BULK_QUEUE, TELEGRAM_SEND_RATE_PER_SECOND
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+INTERACTIVE = 0
+BULK = 1
+PRIORITY_NAMES = {INTERACTIVE: "interactive", BULK: "bulk"}
+
+# Items examined per priority when looking for a chat whose bucket is ready.
+_SCAN_LIMIT = 256
+_MAX_IDLE_CHAT_BUCKETS = 10_000
+
+send_priority_ctx_var: ContextVar[int] = ContextVar("send_priority", default=INTERACTIVE)
+
+telegram_send_queue_depth = registry.gauge(
+    "telegram_send_queue_depth", "Outbound Telegram sends waiting.", ("priority",)
+)
+telegram_sends_total = registry.counter(
+    "telegram_sends_total", "Outbound Telegram sends.", ("priority", "outcome")
+)
+telegram_send_wait_seconds = registry.histogram(
+    "telegram_send_wait_seconds", "Time a send waited for rate limit tokens.", ("priority",)
+)
+telegram_retry_after_total = registry.counter(
+    "telegram_retry_after_total", "429 responses from the Bot API."
+)
+
+
+class SendQueueFull(Exception):
+    pass
+
+
+@contextmanager
+def bulk_sends() -> Iterator[None]:
+    """Sends issued inside this block queue behind interactive replies."""
+    token = send_priority_ctx_var.set(BULK)
+    try:
+        yield
+    finally:
+        send_priority_ctx_var.reset(token)
+
+
+class TokenBucket:
+    def __init__(
+        self, rate: float, burst: float, clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        self.rate = rate
+        self.burst = burst
+        self._clock = clock
+        self._tokens = burst
+        self._updated = clock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def wait_time(self) -> float:
+        """Seconds until one token is available (0 if available now)."""
+        self._refill()
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def consume(self) -> None:
+        self._refill()
+        self._tokens -= 1
+
+    @property
+    def full(self) -> bool:
+        self._refill()
+        return self._tokens >= self.burst
+
+
+@dataclass
+class _Send:
+    chat_id: int | str
+    priority: int
+    send: Callable[[], Awaitable[Any]]
+    future: asyncio.Future[Any]
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class SendScheduler:
+    def __init__(
+        self,
+        rate_per_second: float = 25.0,
+        private_chat_rate: float = 1.0,
+        private_chat_burst: float = 3.0,
+        group_chat_rate: float = 20 / 60,
+        group_chat_burst: float = 3.0,
+        max_bulk_queue: int = 10_000,
+        max_retries: int = 3,
+    ) -> None:
+        self._global = TokenBucket(rate_per_second, max(1.0, rate_per_second))
+        self._private = (private_chat_rate, private_chat_burst)
+        self._group = (group_chat_rate, group_chat_burst)
+        self._max_bulk_queue = max_bulk_queue
+        self._max_retries = max_retries
+        self._queues: dict[int, deque[_Send]] = {INTERACTIVE: deque(), BULK: deque()}
+        self._chat_buckets: dict[int | str, TokenBucket] = {}
+        self._in_flight_chats: set[int | str] = set()
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._worker: asyncio.Task[None] | None = None
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "queued": {PRIORITY_NAMES[p]: len(q) for p, q in self._queues.items()},
+            "in_flight": len(self._in_flight_chats),
+            "paused_for_seconds": round(max(0.0, self._paused_until - time.monotonic()), 3),
+        }
+
+    async def submit(
+        self,
+        chat_id: int | str,
+        send: Callable[[], Awaitable[T]],
+        priority: int | None = None,
+    ) -> T:
+        """Run ``send`` once the global and ``chat_id`` limits allow it."""
+        priority = send_priority_ctx_var.get() if priority is None else priority
+        if priority == BULK and len(self._queues[BULK]) >= self._max_bulk_queue:
+            telegram_sends_total.inc(priority="bulk", outcome="rejected")
+            raise SendQueueFull("bulk send queue is full")
+        item = _Send(chat_id, priority, send, asyncio.get_running_loop().create_future())
+        self._queues[priority].append(item)
+        telegram_send_queue_depth.inc(priority=PRIORITY_NAMES[priority])
+        self._ensure_worker()
+        self._wakeup.set()
+        return await item.future
+
+    async def close(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            await asyncio.gather(self._worker, return_exceptions=True)
+            self._worker = None
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.create_task(self._run())
+
+    async def _run(self) -> None:
+        while True:
+            self._wakeup.clear()
+            item, wait = self._next_ready()
+            if item is not None:
+                task = asyncio.create_task(self._send(item))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _next_ready(self) -> tuple[_Send | None, float | None]:
+        paused = self._paused_until - time.monotonic()
+        if paused > 0:
+            return None, paused
+        if not any(self._queues.values()):
+            return None, None
+        global_wait = self._global.wait_time()
+        if global_wait > 0:
+            return None, global_wait
+        min_wait: float | None = None
+        for priority in (INTERACTIVE, BULK):
+            queue = self._queues[priority]
+            blocked: set[int | str] = set()
+            for index, item in enumerate(queue):
+                if index >= _SCAN_LIMIT:
+                    break
+                if item.chat_id in blocked:
+                    continue
+                if item.chat_id in self._in_flight_chats:
+                    # One send per chat at a time keeps the chat's messages ordered.
+                    blocked.add(item.chat_id)
+                    continue
+                bucket = self._chat_bucket(item.chat_id)
+                wait = bucket.wait_time()
+                if wait <= 0:
+                    del queue[index]
+                    telegram_send_queue_depth.dec(priority=PRIORITY_NAMES[priority])
+                    bucket.consume()
+                    self._global.consume()
+                    self._in_flight_chats.add(item.chat_id)
+                    return item, 0.0
+                blocked.add(item.chat_id)
+                min_wait = wait if min_wait is None else min(min_wait, wait)
+        return None, min_wait
+
+    def _chat_bucket(self, chat_id: int | str) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if len(self._chat_buckets) >= _MAX_IDLE_CHAT_BUCKETS:
+                self._chat_buckets = {
+                    key: value for key, value in self._chat_buckets.items() if not value.full
+                }
+            is_private = isinstance(chat_id, int) and chat_id > 0
+            rate, burst = self._private if is_private else self._group
+            bucket = self._chat_buckets[chat_id] = TokenBucket(rate, burst)
+        return bucket
+
+    async def _send(self, item: _Send) -> None:
+        priority = PRIORITY_NAMES[item.priority]
+        telegram_send_wait_seconds.observe(
+            time.monotonic() - item.enqueued_at, priority=priority
+        )
+        try:
+            result = await item.send()
+        except TelegramRetryAfter as exc:
+            telegram_retry_after_total.inc()
+            self._paused_until = max(self._paused_until, time.monotonic() + exc.retry_after)
+            item.attempts += 1
+            if item.attempts > self._max_retries:
+                telegram_sends_total.inc(priority=priority, outcome="error")
+                self._finish(item, exc=exc)
+                return
+            logger.warning("Telegram flood control; retrying in %ss", exc.retry_after)
+            self._queues[item.priority].appendleft(item)
+            telegram_send_queue_depth.inc(priority=priority)
+            self._in_flight_chats.discard(item.chat_id)
+            self._wakeup.set()
+            return
+        except Exception as exc:
+            telegram_sends_total.inc(priority=priority, outcome="error")
+            self._finish(item, exc=exc)
+            return
+        telegram_sends_total.inc(priority=priority, outcome="sent")
+        self._finish(item, result=result)
+
+    def _finish(self, item: _Send, result: Any = None, exc: BaseException | None = None) -> None:
+        self._in_flight_chats.discard(item.chat_id)
+        self._wakeup.set()
+        if item.future.done():
+            return
+        if exc is not None:
+            item.future.set_exception(exc)
+        else:
+            item.future.set_result(result)
+
+
+class RateLimitedSession(BaseRequestMiddleware):
+    """aiogram request middleware routing chat-bound calls through a scheduler."""
+
+    def __init__(self, scheduler: SendScheduler) -> None:
+        self._scheduler = scheduler
+
+    async def __call__(
+        self,
+        make_request: NextRequestMiddlewareType[Any],
+        bot: Bot,
+        method: TelegramMethod[Any],
+    ) -> Response[Any]:
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None:
+            return await make_request(bot, method)
+        return await self._scheduler.submit(chat_id, lambda: make_request(bot, method))
+
+
+def build_send_scheduler() -> SendScheduler:
+    return SendScheduler(
+        rate_per_second=TELEGRAM_SEND_RATE_PER_SECOND,
+        max_bulk_queue=TELEGRAM_SEND_MAX_BULK_QUEUE,
+    )
+
+
+def install_rate_limiter(bot: Bot, scheduler: SendScheduler) -> Bot:
+    bot.session.middleware(RateLimitedSession(scheduler))
+    return bot
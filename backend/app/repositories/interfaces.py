@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
 from dataclasses import dataclass
 from datetime import datetime
 from typing import Protocol
@@ -28,6 +29,26 @@ class PriceSampleRecord:
     created_at: datetime
 
 
+@dataclass(frozen=True)
+class PriceCandleRecord:
+    bucket_start: datetime
+    open: float
+    high: float
+    low: float
+    close: float
+    sample_count: int
+
+
+@dataclass(frozen=True)
+class PriceAlertSubscriptionRecord:
+    id: int
+    telegram_id: int
+    symbol: str
+    direction: str
+    threshold: float
+    created_at: datetime
+
+
 class UserRepository(Protocol):
     async def get_by_telegram_id(self, telegram_id: int) -> UserRecord | None:
         ...
@@ -35,6 +56,14 @@ class UserRepository(Protocol):
     async def upsert(self, telegram_id: int) -> UserRecord:
         ...
 
+    async def get_or_create(self, telegram_id: int) -> tuple[UserRecord, bool]:
+        ...
+
+    async def get_or_create_many(
+        self, telegram_ids: Sequence[int]
+    ) -> list[tuple[UserRecord, bool]]:
+        ...
+
 
 class ReferralRepository(Protocol):
     async def get_by_referred(self, referred_telegram_id: int) -> ReferralRecord | None:
@@ -45,6 +74,16 @@ class ReferralRepository(Protocol):
     ) -> ReferralRecord:
         ...
 
+    async def register(
+        self, referrer_telegram_id: int, referred_telegram_id: int
+    ) -> tuple[ReferralRecord, bool, bool]:
+        ...
+
+    async def register_many(
+        self, pairs: Sequence[tuple[int, int]]
+    ) -> dict[int, tuple[ReferralRecord, bool]]:
+        ...
+
     async def count_by_referrer(self, referrer_telegram_id: int) -> int:
         ...
 
@@ -53,10 +92,62 @@ class ReferralRepository(Protocol):
     ) -> list[ReferralRecord]:
         ...
 
+    async def list_by_referrer(
+        self,
+        referrer_telegram_id: int,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+    ) -> list[ReferralRecord]:
+        ...
+
 
 class PriceSampleRepository(Protocol):
     async def get_latest(self, symbol: str) -> PriceSampleRecord | None:
         ...
 
+    async def get_latest_many(
+        self, symbols: Sequence[str]
+    ) -> dict[str, PriceSampleRecord]:
+        ...
+
     async def create(self, symbol: str, price: float) -> PriceSampleRecord:
         ...
+
+    async def create_many(
+        self, samples: Sequence[tuple[str, float]]
+    ) -> list[PriceSampleRecord]:
+        ...
+
+    async def delete_older_than(self, cutoff: datetime, limit: int) -> int:
+        ...
+
+    async def candles(
+        self, symbol: str, start: datetime, end: datetime, bucket_seconds: int
+    ) -> list[PriceCandleRecord]:
+        ...
+
+
+class PriceAlertSubscriptionRepository(Protocol):
+    async def create(
+        self, telegram_id: int, symbol: str, direction: str, threshold: float
+    ) -> PriceAlertSubscriptionRecord:
+        ...
+
+    async def count_active_by_user(self, telegram_id: int) -> int:
+        ...
+
+    async def list_active_by_user(self, telegram_id: int) -> list[PriceAlertSubscriptionRecord]:
+        ...
+
+    async def delete(self, telegram_id: int, subscription_id: int) -> bool:
+        ...
+
+    async def list_active(
+        self, after_id: int, limit: int
+    ) -> list[PriceAlertSubscriptionRecord]:
+        ...
+
+    async def deactivate(
+        self, subscription_ids: Sequence[int]
+    ) -> list[PriceAlertSubscriptionRecord]:
+        ...
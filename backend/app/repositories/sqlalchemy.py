@@ -1,11 +1,210 @@
 from __future__ import annotations
 
-from sqlalchemy import func, select
+from collections.abc import Sequence
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import (
+    BigInteger,
+    Integer,
+    String,
+    bindparam,
+    case,
+    cast,
+    delete,
+    false,
+    func,
+    insert,
+    literal,
+    select,
+    text,
+    true,
+    tuple_,
+    union_all,
+    update,
+)
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.db.models import PriceSample, Referral, User
-from app.repositories.interfaces import PriceSampleRecord, ReferralRecord, UserRecord
+from app.db.models import (
+    PRICE_ROLLUPS,
+    PriceAlertSubscription,
+    PriceSample,
+    Referral,
+    ReferrerStats,
+    User,
+)
+from app.repositories.interfaces import (
+    PriceAlertSubscriptionRecord,
+    PriceCandleRecord,
+    PriceSampleRecord,
+    ReferralRecord,
+    UserRecord,
+)
+
+# Keeps multi-row statements well below SQLite's bound-parameter limit.
+UPSERT_CHUNK_SIZE = 500
+# Window searched first for a symbol's latest price sample; see
+# SqlAlchemyPriceSampleRepository.
+LATEST_SAMPLE_LOOKBACK = timedelta(days=2)
+
+_CREATE_REFERRALS_STAGING = text(
+    "CREATE TEMPORARY TABLE IF NOT EXISTS referrals_staging ("
+    "referrer_telegram_id BIGINT NOT NULL, "
+    "referred_telegram_id BIGINT NOT NULL"
+    ") ON COMMIT DELETE ROWS"
+)
+_REGISTER_STAGED_REFERRALS = text(
+    """
+    WITH upserted_users AS (
+        INSERT INTO users (telegram_id)
+        SELECT telegram_id FROM (
+            SELECT referrer_telegram_id AS telegram_id FROM referrals_staging
+            UNION
+            SELECT referred_telegram_id FROM referrals_staging
+        ) AS staged_ids
+        ORDER BY telegram_id
+        ON CONFLICT (telegram_id) DO NOTHING
+    ),
+    inserted AS (
+        INSERT INTO referrals (referrer_telegram_id, referred_telegram_id)
+        SELECT referrer_telegram_id, referred_telegram_id FROM referrals_staging
+        ORDER BY referred_telegram_id
+        ON CONFLICT (referred_telegram_id) DO NOTHING
+        RETURNING id, referrer_telegram_id, referred_telegram_id, created_at
+    ),
+    incremented_stats AS (
+        INSERT INTO referrer_stats (referrer_telegram_id, referral_count)
+        SELECT referrer_telegram_id, COUNT(*) FROM inserted
+        GROUP BY referrer_telegram_id
+        ORDER BY referrer_telegram_id
+        ON CONFLICT (referrer_telegram_id) DO UPDATE
+        SET referral_count = referrer_stats.referral_count + EXCLUDED.referral_count,
+            updated_at = now()
+    )
+    SELECT id, referrer_telegram_id, referred_telegram_id, created_at, true AS created
+    FROM inserted
+    UNION ALL
+    SELECT r.id, r.referrer_telegram_id, r.referred_telegram_id, r.created_at, false
+    FROM referrals AS r
+    JOIN referrals_staging AS s ON s.referred_telegram_id = r.referred_telegram_id
+    """
+)
+
+
+def _is_postgresql(session: AsyncSession) -> bool:
+    return session.get_bind().dialect.name == "postgresql"
+
+
+def _insert(session: AsyncSession, model):
+    """Build a dialect-specific INSERT that supports ON CONFLICT clauses."""
+    if _is_postgresql(session):
+        return postgresql.insert(model)
+    return sqlite.insert(model)
+
+
+def _timestamp_param(session: AsyncSession, value: datetime):
+    """Bind a timestamp so it compares correctly against stored values.
+
+    SQLite keeps timestamps as text and ``CURRENT_TIMESTAMP`` server defaults
+    carry no fractional part, while SQLAlchemy binds always append
+    ``.ffffff``. Rendering the same shape keeps text comparison ordered.
+    """
+    if _is_postgresql(session):
+        return value
+    text_value = value.strftime("%Y-%m-%d %H:%M:%S")
+    if value.microsecond:
+        text_value += f".{value.microsecond:06d}"
+    return literal(text_value)
+
+
+def _greatest(session: AsyncSession, left, right):
+    return func.greatest(left, right) if _is_postgresql(session) else func.max(left, right)
+
+
+def _least(session: AsyncSession, left, right):
+    return func.least(left, right) if _is_postgresql(session) else func.min(left, right)
+
+
+def _bucket_start(value: datetime, bucket_seconds: int) -> datetime:
+    """Start of the UTC bucket holding ``value``; naive values are taken as UTC."""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    epoch = int(value.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % bucket_seconds, timezone.utc)
+
+
+def _epoch_bucket(session: AsyncSession, column, bucket_seconds: int):
+    """Start of ``column``'s ``bucket_seconds`` bucket as Unix seconds, in SQL."""
+    if _is_postgresql(session):
+        epoch = func.floor(func.extract("epoch", column) / bucket_seconds)
+        return cast(epoch * bucket_seconds, BigInteger)
+    epoch = cast(func.strftime("%s", column), Integer)
+    return epoch // bucket_seconds * bucket_seconds
+
+
+def _candles(samples: Sequence[PriceSampleRecord], bucket_seconds: int) -> list[dict]:
+    candles: dict[tuple[str, datetime], dict] = {}
+    for sample in sorted(samples, key=lambda sample: (sample.created_at, sample.id)):
+        key = (sample.symbol, _bucket_start(sample.created_at, bucket_seconds))
+        candle = candles.get(key)
+        if candle is None:
+            candles[key] = {
+                "symbol": sample.symbol,
+                "bucket_start": key[1],
+                "open": sample.price,
+                "high": sample.price,
+                "low": sample.price,
+                "close": sample.price,
+                "sample_count": 1,
+            }
+            continue
+        candle["high"] = max(candle["high"], sample.price)
+        candle["low"] = min(candle["low"], sample.price)
+        candle["close"] = sample.price
+        candle["sample_count"] += 1
+    return list(candles.values())
+
+
+def _accumulate_referrer_stats(stmt):
+    """Turn an INSERT into ``referrer_stats`` into an increment on conflict."""
+    return stmt.on_conflict_do_update(
+        index_elements=[ReferrerStats.referrer_telegram_id],
+        set_={
+            "referral_count": ReferrerStats.referral_count + stmt.excluded.referral_count,
+            "updated_at": func.now(),
+        },
+    )
+
+
+def _user_record(row) -> UserRecord:
+    return UserRecord(id=row.id, telegram_id=row.telegram_id, created_at=row.created_at)
+
+
+def _price_sample_record(row) -> PriceSampleRecord:
+    return PriceSampleRecord(
+        id=row.id, symbol=row.symbol, price=row.price, created_at=row.created_at
+    )
+
+
+def _subscription_record(row) -> PriceAlertSubscriptionRecord:
+    return PriceAlertSubscriptionRecord(
+        id=row.id,
+        telegram_id=row.telegram_id,
+        symbol=row.symbol,
+        direction=row.direction,
+        threshold=row.threshold,
+        created_at=row.created_at,
+    )
+
+
+def _referral_record(row) -> ReferralRecord:
+    return ReferralRecord(
+        id=row.id,
+        referrer_telegram_id=row.referrer_telegram_id,
+        referred_telegram_id=row.referred_telegram_id,
+        created_at=row.created_at,
+    )
 
 
 class SqlAlchemyUserRepository:
@@ -22,22 +221,72 @@ class SqlAlchemyUserRepository:
         return UserRecord(id=user.id, telegram_id=user.telegram_id, created_at=user.created_at)
 
     async def upsert(self, telegram_id: int) -> UserRecord:
-        existing = await self.get_by_telegram_id(telegram_id)
-        if existing:
-            return existing
-        user = User(telegram_id=telegram_id)
-        try:
-            async with self._session.begin_nested():
-                self._session.add(user)
-                await self._session.flush()
-        except IntegrityError:
-            self._session.expunge(user)
-            with self._session.no_autoflush:
-                existing = await self.get_by_telegram_id(telegram_id)
-            if existing:
-                return existing
-            raise
-        return UserRecord(id=user.id, telegram_id=user.telegram_id, created_at=user.created_at)
+        user, _ = await self.get_or_create(telegram_id)
+        return user
+
+    async def get_or_create(self, telegram_id: int) -> tuple[UserRecord, bool]:
+        results = await self.get_or_create_many([telegram_id])
+        return results[0]
+
+    async def get_or_create_many(
+        self, telegram_ids: Sequence[int]
+    ) -> list[tuple[UserRecord, bool]]:
+        """Insert missing users and return ``(record, created)`` per unique id.
+
+        Ids are deduplicated (first occurrence wins the ordering) and written in
+        chunks of ``UPSERT_CHUNK_SIZE`` rows, one statement per chunk.
+        PostgreSQL resolves a chunk in one statement: a data-modifying CTE
+        inserts with ``ON CONFLICT DO NOTHING`` and the outer query unions in
+        the rows that already existed. SQLite cannot run DML inside a CTE, so it
+        issues ``INSERT ... ON CONFLICT DO NOTHING RETURNING`` and only selects
+        the ids that were not inserted. The trailing select also covers the
+        PostgreSQL race where a concurrent insert commits after our snapshot.
+        """
+        unique_ids = list(dict.fromkeys(telegram_ids))
+        results: dict[int, tuple[UserRecord, bool]] = {}
+        for start in range(0, len(unique_ids), UPSERT_CHUNK_SIZE):
+            chunk = unique_ids[start : start + UPSERT_CHUNK_SIZE]
+            rows = await self._session.execute(self._get_or_create_statement(chunk))
+            for row in rows:
+                results[row.telegram_id] = (_user_record(row), bool(row.created))
+            missing = [telegram_id for telegram_id in chunk if telegram_id not in results]
+            if missing:
+                rows = await self._session.execute(
+                    select(User.id, User.telegram_id, User.created_at).where(
+                        User.telegram_id.in_(missing)
+                    )
+                )
+                for row in rows:
+                    results[row.telegram_id] = (_user_record(row), False)
+        lost = [telegram_id for telegram_id in unique_ids if telegram_id not in results]
+        if lost:
+            raise LookupError(f"users vanished during upsert: {lost}")
+        return [results[telegram_id] for telegram_id in unique_ids]
+
+    def _get_or_create_statement(self, telegram_ids: list[int]):
+        insert_stmt = (
+            _insert(self._session, User)
+            .values([{"telegram_id": telegram_id} for telegram_id in telegram_ids])
+            .on_conflict_do_nothing(index_elements=[User.telegram_id])
+        )
+        if not _is_postgresql(self._session):
+            return insert_stmt.returning(
+                User.id, User.telegram_id, User.created_at, true().label("created")
+            )
+        inserted = insert_stmt.returning(User.id, User.telegram_id, User.created_at).cte(
+            "inserted_users"
+        )
+        return union_all(
+            select(
+                inserted.c.id,
+                inserted.c.telegram_id,
+                inserted.c.created_at,
+                true().label("created"),
+            ),
+            select(User.id, User.telegram_id, User.created_at, false().label("created")).where(
+                User.telegram_id.in_(telegram_ids)
+            ),
+        )
 
 
 class SqlAlchemyReferralRepository:
@@ -71,6 +320,7 @@ class SqlAlchemyReferralRepository:
         except IntegrityError:
             await self._session.rollback()
             raise
+        await self._increment_referrer_stats({referrer_telegram_id: 1})
         return ReferralRecord(
             id=referral.id,
             referrer_telegram_id=referral.referrer_telegram_id,
@@ -78,63 +328,606 @@ class SqlAlchemyReferralRepository:
             created_at=referral.created_at,
         )
 
+    async def register(
+        self, referrer_telegram_id: int, referred_telegram_id: int
+    ) -> tuple[ReferralRecord, bool, bool]:
+        """Upsert both users and insert-or-resolve the referral.
+
+        Returns ``(referral, created, conflict)`` where ``conflict`` means the
+        referred user is already attributed to a different referrer. PostgreSQL
+        runs everything as one statement built from data-modifying CTEs; SQLite
+        falls back to the equivalent sequence of ``ON CONFLICT`` statements.
+        User ids are inserted in sorted order so concurrent registrations of
+        the same pair cannot deadlock on the users unique index. A created
+        referral increments ``referrer_stats`` in the same statement.
+        """
+        users_insert = (
+            _insert(self._session, User)
+            .values(
+                [
+                    {"telegram_id": telegram_id}
+                    for telegram_id in sorted({referrer_telegram_id, referred_telegram_id})
+                ]
+            )
+            .on_conflict_do_nothing(index_elements=[User.telegram_id])
+        )
+        referral_insert = (
+            _insert(self._session, Referral)
+            .values(
+                referrer_telegram_id=referrer_telegram_id,
+                referred_telegram_id=referred_telegram_id,
+            )
+            .on_conflict_do_nothing(index_elements=[Referral.referred_telegram_id])
+        )
+        columns = (
+            Referral.id,
+            Referral.referrer_telegram_id,
+            Referral.referred_telegram_id,
+            Referral.created_at,
+        )
+        if _is_postgresql(self._session):
+            inserted = referral_insert.returning(*columns).cte("inserted_referral")
+            stats_insert = _accumulate_referrer_stats(
+                postgresql.insert(ReferrerStats).from_select(
+                    ["referrer_telegram_id", "referral_count"],
+                    select(inserted.c.referrer_telegram_id, literal(1)),
+                )
+            )
+            stmt = union_all(
+                select(*inserted.c, true().label("created")),
+                select(*columns, false().label("created")).where(
+                    Referral.referred_telegram_id == referred_telegram_id
+                ),
+            ).add_cte(users_insert.cte("upserted_users"), stats_insert.cte("incremented_stats"))
+            row = (await self._session.execute(stmt)).first()
+        else:
+            await self._session.execute(users_insert)
+            row = (
+                await self._session.execute(
+                    referral_insert.returning(*columns, true().label("created"))
+                )
+            ).first()
+            if row is not None:
+                await self._increment_referrer_stats({referrer_telegram_id: 1})
+        if row is not None:
+            referral, created = _referral_record(row), bool(row.created)
+        else:
+            referral, created = await self.get_by_referred(referred_telegram_id), False
+            if referral is None:
+                raise LookupError(f"referral for {referred_telegram_id} vanished during insert")
+        conflict = not created and referral.referrer_telegram_id != referrer_telegram_id
+        return referral, created, conflict
+
+    async def register_many(
+        self, pairs: Sequence[tuple[int, int]]
+    ) -> dict[int, tuple[ReferralRecord, bool]]:
+        """Register ``(referrer, referred)`` pairs with set-based statements.
+
+        Returns, per referred id, the referral that now owns it and whether it
+        was created by this call. Callers pass at most one pair per referred
+        id. On PostgreSQL with asyncpg the pairs are COPYed into a
+        transaction-scoped staging table and resolved by one CTE statement;
+        elsewhere they are written as chunked multi-row ``ON CONFLICT`` inserts.
+        Either way ``referrer_stats`` is incremented for the created rows.
+
+        A referred id claimed by a transaction that committed after the
+        statement's snapshot comes back from neither the insert nor the
+        lookup; like ``register`` those are re-read in a new statement and
+        reported as existing.
+        """
+        if not pairs:
+            return {}
+        if _is_postgresql(self._session) and self._session.get_bind().dialect.driver == "asyncpg":
+            rows = await self._register_staged(pairs)
+        else:
+            rows = await self._register_chunked(pairs)
+        owners: dict[int, tuple[ReferralRecord, bool]] = {}
+        for row in rows:
+            owners[row.referred_telegram_id] = (_referral_record(row), bool(row.created))
+        lost = [referred for _, referred in pairs if referred not in owners]
+        if lost:
+            result = await self._session.execute(
+                select(Referral).where(Referral.referred_telegram_id.in_(lost))
+            )
+            for referral in result.scalars():
+                owners[referral.referred_telegram_id] = (_referral_record(referral), False)
+            lost = [referred for referred in lost if referred not in owners]
+        if lost:
+            raise LookupError(f"referrals vanished during bulk insert: {lost}")
+        return owners
+
+    async def _register_staged(self, pairs: Sequence[tuple[int, int]]) -> list:
+        await self._session.execute(_CREATE_REFERRALS_STAGING)
+        connection = await self._session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            "referrals_staging",
+            records=pairs,
+            columns=["referrer_telegram_id", "referred_telegram_id"],
+        )
+        return list(await self._session.execute(_REGISTER_STAGED_REFERRALS))
+
+    async def _register_chunked(self, pairs: Sequence[tuple[int, int]]) -> list:
+        columns = (
+            Referral.id,
+            Referral.referrer_telegram_id,
+            Referral.referred_telegram_id,
+            Referral.created_at,
+        )
+        rows = []
+        for start in range(0, len(pairs), UPSERT_CHUNK_SIZE):
+            chunk = pairs[start : start + UPSERT_CHUNK_SIZE]
+            user_ids = sorted({telegram_id for pair in chunk for telegram_id in pair})
+            await self._session.execute(
+                _insert(self._session, User)
+                .values([{"telegram_id": telegram_id} for telegram_id in user_ids])
+                .on_conflict_do_nothing(index_elements=[User.telegram_id])
+            )
+            inserted = list(
+                await self._session.execute(
+                    _insert(self._session, Referral)
+                    .values(
+                        [
+                            {"referrer_telegram_id": referrer, "referred_telegram_id": referred}
+                            for referrer, referred in chunk
+                        ]
+                    )
+                    .on_conflict_do_nothing(index_elements=[Referral.referred_telegram_id])
+                    .returning(*columns, true().label("created"))
+                )
+            )
+            created_counts: dict[int, int] = {}
+            for row in inserted:
+                created_counts[row.referrer_telegram_id] = (
+                    created_counts.get(row.referrer_telegram_id, 0) + 1
+                )
+            await self._increment_referrer_stats(created_counts)
+            inserted_ids = {row.referred_telegram_id for row in inserted}
+            missing = [referred for _, referred in chunk if referred not in inserted_ids]
+            rows.extend(inserted)
+            if missing:
+                rows.extend(
+                    await self._session.execute(
+                        select(*columns, false().label("created")).where(
+                            Referral.referred_telegram_id.in_(missing)
+                        )
+                    )
+                )
+        return rows
+
+    async def _increment_referrer_stats(self, counts: dict[int, int]) -> None:
+        if not counts:
+            return
+        await self._session.execute(
+            _accumulate_referrer_stats(
+                _insert(self._session, ReferrerStats).values(
+                    [
+                        {"referrer_telegram_id": referrer_telegram_id, "referral_count": count}
+                        for referrer_telegram_id, count in sorted(counts.items())
+                    ]
+                )
+            )
+        )
+
     async def count_by_referrer(self, referrer_telegram_id: int) -> int:
         result = await self._session.execute(
-            select(func.count(Referral.id)).where(
-                Referral.referrer_telegram_id == referrer_telegram_id
+            select(ReferrerStats.referral_count).where(
+                ReferrerStats.referrer_telegram_id == referrer_telegram_id
             )
         )
-        return int(result.scalar_one())
+        return int(result.scalar_one_or_none() or 0)
+
+    async def reconcile_referrer_stats(self) -> int:
+        """Rebuild ``referrer_stats`` from ``referrals`` and return rows written.
+
+        Idempotent and safe to re-run. Increments committed by concurrent
+        inserts while it runs may be overwritten with the pre-insert count, so
+        run it when referral writes are paused or simply run it twice.
+        """
+        stmt = _insert(self._session, ReferrerStats)
+        stmt = stmt.from_select(
+            ["referrer_telegram_id", "referral_count"],
+            select(Referral.referrer_telegram_id, func.count(Referral.id))
+            # SQLite needs a WHERE clause to parse INSERT ... SELECT ... ON CONFLICT.
+            .where(true())
+            .group_by(Referral.referrer_telegram_id),
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ReferrerStats.referrer_telegram_id],
+            set_={"referral_count": stmt.excluded.referral_count, "updated_at": func.now()},
+            where=ReferrerStats.referral_count != stmt.excluded.referral_count,
+        )
+        upserted = await self._session.execute(stmt)
+        removed = await self._session.execute(
+            ReferrerStats.__table__.delete().where(
+                ReferrerStats.referrer_telegram_id.not_in(
+                    select(Referral.referrer_telegram_id).distinct()
+                )
+            )
+        )
+        return upserted.rowcount + removed.rowcount
 
     async def last_referrals(
         self, referrer_telegram_id: int, limit: int = 5
     ) -> list[ReferralRecord]:
+        return await self.list_by_referrer(referrer_telegram_id, limit)
+
+    async def list_by_referrer(
+        self,
+        referrer_telegram_id: int,
+        limit: int,
+        after: tuple[datetime, int] | None = None,
+    ) -> list[ReferralRecord]:
+        """Newest-first keyset page over ``(created_at, id)``.
+
+        ``after`` is the ``(created_at, id)`` of the last row of the previous
+        page; the composite referrer index makes every page O(limit).
+        """
+        stmt = select(Referral).where(Referral.referrer_telegram_id == referrer_telegram_id)
+        if after is not None:
+            created_at, referral_id = after
+            stmt = stmt.where(
+                tuple_(Referral.created_at, Referral.id)
+                < tuple_(_timestamp_param(self._session, created_at), referral_id)
+            )
         result = await self._session.execute(
-            select(Referral)
-            .where(Referral.referrer_telegram_id == referrer_telegram_id)
-            .order_by(Referral.created_at.desc())
-            .limit(limit)
+            stmt.order_by(Referral.created_at.desc(), Referral.id.desc()).limit(limit)
         )
-        referrals = result.scalars().all()
-        return [
-            ReferralRecord(
-                id=referral.id,
-                referrer_telegram_id=referral.referrer_telegram_id,
-                referred_telegram_id=referral.referred_telegram_id,
-                created_at=referral.created_at,
-            )
-            for referral in referrals
-        ]
+        return [_referral_record(referral) for referral in result.scalars().all()]
 
 
 class SqlAlchemyPriceSampleRepository:
-    def __init__(self, session: AsyncSession) -> None:
+    """Price samples plus their rollups.
+
+    Latest-sample lookups first search the last ``latest_lookback`` only,
+    which on a partitioned PostgreSQL table prunes the scan to the newest
+    partitions, and fall back to the full history for symbols not found there.
+    """
+
+    def __init__(
+        self,
+        session: AsyncSession,
+        latest_lookback: timedelta | None = LATEST_SAMPLE_LOOKBACK,
+    ) -> None:
         self._session = session
+        self._latest_lookback = latest_lookback
+
+    def _lookback_start(self) -> datetime | None:
+        if self._latest_lookback is None:
+            return None
+        return datetime.now(timezone.utc) - self._latest_lookback
+
+    def _since(self, stmt, since: datetime | None):
+        if since is None:
+            return stmt
+        return stmt.where(PriceSample.created_at >= _timestamp_param(self._session, since))
 
     async def get_latest(self, symbol: str) -> PriceSampleRecord | None:
-        result = await self._session.execute(
+        since = self._lookback_start()
+        stmt = (
             select(PriceSample)
             .where(PriceSample.symbol == symbol)
             .order_by(PriceSample.created_at.desc())
             .limit(1)
         )
-        sample = result.scalar_one_or_none()
+        sample = (await self._session.execute(self._since(stmt, since))).scalar_one_or_none()
+        if sample is None and since is not None:
+            sample = (await self._session.execute(stmt)).scalar_one_or_none()
         if not sample:
             return None
-        return PriceSampleRecord(
-            id=sample.id,
-            symbol=sample.symbol,
-            price=sample.price,
-            created_at=sample.created_at,
-        )
+        return _price_sample_record(sample)
+
+    async def get_latest_many(
+        self, symbols: Sequence[str]
+    ) -> dict[str, PriceSampleRecord]:
+        """Latest sample per symbol; symbols without one are absent.
+
+        PostgreSQL unnests the symbols and takes each one's newest row through a
+        LATERAL ``LIMIT 1``, so every symbol is a single descent of
+        ``ix_price_samples_symbol_created`` however long its history. SQLite
+        ranks the rows of the requested symbols with ``row_number()``. One
+        statement, plus one more only if some symbols had nothing recent.
+        """
+        if not symbols:
+            return {}
+        since = self._lookback_start()
+        latest = await self._latest_many(symbols, since)
+        missing = [symbol for symbol in symbols if symbol not in latest]
+        if missing and since is not None:
+            latest.update(await self._latest_many(missing, None))
+        return latest
+
+    async def _latest_many(
+        self, symbols: Sequence[str], since: datetime | None
+    ) -> dict[str, PriceSampleRecord]:
+        columns = (PriceSample.id, PriceSample.symbol, PriceSample.price, PriceSample.created_at)
+        newest_first = (PriceSample.created_at.desc(), PriceSample.id.desc())
+        if _is_postgresql(self._session):
+            requested = (
+                func.unnest(
+                    bindparam("symbols", list(symbols), type_=postgresql.ARRAY(String))
+                )
+                .table_valued("symbol")
+                .render_derived(name="requested")
+            )
+            latest = self._since(
+                select(*columns).where(PriceSample.symbol == requested.c.symbol), since
+            )
+            latest = latest.order_by(*newest_first).limit(1).lateral("latest")
+            stmt = select(latest).select_from(requested.join(latest, true()))
+        else:
+            ranked = self._since(
+                select(
+                    *columns,
+                    func.row_number()
+                    .over(partition_by=PriceSample.symbol, order_by=newest_first)
+                    .label("position"),
+                ).where(PriceSample.symbol.in_(list(symbols))),
+                since,
+            ).subquery()
+            stmt = select(
+                ranked.c.id, ranked.c.symbol, ranked.c.price, ranked.c.created_at
+            ).where(ranked.c.position == 1)
+        rows = await self._session.execute(stmt)
+        return {row.symbol: _price_sample_record(row) for row in rows}
 
     async def create(self, symbol: str, price: float) -> PriceSampleRecord:
         sample = PriceSample(symbol=symbol, price=price)
         self._session.add(sample)
         await self._session.flush()
-        return PriceSampleRecord(
-            id=sample.id,
-            symbol=sample.symbol,
-            price=sample.price,
-            created_at=sample.created_at,
+        record = _price_sample_record(sample)
+        await self._roll_up([record])
+        return record
+
+    async def create_many(
+        self, samples: Sequence[tuple[str, float]]
+    ) -> list[PriceSampleRecord]:
+        """Insert ``(symbol, price)`` rows, one multi-row INSERT per chunk.
+
+        The 1m/1h/1d rollups are updated in the same transaction.
+        """
+        records: list[PriceSampleRecord] = []
+        for start in range(0, len(samples), UPSERT_CHUNK_SIZE):
+            chunk = samples[start : start + UPSERT_CHUNK_SIZE]
+            rows = await self._session.execute(
+                insert(PriceSample)
+                .values([{"symbol": symbol, "price": price} for symbol, price in chunk])
+                .returning(
+                    PriceSample.id,
+                    PriceSample.symbol,
+                    PriceSample.price,
+                    PriceSample.created_at,
+                )
+            )
+            records.extend(_price_sample_record(row) for row in rows)
+        await self._roll_up(records)
+        return records
+
+    async def delete_older_than(self, cutoff: datetime, limit: int) -> int:
+        """Delete up to ``limit`` of the oldest samples created before ``cutoff``.
+
+        Old rows have the lowest ids, so the batch is found by walking the
+        primary key from the start rather than scanning ``created_at``.
+        """
+        batch = (
+            select(PriceSample.id)
+            .where(PriceSample.created_at < _timestamp_param(self._session, cutoff))
+            .order_by(PriceSample.id)
+            .limit(limit)
+        )
+        result = await self._session.execute(
+            delete(PriceSample)
+            .where(PriceSample.id.in_(batch.scalar_subquery()))
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    async def candles(
+        self, symbol: str, start: datetime, end: datetime, bucket_seconds: int
+    ) -> list[PriceCandleRecord]:
+        """OHLC per ``bucket_seconds`` bucket in ``[start, end)``, oldest first.
+
+        Aggregated in SQL from the coarsest rollup table whose buckets tile
+        both the requested buckets and the range, else from raw samples. Open
+        and close are the first and last values of each bucket by time.
+        """
+        rollup = next(
+            (
+                model
+                for model in sorted(
+                    PRICE_ROLLUPS, key=lambda model: model.bucket_seconds, reverse=True
+                )
+                if bucket_seconds % model.bucket_seconds == 0
+                and int(start.timestamp()) % model.bucket_seconds == 0
+                and int(end.timestamp()) % model.bucket_seconds == 0
+            ),
+            None,
+        )
+        if rollup is not None:
+            source = select(
+                rollup.bucket_start.label("ts"),
+                literal(0).label("tiebreak"),
+                rollup.open,
+                rollup.high,
+                rollup.low,
+                rollup.close,
+                rollup.sample_count.label("samples"),
+            ).where(
+                rollup.symbol == symbol,
+                rollup.bucket_start >= _timestamp_param(self._session, start),
+                rollup.bucket_start < _timestamp_param(self._session, end),
+            )
+        else:
+            source = select(
+                PriceSample.created_at.label("ts"),
+                PriceSample.id.label("tiebreak"),
+                PriceSample.price.label("open"),
+                PriceSample.price.label("high"),
+                PriceSample.price.label("low"),
+                PriceSample.price.label("close"),
+                literal(1).label("samples"),
+            ).where(
+                PriceSample.symbol == symbol,
+                PriceSample.created_at >= _timestamp_param(self._session, start),
+                PriceSample.created_at < _timestamp_param(self._session, end),
+            )
+        rows = source.subquery()
+        bucket = _epoch_bucket(self._session, rows.c.ts, bucket_seconds)
+        ranked = select(
+            bucket.label("bucket"),
+            rows.c.open,
+            rows.c.high,
+            rows.c.low,
+            rows.c.close,
+            rows.c.samples,
+            func.row_number()
+            .over(partition_by=bucket, order_by=(rows.c.ts, rows.c.tiebreak))
+            .label("first_rank"),
+            func.row_number()
+            .over(partition_by=bucket, order_by=(rows.c.ts.desc(), rows.c.tiebreak.desc()))
+            .label("last_rank"),
+        ).subquery()
+        result = await self._session.execute(
+            select(
+                ranked.c.bucket,
+                func.max(case((ranked.c.first_rank == 1, ranked.c.open))).label("open"),
+                func.max(ranked.c.high).label("high"),
+                func.min(ranked.c.low).label("low"),
+                func.max(case((ranked.c.last_rank == 1, ranked.c.close))).label("close"),
+                func.sum(ranked.c.samples).label("sample_count"),
+            )
+            .group_by(ranked.c.bucket)
+            .order_by(ranked.c.bucket)
+        )
+        return [
+            PriceCandleRecord(
+                bucket_start=datetime.fromtimestamp(int(row.bucket), timezone.utc),
+                open=row.open,
+                high=row.high,
+                low=row.low,
+                close=row.close,
+                sample_count=int(row.sample_count),
+            )
+            for row in result
+        ]
+
+    async def _roll_up(self, samples: Sequence[PriceSampleRecord]) -> None:
+        """Merge ``samples`` into every rollup table, one upsert per table and chunk.
+
+        Samples arrive in time order, so an existing candle keeps its open
+        and takes the incoming close.
+        """
+        for model in PRICE_ROLLUPS:
+            candles = _candles(samples, model.bucket_seconds)
+            for start in range(0, len(candles), UPSERT_CHUNK_SIZE):
+                stmt = _insert(self._session, model).values(
+                    candles[start : start + UPSERT_CHUNK_SIZE]
+                )
+                await self._session.execute(
+                    stmt.on_conflict_do_update(
+                        index_elements=[model.symbol, model.bucket_start],
+                        set_={
+                            "high": _greatest(self._session, model.high, stmt.excluded.high),
+                            "low": _least(self._session, model.low, stmt.excluded.low),
+                            "close": stmt.excluded.close,
+                            "sample_count": model.sample_count + stmt.excluded.sample_count,
+                        },
+                    )
+                )
+
+
+_SUBSCRIPTION_COLUMNS = (
+    PriceAlertSubscription.id,
+    PriceAlertSubscription.telegram_id,
+    PriceAlertSubscription.symbol,
+    PriceAlertSubscription.direction,
+    PriceAlertSubscription.threshold,
+    PriceAlertSubscription.created_at,
+)
+
+
+class SqlAlchemyPriceAlertSubscriptionRepository:
+    def __init__(self, session: AsyncSession) -> None:
+        self._session = session
+
+    async def create(
+        self, telegram_id: int, symbol: str, direction: str, threshold: float
+    ) -> PriceAlertSubscriptionRecord:
+        result = await self._session.execute(
+            insert(PriceAlertSubscription)
+            .values(
+                telegram_id=telegram_id, symbol=symbol, direction=direction, threshold=threshold
+            )
+            .returning(*_SUBSCRIPTION_COLUMNS)
+        )
+        return _subscription_record(result.one())
+
+    async def count_active_by_user(self, telegram_id: int) -> int:
+        result = await self._session.execute(
+            select(func.count())
+            .select_from(PriceAlertSubscription)
+            .where(
+                PriceAlertSubscription.telegram_id == telegram_id,
+                PriceAlertSubscription.active.is_(True),
+            )
+        )
+        return int(result.scalar_one())
+
+    async def list_active_by_user(self, telegram_id: int) -> list[PriceAlertSubscriptionRecord]:
+        result = await self._session.execute(
+            select(*_SUBSCRIPTION_COLUMNS)
+            .where(
+                PriceAlertSubscription.telegram_id == telegram_id,
+                PriceAlertSubscription.active.is_(True),
+            )
+            .order_by(PriceAlertSubscription.id)
+        )
+        return [_subscription_record(row) for row in result]
+
+    async def delete(self, telegram_id: int, subscription_id: int) -> bool:
+        result = await self._session.execute(
+            delete(PriceAlertSubscription).where(
+                PriceAlertSubscription.id == subscription_id,
+                PriceAlertSubscription.telegram_id == telegram_id,
+            )
         )
+        return result.rowcount > 0
+
+    async def list_active(
+        self, after_id: int, limit: int
+    ) -> list[PriceAlertSubscriptionRecord]:
+        """Keyset page of active subscriptions with ``id > after_id``, by id."""
+        result = await self._session.execute(
+            select(*_SUBSCRIPTION_COLUMNS)
+            .where(
+                PriceAlertSubscription.active.is_(True),
+                PriceAlertSubscription.id > after_id,
+            )
+            .order_by(PriceAlertSubscription.id)
+            .limit(limit)
+        )
+        return [_subscription_record(row) for row in result]
+
+    async def deactivate(
+        self, subscription_ids: Sequence[int]
+    ) -> list[PriceAlertSubscriptionRecord]:
+        """Mark still-active subscriptions as triggered and return them.
+
+        Rows deleted or already triggered elsewhere are not returned, so a
+        subscription fires at most once even with several evaluators.
+        """
+        records: list[PriceAlertSubscriptionRecord] = []
+        for start in range(0, len(subscription_ids), UPSERT_CHUNK_SIZE):
+            chunk = list(subscription_ids[start : start + UPSERT_CHUNK_SIZE])
+            result = await self._session.execute(
+                update(PriceAlertSubscription)
+                .where(
+                    PriceAlertSubscription.id.in_(chunk),
+                    PriceAlertSubscription.active.is_(True),
+                )
+                .values(active=False, triggered_at=func.now())
+                .returning(*_SUBSCRIPTION_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+            records.extend(_subscription_record(row) for row in result)
+        return records
@@ -15,6 +15,18 @@ class UserResponse(BaseModel):
     created_at: datetime
 
 
+class UsersBatchUpsertRequest(BaseModel):
+    telegram_ids: list[int]
+
+
+class UserBatchItem(UserResponse):
+    created: bool
+
+
+class UsersBatchUpsertResponse(BaseModel):
+    users: list[UserBatchItem]
+
+
 class ReferralCreateRequest(BaseModel):
     referrer_telegram_id: int
     referred_telegram_id: int
@@ -42,3 +54,29 @@ class ReferralSummaryResponse(BaseModel):
     referrer_telegram_id: int
     count: int
     last_5_referrals: list[ReferralSummaryItem]
+    next_cursor: str | None = None
+
+
+class ReferralPageResponse(BaseModel):
+    referrer_telegram_id: int
+    referrals: list[ReferralSummaryItem]
+    next_cursor: str | None = None
+
+
+class PriceAlertCreateRequest(BaseModel):
+    symbol: str
+    direction: str
+    threshold: float
+
+
+class PriceAlertResponse(BaseModel):
+    id: int
+    symbol: str
+    direction: str
+    threshold: float
+    created_at: datetime
+
+
+class PriceAlertListResponse(BaseModel):
+    telegram_id: int
+    alerts: list[PriceAlertResponse]
@@ -15,3 +15,7 @@ class NotFoundError(Exception):
 
 class DatabaseConnectionError(Exception):
     pass
+
+
+class PriceUnavailableError(Exception):
+    pass
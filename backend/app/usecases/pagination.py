@@ -0,0 +1,33 @@
+from __future__ import annotations
+
+import base64
+import binascii
+import struct
+from datetime import datetime, timedelta, timezone
+
+from app.usecases.errors import ValidationError
+
+# Big-endian (epoch microseconds, row id). Encodes to 22 url-safe characters,
+# short enough for Telegram's 64-byte callback_data.
+_CURSOR_FORMAT = struct.Struct(">qq")
+_EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+_MICROSECOND = timedelta(microseconds=1)
+
+
+def encode_cursor(created_at: datetime, row_id: int) -> str:
+    """Opaque keyset cursor pointing just past ``(created_at, row_id)``."""
+    if created_at.tzinfo is None:
+        created_at = created_at.replace(tzinfo=timezone.utc)
+    micros = (created_at - _EPOCH) // _MICROSECOND
+    raw = _CURSOR_FORMAT.pack(micros, row_id)
+    return base64.urlsafe_b64encode(raw).rstrip(b"=").decode("ascii")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        micros, row_id = _CURSOR_FORMAT.unpack(raw)
+        created_at = _EPOCH + micros * _MICROSECOND
+    except (binascii.Error, struct.error, ValueError, OverflowError) as exc:
+        raise ValidationError("invalid cursor") from exc
+    return created_at, row_id
@@ -1,98 +1,268 @@
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import Sequence
+from contextlib import AbstractAsyncContextManager
 from dataclasses import dataclass
 from typing import Protocol
 
-from app.notifications.interfaces import TelegramNotifier
-from app.repositories.interfaces import PriceSampleRepository
+from app.notifications.interfaces import PriceEventPublisher, TelegramNotifier
+from app.repositories.interfaces import PriceSampleRecord, PriceSampleRepository
+from app.usecases.errors import PriceUnavailableError
+from app.usecases.price_subscriptions import PriceSubscriptionAlerts
 
 logger = logging.getLogger(__name__)
 
+# Telegram rejects messages longer than 4096 characters.
+MAX_ALERT_MESSAGE_LENGTH = 4096
+
 
 class PriceFetcher(Protocol):
     async def fetch(self, symbol: str, last_price: float | None) -> float:
+        """Current price; raises ``PriceUnavailableError`` when there is none."""
+        ...
+
+
+class PriceSampleScope(Protocol):
+    """Opens a unit of work and yields a price sample repository bound to it."""
+
+    def __call__(
+        self, *, read_only: bool = False
+    ) -> AbstractAsyncContextManager[PriceSampleRepository]:
         ...
 
 
+class LastPriceStore:
+    """Latest price sample per symbol as known to this process.
+
+    A symbol maps to ``None`` once the database is known to hold no sample
+    for it, so symbols that never fetched successfully are not re-read every
+    cycle. The store assumes this process is the only writer for its
+    symbols: rows inserted elsewhere are not seen until a symbol is
+    invalidated.
+    """
+
+    def __init__(self) -> None:
+        self._samples: dict[str, PriceSampleRecord | None] = {}
+
+    def __len__(self) -> int:
+        return len(self._samples)
+
+    def missing(self, symbols: Sequence[str]) -> list[str]:
+        return [symbol for symbol in symbols if symbol not in self._samples]
+
+    def get(self, symbol: str) -> PriceSampleRecord | None:
+        return self._samples.get(symbol)
+
+    def load(self, symbols: Sequence[str], samples: dict[str, PriceSampleRecord]) -> None:
+        """Record a database read of ``symbols``; those absent from ``samples`` have none."""
+        for symbol in symbols:
+            self._samples[symbol] = samples.get(symbol)
+
+    def update(self, samples: Sequence[PriceSampleRecord]) -> None:
+        for sample in samples:
+            self._samples[sample.symbol] = sample
+
+    def invalidate(self, symbols: Sequence[str]) -> None:
+        for symbol in symbols:
+            self._samples.pop(symbol, None)
+
+
 @dataclass(frozen=True)
 class PriceAlertResult:
+    """Outcome for one symbol. ``stale`` means no fresh price was fetched:
+    nothing was stored and ``price`` is the last known price, if any."""
+
     symbol: str
-    price: float
+    price: float | None
     last_price: float | None
     change_ratio: float | None
     alerted: bool
+    stale: bool = False
 
 
 class PriceAlertService:
+    """Watches many symbols; built once and run every worker cycle.
+
+    Last prices come from a ``LastPriceStore`` warmed with one query and kept
+    current from the rows this service inserts; the database is only read
+    again for symbols the store does not know, e.g. after a failed write. A
+    cycle fetches all prices concurrently (at most ``max_concurrent_fetches``
+    in flight), stores the new samples with one multi-row insert and sends
+    the alerts. No database connection is held while prices are fetched.
+    Symbols whose price could not be fetched are reported as stale results.
+
+    With ``events`` every stored sample is published as a ``price`` event and
+    every alert as an ``alert`` event, before the Telegram message goes out.
+    With ``subscriptions`` the stored prices are also checked against every
+    user's price alerts; a failure there is logged and does not fail the cycle.
+    """
+
     def __init__(
         self,
-        price_samples: PriceSampleRepository,
+        price_samples: PriceSampleScope,
         notifier: TelegramNotifier,
         fetcher: PriceFetcher,
-        symbol: str,
+        symbols: Sequence[str],
         threshold: float = 0.01,
+        max_concurrent_fetches: int = 20,
+        last_prices: LastPriceStore | None = None,
+        events: PriceEventPublisher | None = None,
+        subscriptions: PriceSubscriptionAlerts | None = None,
     ) -> None:
         self._price_samples = price_samples
         self._notifier = notifier
         self._fetcher = fetcher
-        self._symbol = symbol
+        self._symbols = list(dict.fromkeys(symbols))
         self._threshold = threshold
+        self._fetch_slots = asyncio.Semaphore(max_concurrent_fetches)
+        self._last_prices = last_prices if last_prices is not None else LastPriceStore()
+        self._events = events
+        self._subscriptions = subscriptions
+
+    @property
+    def symbols(self) -> list[str]:
+        return list(self._symbols)
 
-    async def run_once(self) -> PriceAlertResult | None:
+    async def warm(self) -> None:
+        """Load the latest sample of every symbol the store does not know yet."""
+        missing = self._last_prices.missing(self._symbols)
+        if not missing:
+            return
         try:
-            last_sample = await self._price_samples.get_latest(self._symbol)
+            async with self._price_samples(read_only=True) as price_samples:
+                samples = await price_samples.get_latest_many(missing)
         except Exception:
-            logger.exception("Failed to load last price sample symbol=%s", self._symbol)
+            logger.exception("Failed to load last price samples symbols=%s", len(missing))
             raise
+        self._last_prices.load(missing, samples)
 
-        try:
-            price = await self._fetcher.fetch(
-                self._symbol, last_sample.price if last_sample else None
+    async def run_once(self) -> list[PriceAlertResult]:
+        await self.warm()
+        latest = {symbol: self._last_prices.get(symbol) for symbol in self._symbols}
+
+        prices = await asyncio.gather(
+            *(self._fetch(symbol, latest[symbol]) for symbol in self._symbols)
+        )
+        fetched = [
+            (symbol, price) for symbol, price in zip(self._symbols, prices) if price is not None
+        ]
+        stale = [
+            PriceAlertResult(
+                symbol,
+                latest[symbol].price if latest[symbol] else None,
+                latest[symbol].price if latest[symbol] else None,
+                None,
+                False,
+                stale=True,
             )
-        except Exception:
-            logger.exception("Failed to fetch price symbol=%s", self._symbol)
-            return None
+            for symbol, price in zip(self._symbols, prices)
+            if price is None
+        ]
+        if not fetched:
+            logger.warning("Price alert cycle fetched no prices symbols=%s", len(self._symbols))
+            return stale
 
         try:
-            await self._price_samples.create(self._symbol, price)
+            async with self._price_samples() as price_samples:
+                created = await price_samples.create_many(fetched)
         except Exception:
-            logger.exception(
-                "Failed to persist price sample symbol=%s price=%s", self._symbol, price
-            )
+            # The rows may or may not have committed; re-read these next cycle.
+            self._last_prices.invalidate([symbol for symbol, _ in fetched])
+            logger.exception("Failed to persist price samples count=%s", len(fetched))
             raise
-
-        change_ratio: float | None = None
-        alerted = False
-        if last_sample and last_sample.price:
-            change_ratio = abs(price - last_sample.price) / last_sample.price
-            if change_ratio > self._threshold:
-                message = (
-                    f"Price alert for {self._symbol}: {price:.2f} "
-                    f"({change_ratio * 100:.2f}% change)"
+        self._last_prices.update(created)
+        if self._events is not None:
+            for sample in created:
+                self._events.publish(
+                    "price",
+                    {
+                        "symbol": sample.symbol,
+                        "price": sample.price,
+                        "created_at": sample.created_at.isoformat(),
+                    },
                 )
-                try:
-                    await self._notifier.send_message(message)
-                    alerted = True
-                except Exception:
-                    logger.exception(
-                        "Failed to send alert symbol=%s change_ratio=%s",
-                        self._symbol,
-                        change_ratio,
+
+        results: list[PriceAlertResult] = []
+        alerts: list[tuple[int, str]] = []
+        for symbol, price in fetched:
+            last_sample = latest[symbol]
+            last_price = last_sample.price if last_sample else None
+            change_ratio: float | None = None
+            if last_price:
+                change_ratio = abs(price - last_price) / last_price
+                if change_ratio > self._threshold:
+                    alerts.append(
+                        (
+                            len(results),
+                            f"Price alert for {symbol}: {price:.2f} "
+                            f"({change_ratio * 100:.2f}% change)",
+                        )
                     )
+                    if self._events is not None:
+                        self._events.publish(
+                            "alert",
+                            {
+                                "symbol": symbol,
+                                "price": price,
+                                "last_price": last_price,
+                                "change_ratio": change_ratio,
+                            },
+                        )
+            results.append(PriceAlertResult(symbol, price, last_price, change_ratio, False))
 
+        alerted = await self._send_alerts(alerts)
+        for index in alerted:
+            result = results[index]
+            results[index] = PriceAlertResult(
+                result.symbol, result.price, result.last_price, result.change_ratio, True
+            )
+        if self._subscriptions is not None:
+            try:
+                await self._subscriptions.evaluate(fetched)
+            except Exception:
+                logger.exception("Price alert subscription evaluation failed")
         logger.info(
-            "Price alert cycle symbol=%s price=%s last_price=%s change_ratio=%s alerted=%s",
-            self._symbol,
-            price,
-            last_sample.price if last_sample else None,
-            change_ratio,
-            alerted,
-        )
-        return PriceAlertResult(
-            symbol=self._symbol,
-            price=price,
-            last_price=last_sample.price if last_sample else None,
-            change_ratio=change_ratio,
-            alerted=alerted,
+            "Price alert cycle symbols=%s fetched=%s stale=%s alerts=%s sent=%s",
+            len(self._symbols),
+            len(fetched),
+            len(stale),
+            len(alerts),
+            len(alerted),
         )
+        return results + stale
+
+    async def _fetch(self, symbol: str, last_sample: PriceSampleRecord | None) -> float | None:
+        async with self._fetch_slots:
+            try:
+                return await self._fetcher.fetch(
+                    symbol, last_sample.price if last_sample else None
+                )
+            except PriceUnavailableError:
+                logger.warning("No fresh price; keeping the last one as stale symbol=%s", symbol)
+                return None
+            except Exception:
+                logger.exception("Failed to fetch price symbol=%s", symbol)
+                return None
+
+    async def _send_alerts(self, alerts: list[tuple[int, str]]) -> list[int]:
+        """Send alert lines packed into as few messages as fit; return the sent indexes."""
+        batches: list[list[tuple[int, str]]] = []
+        length = 0
+        for alert in alerts:
+            line_length = len(alert[1]) + 1
+            if not batches or length + line_length > MAX_ALERT_MESSAGE_LENGTH:
+                batches.append([])
+                length = 0
+            batches[-1].append(alert)
+            length += line_length
+        sent: list[int] = []
+        for batch in batches:
+            try:
+                await self._notifier.send_message("\n".join(line for _, line in batch))
+            except Exception:
+                logger.exception("Failed to send price alerts count=%s", len(batch))
+                continue
+            sent.extend(index for index, _ in batch)
+        return sent
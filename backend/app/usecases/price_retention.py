@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from datetime import datetime, timedelta, timezone
+
+from app.usecases.errors import ValidationError
+from app.usecases.price_alerts import PriceSampleScope
+
+logger = logging.getLogger(__name__)
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class PruneRawPriceSamples:
+    """Delete raw price samples older than the retention window in small batches.
+
+    Samples are folded into the rollup tables as they are inserted, so
+    anything past the window is already rolled up. Each batch commits in its
+    own unit of work to keep locks and WAL bursts short.
+    """
+
+    def __init__(
+        self,
+        price_samples: PriceSampleScope,
+        retention: timedelta,
+        batch_size: int = 5000,
+        pause_seconds: float = 0.1,
+        clock: Callable[[], datetime] = _utcnow,
+    ) -> None:
+        if retention <= timedelta(0):
+            raise ValidationError("retention must be positive")
+        if batch_size <= 0:
+            raise ValidationError("batch_size must be positive")
+        self._price_samples = price_samples
+        self._retention = retention
+        self._batch_size = batch_size
+        self._pause_seconds = pause_seconds
+        self._clock = clock
+
+    async def execute(self) -> int:
+        cutoff = self._clock() - self._retention
+        deleted = 0
+        while True:
+            async with self._price_samples() as price_samples:
+                batch = await price_samples.delete_older_than(cutoff, self._batch_size)
+            deleted += batch
+            if batch < self._batch_size:
+                break
+            await asyncio.sleep(self._pause_seconds)
+        logger.info("Pruned raw price samples deleted=%s cutoff=%s", deleted, cutoff.isoformat())
+        return deleted
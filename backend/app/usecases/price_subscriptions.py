@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import math
+import re
+import time
+from collections.abc import Callable, Collection, Iterable, Sequence
+from contextlib import AbstractAsyncContextManager
+from typing import Protocol
+
+from app.notifications.interfaces import TelegramNotifier
+from app.repositories.interfaces import (
+    PriceAlertSubscriptionRecord,
+    PriceAlertSubscriptionRepository,
+)
+from app.usecases.errors import NotFoundError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+ABOVE = "above"
+BELOW = "below"
+DIRECTIONS = (ABOVE, BELOW)
+MAX_SUBSCRIPTIONS_PER_USER = 50
+SYMBOL_PATTERN = re.compile(r"^[A-Z0-9]{2,10}-[A-Z0-9]{2,10}$")
+
+
+def _validate_telegram_id(telegram_id: int) -> None:
+    if telegram_id <= 0:
+        raise ValidationError("telegram_id must be positive")
+
+
+class CreatePriceAlertSubscription:
+    """Only ``symbols`` (the ones the price worker fetches) can be subscribed to."""
+
+    def __init__(
+        self, subscriptions: PriceAlertSubscriptionRepository, symbols: Collection[str]
+    ) -> None:
+        self._subscriptions = subscriptions
+        self._symbols = symbols
+
+    async def execute(
+        self, telegram_id: int, symbol: str, direction: str, threshold: float
+    ) -> PriceAlertSubscriptionRecord:
+        _validate_telegram_id(telegram_id)
+        symbol = symbol.strip().upper()
+        if not SYMBOL_PATTERN.match(symbol):
+            raise ValidationError("symbol must look like BTC-USD")
+        if symbol not in self._symbols:
+            raise ValidationError(
+                f"{symbol} is not watched; choose one of {', '.join(self._symbols)}"
+            )
+        if direction not in DIRECTIONS:
+            raise ValidationError("direction must be 'above' or 'below'")
+        if not math.isfinite(threshold) or threshold <= 0:
+            raise ValidationError("threshold must be a positive number")
+        active = await self._subscriptions.count_active_by_user(telegram_id)
+        if active >= MAX_SUBSCRIPTIONS_PER_USER:
+            raise ValidationError(
+                f"at most {MAX_SUBSCRIPTIONS_PER_USER} active price alerts per user"
+            )
+        return await self._subscriptions.create(telegram_id, symbol, direction, threshold)
+
+
+class ListPriceAlertSubscriptions:
+    def __init__(self, subscriptions: PriceAlertSubscriptionRepository) -> None:
+        self._subscriptions = subscriptions
+
+    async def execute(self, telegram_id: int) -> list[PriceAlertSubscriptionRecord]:
+        _validate_telegram_id(telegram_id)
+        return await self._subscriptions.list_active_by_user(telegram_id)
+
+
+class DeletePriceAlertSubscription:
+    def __init__(self, subscriptions: PriceAlertSubscriptionRepository) -> None:
+        self._subscriptions = subscriptions
+
+    async def execute(self, telegram_id: int, subscription_id: int) -> None:
+        _validate_telegram_id(telegram_id)
+        if not await self._subscriptions.delete(telegram_id, subscription_id):
+            raise NotFoundError("price alert not found")
+
+
+class ThresholdIndex:
+    """Active subscription thresholds, sorted per symbol and direction.
+
+    ``above`` alerts fire once the price is above their threshold, i.e. they
+    are a prefix of the ascending ``(threshold, id)`` list; ``below`` alerts
+    are the matching suffix. ``pop_crossed`` finds the boundary with bisect
+    and cuts the matches out, so a tick costs O(log n + matches) and fired
+    alerts are never looked at again. Since everything left over lies beyond
+    the previous price, each tick only walks the thresholds inside the range
+    the price just moved through.
+    """
+
+    def __init__(self) -> None:
+        self._above: dict[str, list[tuple[float, int]]] = {}
+        self._below: dict[str, list[tuple[float, int]]] = {}
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @classmethod
+    def from_subscriptions(
+        cls, subscriptions: Iterable[PriceAlertSubscriptionRecord]
+    ) -> "ThresholdIndex":
+        """Build an index in O(n log n): append everything, then sort each list once."""
+        index = cls()
+        for subscription in subscriptions:
+            side = index._above if subscription.direction == ABOVE else index._below
+            side.setdefault(subscription.symbol, []).append(
+                (subscription.threshold, subscription.id)
+            )
+            index._size += 1
+        for side in (index._above, index._below):
+            for thresholds in side.values():
+                thresholds.sort()
+        return index
+
+    def add(self, subscription: PriceAlertSubscriptionRecord) -> None:
+        side = self._above if subscription.direction == ABOVE else self._below
+        bisect.insort(
+            side.setdefault(subscription.symbol, []),
+            (subscription.threshold, subscription.id),
+        )
+        self._size += 1
+
+    def pop_crossed(self, symbol: str, price: float) -> list[int]:
+        """Remove and return the ids of alerts that ``price`` satisfies."""
+        crossed: list[int] = []
+        above = self._above.get(symbol)
+        if above:
+            end = bisect.bisect_left(above, (price,))
+            crossed.extend(subscription_id for _, subscription_id in above[:end])
+            del above[:end]
+        below = self._below.get(symbol)
+        if below:
+            start = bisect.bisect_right(below, (price, math.inf))
+            crossed.extend(subscription_id for _, subscription_id in below[start:])
+            del below[start:]
+        self._size -= len(crossed)
+        return crossed
+
+
+class PriceAlertSubscriptionScope(Protocol):
+    """Opens a unit of work and yields a subscription repository bound to it."""
+
+    def __call__(self) -> AbstractAsyncContextManager[PriceAlertSubscriptionRepository]:
+        ...
+
+
+def _alert_line(subscription: PriceAlertSubscriptionRecord, price: float) -> str:
+    return (
+        f"{subscription.symbol} is {price:,.2f}, {subscription.direction} your "
+        f"{subscription.threshold:,.2f} alert (#{subscription.id})"
+    )
+
+
+class PriceSubscriptionAlerts:
+    """Evaluates every user's price alerts against each cycle's prices.
+
+    Active subscriptions live in a ``ThresholdIndex``. Each evaluation first
+    pages in subscriptions created since the last one, and every
+    ``reload_interval`` seconds rebuilds the index from scratch to shed alerts
+    deleted in the meantime. Ids are allocated before their transaction
+    commits, so a subscription may become visible after higher ids were
+    loaded; the incremental load therefore re-reads the last
+    ``rescan_window`` ids and skips those already indexed. One committing
+    later than that is picked up by the next rebuild. Crossed alerts are
+    deactivated with one ``UPDATE ... RETURNING``, which also filters out
+    deleted ones, and each user gets one message listing theirs. Alerts are
+    one-shot and delivered at most once: a failed send is logged, not retried.
+    """
+
+    def __init__(
+        self,
+        subscriptions: PriceAlertSubscriptionScope,
+        notifier: TelegramNotifier,
+        load_batch_size: int = 10_000,
+        reload_interval: float = 3600.0,
+        rescan_window: int = 1_000,
+        max_concurrent_sends: int = 50,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._subscriptions = subscriptions
+        self._notifier = notifier
+        self._load_batch_size = load_batch_size
+        self._reload_interval = reload_interval
+        self._rescan_window = rescan_window
+        self._send_slots = asyncio.Semaphore(max_concurrent_sends)
+        self._clock = clock
+        self._index = ThresholdIndex()
+        self._last_id = 0
+        # Ids within ``rescan_window`` of ``_last_id`` that were already loaded.
+        self._recent_ids: set[int] = set()
+        self._reload_at: float | None = None
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    async def refresh(self) -> None:
+        """Load new subscriptions, or rebuild the whole index when it is due."""
+        now = self._clock()
+        reload = self._reload_at is None or now >= self._reload_at
+        last_id = 0 if reload else max(0, self._last_id - self._rescan_window)
+        loaded: list[PriceAlertSubscriptionRecord] = []
+        async with self._subscriptions() as subscriptions:
+            while True:
+                page = await subscriptions.list_active(last_id, self._load_batch_size)
+                loaded.extend(page)
+                if page:
+                    last_id = page[-1].id
+                if len(page) < self._load_batch_size:
+                    break
+        # Index outside the unit of work so its connection goes back to the pool first.
+        if reload:
+            self._index = ThresholdIndex.from_subscriptions(loaded)
+            recent = set()
+        else:
+            recent = self._recent_ids
+            for subscription in loaded:
+                if subscription.id not in recent:
+                    self._index.add(subscription)
+            last_id = max(last_id, self._last_id)
+        floor = last_id - self._rescan_window
+        self._recent_ids = {id for id in recent if id > floor}
+        self._recent_ids.update(
+            subscription.id for subscription in loaded if subscription.id > floor
+        )
+        self._last_id = last_id
+        if reload:
+            self._reload_at = now + self._reload_interval
+            logger.info("Loaded price alert subscriptions count=%s", len(self._index))
+
+    async def evaluate(
+        self, prices: Sequence[tuple[str, float]]
+    ) -> list[PriceAlertSubscriptionRecord]:
+        """Fire the alerts crossed by ``(symbol, price)`` pairs; return those fired."""
+        await self.refresh()
+        crossed = [
+            subscription_id
+            for symbol, price in prices
+            for subscription_id in self._index.pop_crossed(symbol, price)
+        ]
+        if not crossed:
+            return []
+        try:
+            async with self._subscriptions() as subscriptions:
+                fired = await subscriptions.deactivate(crossed)
+        except Exception:
+            # Popped alerts may still be active; rebuild the index next time.
+            self._reload_at = None
+            raise
+
+        current = dict(prices)
+        by_user: dict[int, list[str]] = {}
+        for subscription in fired:
+            by_user.setdefault(subscription.telegram_id, []).append(
+                _alert_line(subscription, current[subscription.symbol])
+            )
+        await asyncio.gather(
+            *(self._send(telegram_id, lines) for telegram_id, lines in by_user.items())
+        )
+        logger.info(
+            "Price alert subscriptions fired count=%s users=%s", len(fired), len(by_user)
+        )
+        return fired
+
+    async def _send(self, telegram_id: int, lines: list[str]) -> None:
+        async with self._send_slots:
+            try:
+                await self._notifier.send_message(
+                    "Price alert:\n" + "\n".join(lines), chat_id=telegram_id
+                )
+            except Exception:
+                logger.exception("Failed to send price alert telegram_id=%s", telegram_id)
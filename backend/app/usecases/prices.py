@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import math
+from datetime import datetime, timedelta, timezone
+
+from app.repositories.interfaces import PriceSampleRepository
+from app.usecases.errors import ValidationError
+
+# Bucket sizes a chart can ask for, smallest first.
+RESOLUTIONS: dict[str, int] = {
+    "10s": 10,
+    "30s": 30,
+    "1m": 60,
+    "5m": 300,
+    "15m": 900,
+    "1h": 3600,
+    "4h": 14400,
+    "1d": 86400,
+}
+AUTO_RESOLUTION = "auto"
+# ``auto`` picks the finest resolution that stays within this many points,
+# but never one finer than the 1m rollups: raw samples expire.
+TARGET_POINTS = 500
+AUTO_MIN_SECONDS = 60
+MAX_POINTS = 2000
+DEFAULT_RANGE = timedelta(days=1)
+
+
+def _as_utc(value: datetime) -> datetime:
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _floor(value: datetime, seconds: int) -> datetime:
+    epoch = math.floor(value.timestamp())
+    return datetime.fromtimestamp(epoch - epoch % seconds, timezone.utc)
+
+
+def _ceil(value: datetime, seconds: int) -> datetime:
+    epoch = math.ceil(value.timestamp())
+    return datetime.fromtimestamp(-(-epoch // seconds) * seconds, timezone.utc)
+
+
+def _points(start: datetime, end: datetime, seconds: int) -> int:
+    return math.ceil((_ceil(end, seconds) - _floor(start, seconds)).total_seconds() / seconds)
+
+
+class GetPriceHistory:
+    """OHLC buckets of one symbol over a time range, aggregated in the database.
+
+    The range is widened to whole buckets so every bucket is complete and the
+    repository can serve it from a rollup table. At most ``MAX_POINTS``
+    buckets are returned; ``auto`` resolution aims for ``TARGET_POINTS``.
+    """
+
+    def __init__(self, price_samples: PriceSampleRepository) -> None:
+        self._price_samples = price_samples
+
+    async def execute(
+        self,
+        symbol: str,
+        start: datetime | None = None,
+        end: datetime | None = None,
+        resolution: str = AUTO_RESOLUTION,
+        now: datetime | None = None,
+    ):
+        symbol = symbol.strip()
+        if not symbol or len(symbol) > 32:
+            raise ValidationError("symbol must be 1 to 32 characters")
+        end = _as_utc(end) if end else _as_utc(now or datetime.now(timezone.utc))
+        start = _as_utc(start) if start else end - DEFAULT_RANGE
+        if start >= end:
+            raise ValidationError("from must be before to")
+        if resolution == AUTO_RESOLUTION:
+            name, seconds = self._auto_resolution(start, end)
+        elif resolution in RESOLUTIONS:
+            name, seconds = resolution, RESOLUTIONS[resolution]
+        else:
+            raise ValidationError(
+                f"resolution must be {AUTO_RESOLUTION} or one of {', '.join(RESOLUTIONS)}"
+            )
+        if _points(start, end, seconds) > MAX_POINTS:
+            raise ValidationError(
+                f"range needs more than {MAX_POINTS} points at {name}; "
+                "use a coarser resolution or a shorter range"
+            )
+        start, end = _floor(start, seconds), _ceil(end, seconds)
+        candles = await self._price_samples.candles(symbol, start, end, seconds)
+        return {
+            "symbol": symbol,
+            "resolution": name,
+            "from": start,
+            "to": end,
+            "points": candles,
+        }
+
+    @staticmethod
+    def _auto_resolution(start: datetime, end: datetime) -> tuple[str, int]:
+        for name, seconds in RESOLUTIONS.items():
+            if seconds >= AUTO_MIN_SECONDS and _points(start, end, seconds) <= TARGET_POINTS:
+                return name, seconds
+        return "1d", RESOLUTIONS["1d"]
@@ -1,23 +1,59 @@
 from __future__ import annotations
 
 import logging
+from collections.abc import Sequence
+from dataclasses import dataclass
+
 from sqlalchemy.exc import IntegrityError
 
-from app.repositories.interfaces import ReferralRepository
+from app.cache.interfaces import ReadThroughCache
+from app.cache.keys import referral_summary_key, user_status_key
+from app.repositories.interfaces import ReferralRecord, ReferralRepository
 from app.usecases.errors import ConflictError, ValidationError
+from app.usecases.pagination import decode_cursor, encode_cursor
 
 logger = logging.getLogger(__name__)
 
+BULK_CREATED = "created"
+BULK_DUPLICATE = "duplicate"
+BULK_CONFLICT = "conflict"
+BULK_INVALID = "invalid"
+
+SUMMARY_REFERRALS_LIMIT = 5
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+
+def _validate_referral_pair(referrer_telegram_id: int, referred_telegram_id: int) -> None:
+    if referrer_telegram_id <= 0 or referred_telegram_id <= 0:
+        raise ValidationError("telegram ids must be positive")
+    if referrer_telegram_id == referred_telegram_id:
+        raise ValidationError("referrer and referred cannot be the same")
+
+
+async def _invalidate_referral_reads(
+    cache: ReadThroughCache | None, pairs: Sequence[tuple[int, int]]
+) -> None:
+    """Drop cached status/summary reads affected by newly created referrals."""
+    if cache is None or not pairs:
+        return
+    keys: set[str] = set()
+    for referrer_telegram_id, referred_telegram_id in pairs:
+        keys.add(user_status_key(referrer_telegram_id))
+        keys.add(referral_summary_key(referrer_telegram_id))
+        keys.add(user_status_key(referred_telegram_id))
+    await cache.invalidate(*sorted(keys))
+
 
 class CreateReferral:
-    def __init__(self, referrals: ReferralRepository) -> None:
+    def __init__(
+        self, referrals: ReferralRepository, cache: ReadThroughCache | None = None
+    ) -> None:
         self._referrals = referrals
+        self._cache = cache
 
     async def execute(self, referrer_telegram_id: int, referred_telegram_id: int):
-        if referrer_telegram_id <= 0 or referred_telegram_id <= 0:
-            raise ValidationError("telegram ids must be positive")
-        if referrer_telegram_id == referred_telegram_id:
-            raise ValidationError("referrer and referred cannot be the same")
+        _validate_referral_pair(referrer_telegram_id, referred_telegram_id)
         existing = await self._referrals.get_by_referred(referred_telegram_id)
         if existing:
             if existing.referrer_telegram_id == referrer_telegram_id:
@@ -25,32 +61,194 @@ class CreateReferral:
             raise ConflictError("referred user already has a referrer")
         try:
             created = await self._referrals.create(referrer_telegram_id, referred_telegram_id)
-            return created, True
         except IntegrityError:
             logger.info("Referral integrity conflict; resolving idempotently")
             existing = await self._referrals.get_by_referred(referred_telegram_id)
             if existing and existing.referrer_telegram_id == referrer_telegram_id:
                 return existing, False
             raise ConflictError("referred user already has a referrer")
+        await _invalidate_referral_reads(
+            self._cache, [(referrer_telegram_id, referred_telegram_id)]
+        )
+        return created, True
+
+
+class RegisterReferral:
+    """Upsert both users and create the referral in one repository round trip.
+
+    Same contract as ``CreateReferral``: idempotent for the same referrer and a
+    ``ConflictError`` when the referred user already has a different referrer.
+    """
+
+    def __init__(
+        self, referrals: ReferralRepository, cache: ReadThroughCache | None = None
+    ) -> None:
+        self._referrals = referrals
+        self._cache = cache
+
+    async def execute(self, referrer_telegram_id: int, referred_telegram_id: int):
+        _validate_referral_pair(referrer_telegram_id, referred_telegram_id)
+        referral, created, conflict = await self._referrals.register(
+            referrer_telegram_id, referred_telegram_id
+        )
+        if conflict:
+            raise ConflictError("referred user already has a referrer")
+        if created:
+            await _invalidate_referral_reads(
+                self._cache, [(referrer_telegram_id, referred_telegram_id)]
+            )
+        return referral, created
+
+
+@dataclass(frozen=True)
+class BulkReferralOutcome:
+    referrer_telegram_id: int
+    referred_telegram_id: int
+    status: str
+    referral: ReferralRecord | None = None
+    detail: str | None = None
+
+
+class BulkCreateReferrals:
+    """Apply ``CreateReferral`` rules to a batch of pairs with set-based writes.
+
+    Outcomes are returned in input order. When a batch repeats a referred id,
+    the first valid pair is written and later ones resolve against it exactly
+    as a sequence of single ``CreateReferral`` calls would.
+    """
+
+    def __init__(
+        self, referrals: ReferralRepository, cache: ReadThroughCache | None = None
+    ) -> None:
+        self._referrals = referrals
+        self._cache = cache
+
+    async def execute(
+        self, pairs: Sequence[tuple[int, int]]
+    ) -> list[BulkReferralOutcome]:
+        invalid: dict[int, str] = {}
+        to_register: dict[int, tuple[int, int]] = {}
+        for index, (referrer_telegram_id, referred_telegram_id) in enumerate(pairs):
+            try:
+                _validate_referral_pair(referrer_telegram_id, referred_telegram_id)
+            except ValidationError as exc:
+                invalid[index] = str(exc)
+                continue
+            to_register.setdefault(
+                referred_telegram_id, (referrer_telegram_id, referred_telegram_id)
+            )
+        owners = await self._referrals.register_many(list(to_register.values()))
+
+        outcomes: list[BulkReferralOutcome] = []
+        resolved: set[int] = set()
+        for index, (referrer_telegram_id, referred_telegram_id) in enumerate(pairs):
+            if index in invalid:
+                outcomes.append(
+                    BulkReferralOutcome(
+                        referrer_telegram_id,
+                        referred_telegram_id,
+                        BULK_INVALID,
+                        detail=invalid[index],
+                    )
+                )
+                continue
+            referral, created = owners[referred_telegram_id]
+            detail = None
+            if created and referred_telegram_id not in resolved:
+                status = BULK_CREATED
+            elif referral.referrer_telegram_id == referrer_telegram_id:
+                status = BULK_DUPLICATE
+            else:
+                status = BULK_CONFLICT
+                detail = "referred user already has a referrer"
+            resolved.add(referred_telegram_id)
+            outcomes.append(
+                BulkReferralOutcome(
+                    referrer_telegram_id, referred_telegram_id, status, referral, detail
+                )
+            )
+        await _invalidate_referral_reads(
+            self._cache,
+            [
+                (outcome.referrer_telegram_id, outcome.referred_telegram_id)
+                for outcome in outcomes
+                if outcome.status == BULK_CREATED
+            ],
+        )
+        return outcomes
 
 
 class GetReferralSummary:
-    def __init__(self, referrals: ReferralRepository) -> None:
+    def __init__(
+        self, referrals: ReferralRepository, cache: ReadThroughCache | None = None
+    ) -> None:
         self._referrals = referrals
+        self._cache = cache
 
     async def execute(self, referrer_telegram_id: int):
         if referrer_telegram_id <= 0:
             raise ValidationError("telegram_id must be positive")
+        if self._cache is None:
+            return await self._load(referrer_telegram_id)
+        return await self._cache.get_or_load(
+            referral_summary_key(referrer_telegram_id),
+            lambda: self._load(referrer_telegram_id),
+        )
+
+    async def _load(self, referrer_telegram_id: int):
         count = await self._referrals.count_by_referrer(referrer_telegram_id)
-        last_referrals = await self._referrals.last_referrals(referrer_telegram_id)
+        last_referrals = await self._referrals.last_referrals(
+            referrer_telegram_id, SUMMARY_REFERRALS_LIMIT
+        )
+        next_cursor = None
+        if last_referrals and count > len(last_referrals):
+            last = last_referrals[-1]
+            next_cursor = encode_cursor(last.created_at, last.id)
         return {
             "referrer_telegram_id": referrer_telegram_id,
             "count": count,
-            "last_5_referrals": [
-                {
-                    "referred_telegram_id": referral.referred_telegram_id,
-                    "created_at": referral.created_at,
-                }
-                for referral in last_referrals
-            ],
+            "last_5_referrals": [_summary_item(referral) for referral in last_referrals],
+            "next_cursor": next_cursor,
         }
+
+
+class ListReferrals:
+    """Newest-first page of a referrer's referrals behind an opaque cursor.
+
+    Keyset pagination on ``(created_at, id)``: every page costs ``limit`` index
+    entries no matter how deep the caller has paged.
+    """
+
+    def __init__(self, referrals: ReferralRepository) -> None:
+        self._referrals = referrals
+
+    async def execute(
+        self,
+        referrer_telegram_id: int,
+        limit: int = DEFAULT_PAGE_SIZE,
+        after: str | None = None,
+    ):
+        if referrer_telegram_id <= 0:
+            raise ValidationError("telegram_id must be positive")
+        if not 1 <= limit <= MAX_PAGE_SIZE:
+            raise ValidationError(f"limit must be between 1 and {MAX_PAGE_SIZE}")
+        position = decode_cursor(after) if after else None
+        rows = await self._referrals.list_by_referrer(
+            referrer_telegram_id, limit + 1, position
+        )
+        page = rows[:limit]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = encode_cursor(page[-1].created_at, page[-1].id)
+        return {
+            "referrer_telegram_id": referrer_telegram_id,
+            "referrals": [_summary_item(referral) for referral in page],
+            "next_cursor": next_cursor,
+        }
+
+
+def _summary_item(referral: ReferralRecord) -> dict:
+    return {
+        "referred_telegram_id": referral.referred_telegram_id,
+        "created_at": referral.created_at,
+    }
@@ -1,5 +1,9 @@
 from __future__ import annotations
 
+from collections.abc import Sequence
+
+from app.cache.interfaces import ReadThroughCache
+from app.cache.keys import user_status_key
 from app.repositories.interfaces import ReferralRepository, UserRepository
 from app.usecases.errors import NotFoundError, ValidationError
 
@@ -14,14 +18,46 @@ class UpsertUser:
         return await self._users.upsert(telegram_id)
 
 
+MAX_BATCH_UPSERT_SIZE = 10_000
+
+
+class UpsertUsers:
+    def __init__(self, users: UserRepository) -> None:
+        self._users = users
+
+    async def execute(self, telegram_ids: Sequence[int]):
+        if not telegram_ids:
+            raise ValidationError("telegram_ids must not be empty")
+        if len(telegram_ids) > MAX_BATCH_UPSERT_SIZE:
+            raise ValidationError(
+                f"at most {MAX_BATCH_UPSERT_SIZE} telegram_ids per batch"
+            )
+        if any(telegram_id <= 0 for telegram_id in telegram_ids):
+            raise ValidationError("telegram_id must be positive")
+        return await self._users.get_or_create_many(telegram_ids)
+
+
 class GetUserStatus:
-    def __init__(self, users: UserRepository, referrals: ReferralRepository) -> None:
+    def __init__(
+        self,
+        users: UserRepository,
+        referrals: ReferralRepository,
+        cache: ReadThroughCache | None = None,
+    ) -> None:
         self._users = users
         self._referrals = referrals
+        self._cache = cache
 
     async def execute(self, telegram_id: int):
         if telegram_id <= 0:
             raise ValidationError("telegram_id must be positive")
+        if self._cache is None:
+            return await self._load(telegram_id)
+        return await self._cache.get_or_load(
+            user_status_key(telegram_id), lambda: self._load(telegram_id)
+        )
+
+    async def _load(self, telegram_id: int):
         user = await self._users.get_by_telegram_id(telegram_id)
         if not user:
             raise NotFoundError("user not found")
@@ -3,14 +3,38 @@ from __future__ import annotations
 import asyncio
 import logging
 import os
+import time
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 
 import aiohttp
 
+from app.core.config import DB_POOL_LOG_INTERVAL_SECONDS, PRICE_ALERT_SYMBOLS
 from app.core.logging import setup_logging
-from app.db.session import UnitOfWork
-from app.repositories.sqlalchemy import SqlAlchemyPriceSampleRepository
+from app.db.partitions import maintain_price_partitions
+from app.db.pool import log_pool_stats
+from app.db.session import UnitOfWork, engine
+from app.notifications.rate_limiter import build_send_scheduler
+from app.notifications.interfaces import PriceEventPublisher
+from app.notifications.price_relay import PriceEventNotifier, relay_supported
+from app.repositories.interfaces import (
+    PriceAlertSubscriptionRepository,
+    PriceSampleRepository,
+)
+from app.repositories.sqlalchemy import (
+    SqlAlchemyPriceAlertSubscriptionRepository,
+    SqlAlchemyPriceSampleRepository,
+)
 from app.usecases.price_alerts import PriceAlertService
-from app.worker.price_fetcher import ApiPriceFetcher
+from app.usecases.price_subscriptions import PriceSubscriptionAlerts
+from app.usecases.price_retention import PruneRawPriceSamples
+from app.worker.price_fetcher import (
+    COINBASE_PROVIDER,
+    ChainedPriceFetcher,
+    PriceProvider,
+    parse_providers,
+)
 from app.worker.telegram_notifier import AiogramTelegramNotifier, NullTelegramNotifier
 
 logger = logging.getLogger(__name__)
@@ -38,42 +62,149 @@ def _env_int(name: str, default: int) -> int:
         return default
 
 
-async def _run_worker() -> None:
-    setup_logging()
+def _env_providers() -> list[PriceProvider]:
+    """``PRICE_PROVIDERS`` (``name|url|json.path;...``), else ``PRICE_ALERT_API_URL``."""
+    raw = os.getenv("PRICE_PROVIDERS")
+    if not raw:
+        api_url = os.getenv("PRICE_ALERT_API_URL")
+        raw = f"coinbase|{api_url}|data.amount" if api_url else COINBASE_PROVIDER
+    return parse_providers(raw)
+
+
+@asynccontextmanager
+async def _price_samples(*, read_only: bool = False) -> AsyncIterator[PriceSampleRepository]:
+    async with UnitOfWork(read_only=read_only) as uow:
+        yield SqlAlchemyPriceSampleRepository(uow.session)
+
+
+@asynccontextmanager
+async def _price_alert_subscriptions() -> AsyncIterator[PriceAlertSubscriptionRepository]:
+    async with UnitOfWork() as uow:
+        yield SqlAlchemyPriceAlertSubscriptionRepository(uow.session)
+
+
+async def _maintain_price_samples(
+    retention: timedelta | None, batch_size: int, days_ahead: int, interval: float
+) -> None:
+    """Partitioned table: create/drop daily partitions. Otherwise: batched DELETEs."""
+    prune = (
+        PruneRawPriceSamples(_price_samples, retention, batch_size=batch_size)
+        if retention is not None
+        else None
+    )
+    while True:
+        try:
+            async with UnitOfWork() as uow:
+                partitions = await maintain_price_partitions(
+                    uow.session, datetime.now(timezone.utc), days_ahead, retention
+                )
+            if partitions is None and prune is not None:
+                await prune.execute()
+        except Exception:
+            logger.exception("Price sample maintenance failed")
+        await asyncio.sleep(interval)
+
+
+async def run_price_worker(events: PriceEventPublisher | None = None) -> None:
+    """Price alert cycles plus price sample maintenance, until cancelled.
+
+    ``python -m app.worker.main`` runs it standalone; the API can embed it
+    (``PRICE_WORKER_EMBEDDED``). Without ``events``, on PostgreSQL the live
+    price events are sent to the API processes with NOTIFY.
+    """
     interval = _env_int("PRICE_ALERT_INTERVAL_SECONDS", 300)
     threshold = _env_float("PRICE_ALERT_THRESHOLD", 0.01)
-    symbol = os.getenv("PRICE_ALERT_SYMBOL", "BTC-USD")
-    api_url = os.getenv(
-        "PRICE_ALERT_API_URL", "https://api.coinbase.com/v2/prices/{symbol}/spot"
-    )
+    symbols = list(PRICE_ALERT_SYMBOLS)
+    fetch_concurrency = max(1, _env_int("PRICE_ALERT_FETCH_CONCURRENCY", 20))
+    providers = _env_providers()
     token = os.getenv("TELEGRAM_BOT_TOKEN")
     chat_id = os.getenv("TELEGRAM_ALERT_CHAT_ID")
 
     notifier = (
-        AiogramTelegramNotifier(token, chat_id)
-        if token and chat_id
+        AiogramTelegramNotifier(token, chat_id, scheduler=build_send_scheduler())
+        if token
         else NullTelegramNotifier()
     )
-    if not (token and chat_id):
-        logger.warning("Telegram alert env vars missing; alerts will be logged only")
+    if not token:
+        logger.warning("TELEGRAM_BOT_TOKEN missing; alerts will be logged only")
+    elif not chat_id:
+        logger.warning("TELEGRAM_ALERT_CHAT_ID missing; channel alerts will be logged only")
+
+    retention_days = _env_float("PRICE_SAMPLE_RETENTION_DAYS", 7)
+    maintenance = asyncio.create_task(
+        _maintain_price_samples(
+            timedelta(days=retention_days) if retention_days > 0 else None,
+            batch_size=max(1, _env_int("PRICE_SAMPLE_RETENTION_BATCH_SIZE", 5000)),
+            days_ahead=max(1, _env_int("PRICE_PARTITION_DAYS_AHEAD", 7)),
+            interval=_env_float("PRICE_SAMPLE_RETENTION_INTERVAL_SECONDS", 3600),
+        )
+    )
 
-    async with aiohttp.ClientSession() as session:
-        fetcher = ApiPriceFetcher(api_url, session)
-        while True:
+    relay: asyncio.Task | None = None
+    if events is None and relay_supported(engine):
+        publisher = PriceEventNotifier(engine)
+        relay = asyncio.create_task(publisher.run())
+        events = publisher
+
+    connector = aiohttp.TCPConnector(limit=fetch_concurrency)
+    try:
+        async with aiohttp.ClientSession(connector=connector) as session:
+            service = PriceAlertService(
+                price_samples=_price_samples,
+                notifier=notifier,
+                fetcher=ChainedPriceFetcher(
+                    providers,
+                    session,
+                    timeout=_env_float("PRICE_FETCH_TIMEOUT_SECONDS", 5),
+                    hedge_after=_env_float("PRICE_FETCH_HEDGE_AFTER_SECONDS", 1),
+                    failure_threshold=max(1, _env_int("PRICE_PROVIDER_FAILURE_THRESHOLD", 5)),
+                    reset_timeout=_env_float("PRICE_PROVIDER_RESET_SECONDS", 30),
+                ),
+                symbols=symbols,
+                threshold=threshold,
+                max_concurrent_fetches=fetch_concurrency,
+                events=events,
+                subscriptions=PriceSubscriptionAlerts(
+                    _price_alert_subscriptions,
+                    notifier,
+                    reload_interval=_env_float("PRICE_SUBSCRIPTION_RELOAD_SECONDS", 3600),
+                    rescan_window=max(0, _env_int("PRICE_SUBSCRIPTION_RESCAN_IDS", 1000)),
+                ),
+            )
+            logger.info(
+                "Price alert worker watching symbols=%s providers=%s",
+                len(symbols),
+                ",".join(provider.name for provider in providers),
+            )
             try:
-                async with UnitOfWork() as uow:
-                    repo = SqlAlchemyPriceSampleRepository(uow.session)
-                    service = PriceAlertService(
-                        price_samples=repo,
-                        notifier=notifier,
-                        fetcher=fetcher,
-                        symbol=symbol,
-                        threshold=threshold,
-                    )
-                    await service.run_once()
+                await service.warm()
             except Exception:
-                logger.exception("Price alert worker cycle failed")
-            await asyncio.sleep(interval)
+                logger.exception("Last price warm-up failed; the first cycle will retry")
+            while True:
+                started = time.monotonic()
+                try:
+                    await service.run_once()
+                except Exception:
+                    logger.exception("Price alert worker cycle failed")
+                await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+    finally:
+        maintenance.cancel()
+        if relay is not None:
+            relay.cancel()
+
+
+async def _run_worker() -> None:
+    setup_logging()
+    pool_log = (
+        asyncio.create_task(log_pool_stats(engine, DB_POOL_LOG_INTERVAL_SECONDS))
+        if DB_POOL_LOG_INTERVAL_SECONDS > 0
+        else None
+    )
+    try:
+        await run_price_worker()
+    finally:
+        if pool_log is not None:
+            pool_log.cancel()
 
 
 def main() -> None:
@@ -1,43 +1,242 @@
+"""Price fetching over a chain of HTTP price providers.
+
+Providers are tried in order. When the current request has not answered
+within ``hedge_after`` seconds, the next provider is asked in parallel and
+the first valid price wins; a failed request moves on to the next provider
+at once. Each provider has a circuit breaker, so a provider that keeps
+failing is skipped until its reset timeout passes and one trial request
+succeeds; only transport errors, timeouts, 5xx and 429 answers count as
+failures. When no provider returns a price, ``PriceUnavailableError`` is
+raised: the caller keeps the last stored price as stale rather than
+recording a made-up one.
+"""
+
 from __future__ import annotations
 
+import asyncio
 import logging
-import random
+import time
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
 from typing import Any
 
 import aiohttp
 
+from app.core.metrics import registry
+from app.usecases.errors import PriceUnavailableError
+
 logger = logging.getLogger(__name__)
 
+COINBASE_PROVIDER = "coinbase|https://api.coinbase.com/v2/prices/{symbol}/spot|data.amount"
+
+price_provider_requests_total = registry.counter(
+    "price_provider_requests_total",
+    "Price provider requests by outcome (ok, error, miss, cancelled, circuit_open).",
+    ("provider", "outcome"),
+)
+price_provider_request_seconds = registry.histogram(
+    "price_provider_request_seconds",
+    "Price provider request latency, including failures.",
+    ("provider",),
+)
+price_provider_circuit_open = registry.gauge(
+    "price_provider_circuit_open", "1 while a provider's circuit breaker is open.", ("provider",)
+)
+price_fetch_hedges_total = registry.counter(
+    "price_fetch_hedges_total", "Hedged requests started after the latency budget ran out."
+)
+price_fetch_unavailable_total = registry.counter(
+    "price_fetch_unavailable_total", "Fetches where no provider returned a price."
+)
+
+
+@dataclass(frozen=True)
+class PriceProvider:
+    """One price API: a URL template and the JSON path of the price in its response.
+
+    The template may use ``{symbol}`` (``BTC-USD``), ``{base}`` (``BTC``) and
+    ``{quote}`` (``USD``). Path segments are dict keys, list indexes, or ``*``
+    for the first value of a dict (for responses keyed by a pair name).
+    """
+
+    name: str
+    url_template: str
+    price_path: tuple[str, ...]
+
+    def url(self, symbol: str) -> str:
+        base, _, quote = symbol.partition("-")
+        return self.url_template.format(symbol=symbol, base=base, quote=quote)
+
+    def parse(self, payload: Any) -> float:
+        value = payload
+        for segment in self.price_path:
+            if isinstance(value, list):
+                value = value[int(segment)]
+            elif segment == "*":
+                value = next(iter(value.values()))
+            else:
+                value = value[segment]
+        price = float(value)
+        if not price > 0:
+            raise ValueError("price must be positive")
+        return price
+
+
+def parse_providers(raw: str) -> list[PriceProvider]:
+    """Parse ``name|url_template|json.path`` entries separated by ``;``."""
+    providers = []
+    for entry in raw.split(";"):
+        if not entry.strip():
+            continue
+        parts = [part.strip() for part in entry.split("|")]
+        if len(parts) != 3 or not all(parts):
+            raise ValueError(f"invalid price provider {entry!r}; expected name|url|path")
+        name, url_template, path = parts
+        providers.append(PriceProvider(name, url_template, tuple(path.split("."))))
+    if len({provider.name for provider in providers}) != len(providers):
+        raise ValueError("price provider names must be unique")
+    return providers
+
+
+def is_provider_failure(exc: BaseException) -> bool:
+    """Whether ``exc`` means the provider is unhealthy rather than missing one symbol.
 
-class ApiPriceFetcher:
-    def __init__(self, api_url_template: str, session: aiohttp.ClientSession) -> None:
-        self._api_url_template = api_url_template
+    Connection errors, timeouts, 5xx and 429 count against the circuit
+    breaker. Other 4xx answers and unparseable payloads only concern the
+    requested symbol (e.g. a pair the provider does not list).
+    """
+    if isinstance(exc, aiohttp.ClientResponseError):
+        return exc.status >= 500 or exc.status == 429
+    return isinstance(exc, (aiohttp.ClientError, asyncio.TimeoutError))
+
+
+class CircuitBreaker:
+    """Opens after ``failure_threshold`` consecutive failures.
+
+    While open, ``allow`` refuses requests; once ``reset_timeout`` has passed
+    it lets a single trial request through and re-arms the timer. A success
+    closes the breaker, a failure keeps it open.
+    """
+
+    def __init__(
+        self,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._failure_threshold = failure_threshold
+        self._reset_timeout = reset_timeout
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def is_open(self) -> bool:
+        return self._opened_at is not None
+
+    def allow(self) -> bool:
+        if self._opened_at is None:
+            return True
+        now = self._clock()
+        if now - self._opened_at < self._reset_timeout:
+            return False
+        self._opened_at = now
+        return True
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self._opened_at is not None or self._failures >= self._failure_threshold:
+            self._opened_at = self._clock()
+
+
+class ChainedPriceFetcher:
+    def __init__(
+        self,
+        providers: Sequence[PriceProvider],
+        session: aiohttp.ClientSession,
+        timeout: float = 5.0,
+        hedge_after: float = 1.0,
+        failure_threshold: int = 5,
+        reset_timeout: float = 30.0,
+    ) -> None:
+        if not providers:
+            raise ValueError("at least one price provider is required")
+        self._providers = list(providers)
         self._session = session
+        self._timeout = aiohttp.ClientTimeout(total=timeout)
+        self._hedge_after = hedge_after
+        self._breakers = {
+            provider.name: CircuitBreaker(failure_threshold, reset_timeout)
+            for provider in self._providers
+        }
 
     async def fetch(self, symbol: str, last_price: float | None) -> float:
-        url = self._api_url_template.format(symbol=symbol)
+        remaining = iter(self._providers)
+        pending: set[asyncio.Task[float]] = set()
+
+        def start_next() -> bool:
+            for provider in remaining:
+                if self._breakers[provider.name].allow():
+                    pending.add(asyncio.create_task(self._request(provider, symbol)))
+                    return True
+                price_provider_requests_total.inc(provider=provider.name, outcome="circuit_open")
+            return False
+
+        start_next()
+        try:
+            while pending:
+                done, _ = await asyncio.wait(
+                    pending, timeout=self._hedge_after, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    if start_next():
+                        price_fetch_hedges_total.inc()
+                    continue
+                for task in done:
+                    pending.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    start_next()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        price_fetch_unavailable_total.inc()
+        raise PriceUnavailableError(f"no price provider answered for {symbol}")
+
+    async def _request(self, provider: PriceProvider, symbol: str) -> float:
+        breaker = self._breakers[provider.name]
+        started = time.perf_counter()
         try:
-            async with self._session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+            async with self._session.get(provider.url(symbol), timeout=self._timeout) as resp:
                 resp.raise_for_status()
-                payload: dict[str, Any] = await resp.json()
-            price = self._parse_price(payload)
-            if price <= 0:
-                raise ValueError("price must be positive")
+                payload = await resp.json(content_type=None)
+            price = provider.parse(payload)
+        except asyncio.CancelledError:
+            price_provider_requests_total.inc(provider=provider.name, outcome="cancelled")
+            raise
+        except Exception as exc:
+            failed = is_provider_failure(exc)
+            if failed:
+                breaker.record_failure()
+            price_provider_requests_total.inc(
+                provider=provider.name, outcome="error" if failed else "miss"
+            )
+            logger.warning(
+                "Price provider failed provider=%s symbol=%s error=%r", provider.name, symbol, exc
+            )
+            raise
+        else:
+            breaker.record_success()
+            price_provider_requests_total.inc(provider=provider.name, outcome="ok")
             return price
-        except Exception:
-            logger.warning("Falling back to mock price symbol=%s", symbol, exc_info=True)
-            return self._mock_price(last_price)
-
-    @staticmethod
-    def _parse_price(payload: dict[str, Any]) -> float:
-        data = payload.get("data", {})
-        amount = data.get("amount")
-        if amount is None:
-            raise ValueError("missing amount in response")
-        return float(amount)
-
-    @staticmethod
-    def _mock_price(last_price: float | None) -> float:
-        base = last_price if last_price and last_price > 0 else 100.0
-        delta = random.uniform(-0.005, 0.005)
-        return round(base * (1 + delta), 4)
+        finally:
+            price_provider_request_seconds.observe(
+                time.perf_counter() - started, provider=provider.name
+            )
+            price_provider_circuit_open.set(int(breaker.is_open), provider=provider.name)
@@ -0,0 +1,27 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+
+from app.core.logging import setup_logging
+from app.db.session import UnitOfWork
+from app.repositories.sqlalchemy import SqlAlchemyReferralRepository
+
+logger = logging.getLogger(__name__)
+
+
+async def reconcile(uow_factory: type[UnitOfWork] = UnitOfWork) -> int:
+    async with uow_factory() as uow:
+        repo = SqlAlchemyReferralRepository(uow.session)
+        changed = await repo.reconcile_referrer_stats()
+    logger.info("Referrer stats reconciled changed_rows=%s", changed)
+    return changed
+
+
+def main() -> None:
+    setup_logging()
+    asyncio.run(reconcile())
+
+
+if __name__ == "__main__":
+    main()
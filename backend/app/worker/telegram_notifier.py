@@ -4,18 +4,30 @@ import logging
 
 from aiogram import Bot
 
+from app.notifications.rate_limiter import SendScheduler, bulk_sends, install_rate_limiter
+
 logger = logging.getLogger(__name__)
 
 
 class AiogramTelegramNotifier:
-    def __init__(self, token: str, chat_id: str) -> None:
+    def __init__(
+        self, token: str, chat_id: str | None = None, scheduler: SendScheduler | None = None
+    ) -> None:
         self._bot = Bot(token=token)
+        if scheduler is not None:
+            install_rate_limiter(self._bot, scheduler)
         self._chat_id = chat_id
 
-    async def send_message(self, text: str) -> None:
-        await self._bot.send_message(chat_id=self._chat_id, text=text)
+    async def send_message(self, text: str, chat_id: int | str | None = None) -> None:
+        target = chat_id if chat_id is not None else self._chat_id
+        if target is None:
+            logger.info("No alert chat configured; message=%s", text)
+            return
+        # Alerts are bulk traffic: they queue behind interactive replies.
+        with bulk_sends():
+            await self._bot.send_message(chat_id=target, text=text)
 
 
 class NullTelegramNotifier:
-    async def send_message(self, text: str) -> None:
-        logger.info("Telegram notifier disabled; message=%s", text)
+    async def send_message(self, text: str, chat_id: int | str | None = None) -> None:
+        logger.info("Telegram notifier disabled; chat_id=%s message=%s", chat_id, text)
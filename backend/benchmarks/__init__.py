@@ -0,0 +1 @@
+"""Load and throughput benchmarks; see ``python -m benchmarks.api_load --help``."""
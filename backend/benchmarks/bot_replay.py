@@ -0,0 +1,259 @@
+"""Replay Telegram updates through the bot dispatcher to measure throughput.
+
+Updates (recorded ``getUpdates`` results, one JSON object per line, or a
+synthetic referral-campaign mix) are fed to the same ``Dispatcher`` that
+``bot.main`` runs. A fake Bot API session captures outgoing calls instead of
+talking to Telegram, optionally sleeping to simulate API round trips.
+
+Run from ``backend/`` with the repository root on the path::
+
+    PYTHONPATH=.. python -m benchmarks.bot_replay --synthetic 5000 \\
+        --database-url sqlite+aiosqlite:///replay.db
+    PYTHONPATH=.. python -m benchmarks.bot_replay --updates recorded.jsonl --out replay.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import time
+from collections import Counter
+from collections.abc import AsyncGenerator, Iterable, Iterator
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import EditMessageText, SendMessage, TelegramMethod
+from aiogram.types import Chat, Message, Update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.cache.memory import read_cache
+from app.db.models import Base
+from app.db.pool import engine_options
+from app.db.session import UnitOfWork
+from benchmarks.report import LatencyRecorder, build_report, write_report
+from bot.main import build_bot, build_dispatcher
+from bot.services import BotService
+
+REPLAY_BOT_TOKEN = "42:replay"
+# Synthetic users start here so they never collide with referrer ids.
+SYNTHETIC_USER_BASE = 5_000_000_000
+SYNTHETIC_MIX = {"start_ref": 8, "start": 1, "my_status": 1, "ref_summary": 1}
+
+
+class CapturingSession(BaseSession):
+    """Bot API session that records calls and answers them locally."""
+
+    def __init__(
+        self, api_latency_seconds: float = 0.0, files: dict[str, bytes] | None = None
+    ) -> None:
+        super().__init__()
+        self.api_latency_seconds = api_latency_seconds
+        # File downloads are served from here, keyed by the Bot API file URL.
+        self.files = files if files is not None else {}
+        self.calls: list[TelegramMethod[Any]] = []
+        self._message_ids = itertools.count(1)
+
+    @property
+    def sent_messages(self) -> list[SendMessage]:
+        return [call for call in self.calls if isinstance(call, SendMessage)]
+
+    async def make_request(self, bot: Bot, method: TelegramMethod[Any], timeout: int | None = None):
+        self.calls.append(method)
+        if self.api_latency_seconds:
+            await asyncio.sleep(self.api_latency_seconds)
+        if isinstance(method, (SendMessage, EditMessageText)):
+            chat_id = method.chat_id if isinstance(method.chat_id, int) else 0
+            return Message(
+                message_id=next(self._message_ids),
+                date=datetime.now(timezone.utc),
+                chat=Chat(id=chat_id, type="private"),
+                text=method.text,
+            )
+        return True
+
+    async def close(self) -> None:
+        return None
+
+    async def stream_content(
+        self,
+        url: str,
+        headers: dict[str, Any] | None = None,
+        timeout: int = 30,
+        chunk_size: int = 65536,
+        raise_for_status: bool = True,
+    ) -> AsyncGenerator[bytes, None]:
+        if self.api_latency_seconds:
+            await asyncio.sleep(self.api_latency_seconds)
+        content = self.files.get(url)
+        if content is None:
+            if raise_for_status:
+                raise FileNotFoundError(url)
+            return
+        for start in range(0, len(content), chunk_size):
+            yield content[start : start + chunk_size]
+
+
+def _message_update(update_id: int, user_id: int, text: str) -> dict[str, Any]:
+    user = {"id": user_id, "is_bot": False, "first_name": f"user{user_id}"}
+    return {
+        "update_id": update_id,
+        "message": {
+            "message_id": update_id,
+            "date": int(time.time()),
+            "chat": {"id": user_id, "type": "private"},
+            "from": user,
+            "text": text,
+        },
+    }
+
+
+def synthetic_updates(
+    count: int, referrers: int = 100, seed: int = 1, mix: dict[str, int] | None = None
+) -> Iterator[dict[str, Any]]:
+    """A referral campaign: mostly new users arriving via ``/start ref_<id>``."""
+    rng = random.Random(seed)
+    mix = mix or SYNTHETIC_MIX
+    kinds = list(mix)
+    joined: list[int] = []
+    for update_id in range(1, count + 1):
+        kind = rng.choices(kinds, weights=[mix[name] for name in kinds])[0]
+        if kind == "start_ref" or not joined:
+            user_id = SYNTHETIC_USER_BASE + update_id
+            joined.append(user_id)
+            yield _message_update(update_id, user_id, f"/start ref_{rng.randint(1, referrers)}")
+        elif kind == "start":
+            yield _message_update(update_id, rng.choice(joined), "/start")
+        elif kind == "my_status":
+            yield _message_update(update_id, rng.choice(joined), "/my_status")
+        else:
+            yield _message_update(update_id, rng.randint(1, referrers), "/ref_summary")
+
+
+def load_updates(path: Path) -> list[dict[str, Any]]:
+    with path.open(encoding="utf-8") as handle:
+        return [json.loads(line) for line in handle if line.strip()]
+
+
+def command_of(update: Update) -> str:
+    """Label used for per-command latency, e.g. ``/start ref``."""
+    if update.callback_query is not None:
+        return "callback:" + (update.callback_query.data or "").split(":", 1)[0]
+    message = update.message
+    if message is None or not message.text:
+        return update.event_type
+    parts = message.text.split(maxsplit=1)
+    command = parts[0].split("@", 1)[0]
+    if command == "/start" and len(parts) > 1:
+        return "/start ref"
+    return command
+
+
+async def replay(
+    dispatcher: Dispatcher,
+    bot: Bot,
+    updates: Iterable[dict[str, Any]],
+    concurrency: int = 16,
+) -> dict[str, Any]:
+    """Feed ``updates`` with ``concurrency`` in flight; returns the latency summary."""
+    parsed = [Update.model_validate(data, context={"bot": bot}) for data in updates]
+    recorder = LatencyRecorder()
+    pending = iter(parsed)
+
+    async def worker() -> None:
+        for update in pending:
+            started = time.perf_counter()
+            ok = True
+            try:
+                await dispatcher.feed_update(bot, update)
+            except Exception:
+                ok = False
+            recorder.record(command_of(update), time.perf_counter() - started, ok)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return recorder.summary(time.perf_counter() - started)
+
+
+async def run_replay(
+    updates: list[dict[str, Any]],
+    database_url: str,
+    concurrency: int,
+    api_latency_seconds: float,
+    cache: bool,
+) -> dict[str, Any]:
+    engine = create_async_engine(database_url, **engine_options(database_url))
+    try:
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        def uow_factory(**kwargs: Any) -> UnitOfWork:
+            return UnitOfWork(session_factory, **kwargs)
+
+        service = BotService(
+            uow_factory=uow_factory, cache=read_cache if cache else None, router=None
+        )
+        session = CapturingSession(api_latency_seconds)
+        bot = build_bot(REPLAY_BOT_TOKEN, session=session)
+        results = await replay(build_dispatcher(service), bot, updates, concurrency)
+    finally:
+        await engine.dispose()
+    results["updates_per_second"] = results["total"]["throughput_rps"]
+    results["bot_api_calls"] = dict(Counter(type(call).__name__ for call in session.calls))
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay updates through the bot dispatcher.")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--updates", type=Path, help="JSONL file of Telegram Update objects")
+    source.add_argument("--synthetic", type=int, help="generate this many campaign updates")
+    parser.add_argument("--referrers", type=int, default=100)
+    parser.add_argument("--write-updates", type=Path, help="save the replayed updates as JSONL")
+    parser.add_argument("--database-url", default="sqlite+aiosqlite:///replay.db")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--api-latency-ms", type=float, default=0.0)
+    parser.add_argument("--no-cache", action="store_true")
+    parser.add_argument("--log-level", default="WARNING")
+    parser.add_argument("--out", type=Path, help="report path (default: stdout)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper())
+    logging.getLogger().setLevel(args.log_level.upper())
+    if args.updates:
+        updates = load_updates(args.updates)
+    else:
+        updates = list(synthetic_updates(args.synthetic, args.referrers))
+    if args.write_updates:
+        args.write_updates.write_text(
+            "".join(json.dumps(update) + "\n" for update in updates), encoding="utf-8"
+        )
+    results = asyncio.run(
+        run_replay(
+            updates,
+            args.database_url,
+            args.concurrency,
+            args.api_latency_ms / 1000,
+            cache=not args.no_cache,
+        )
+    )
+    parameters = {
+        "updates": len(updates),
+        "source": str(args.updates) if args.updates else "synthetic",
+        "concurrency": args.concurrency,
+        "api_latency_ms": args.api_latency_ms,
+        "cache": not args.no_cache,
+        "dialect": args.database_url.split(":", 1)[0],
+    }
+    write_report(build_report("bot_replay", parameters, results), args.out)
+
+
+if __name__ == "__main__":
+    main()
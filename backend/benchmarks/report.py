@@ -0,0 +1,129 @@
+"""Latency aggregation and JSON benchmark reports.
+
+``python -m benchmarks.report BASELINE.json CURRENT.json`` prints the
+throughput and percentile deltas between two runs.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import math
+import subprocess
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+PERCENTILES = (50, 90, 99)
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list; 0.0 when empty."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, math.ceil(q / 100 * len(sorted_values)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass
+class LatencyRecorder:
+    """Per-operation latency samples (seconds) and error counts."""
+
+    samples: dict[str, list[float]] = field(default_factory=dict)
+    errors: dict[str, int] = field(default_factory=dict)
+
+    def record(self, operation: str, seconds: float, ok: bool = True) -> None:
+        self.samples.setdefault(operation, []).append(seconds)
+        if not ok:
+            self.errors[operation] = self.errors.get(operation, 0) + 1
+
+    def summary(self, elapsed_seconds: float) -> dict[str, Any]:
+        operations = {
+            name: summarize(values, self.errors.get(name, 0), elapsed_seconds)
+            for name, values in sorted(self.samples.items())
+        }
+        everything = [value for values in self.samples.values() for value in values]
+        return {
+            "elapsed_seconds": round(elapsed_seconds, 3),
+            "total": summarize(everything, sum(self.errors.values()), elapsed_seconds),
+            "operations": operations,
+        }
+
+
+def summarize(values: Iterable[float], errors: int, elapsed_seconds: float) -> dict[str, Any]:
+    ordered = sorted(values)
+    count = len(ordered)
+    summary: dict[str, Any] = {
+        "count": count,
+        "errors": errors,
+        "throughput_rps": round(count / elapsed_seconds, 2) if elapsed_seconds else 0.0,
+        "mean_ms": round(sum(ordered) / count * 1000, 3) if count else 0.0,
+    }
+    for q in PERCENTILES:
+        summary[f"p{q}_ms"] = round(percentile(ordered, q) * 1000, 3)
+    summary["max_ms"] = round(ordered[-1] * 1000, 3) if count else 0.0
+    return summary
+
+
+def _git_commit() -> str | None:
+    try:
+        result = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+            timeout=5,
+        )
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() or None
+
+
+def build_report(name: str, parameters: dict[str, Any], results: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "benchmark": name,
+        "commit": _git_commit(),
+        "started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "parameters": parameters,
+        "results": results,
+    }
+
+
+def write_report(report: dict[str, Any], path: Path | None) -> None:
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if path is None:
+        print(text)
+        return
+    path.write_text(text + "\n", encoding="utf-8")
+
+
+def compare(baseline: dict[str, Any], current: dict[str, Any]) -> list[str]:
+    """Human-readable per-operation deltas; positive latency deltas are regressions."""
+    lines = [f"{'operation':<12} {'metric':<15} {'baseline':>10} {'current':>10} {'change':>8}"]
+    base_ops = {"total": baseline["results"]["total"], **baseline["results"]["operations"]}
+    curr_ops = {"total": current["results"]["total"], **current["results"]["operations"]}
+    for operation in sorted(set(base_ops) & set(curr_ops)):
+        for metric in ("throughput_rps", "p50_ms", "p99_ms"):
+            before = base_ops[operation][metric]
+            after = curr_ops[operation][metric]
+            change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+            lines.append(
+                f"{operation:<12} {metric:<15} {before:>10.2f} {after:>10.2f} {change:>8}"
+            )
+    return lines
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Compare two benchmark reports.")
+    parser.add_argument("baseline", type=Path)
+    parser.add_argument("current", type=Path)
+    args = parser.parse_args()
+    baseline = json.loads(args.baseline.read_text(encoding="utf-8"))
+    current = json.loads(args.current.read_text(encoding="utf-8"))
+    print("\n".join(compare(baseline, current)))
+
+
+if __name__ == "__main__":
+    main()
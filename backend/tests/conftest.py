@@ -3,5 +3,17 @@ from __future__ import annotations
 import sys
 from pathlib import Path
 
+import pytest
+
 ROOT = Path(__file__).resolve().parents[1]
 sys.path.insert(0, str(ROOT))
+# Repository root, so bot services can be exercised alongside the API.
+sys.path.insert(1, str(ROOT.parent))
+
+from app.db.instrumentation import assert_max_queries  # noqa: E402
+
+
+@pytest.fixture
+def max_queries():
+    """``with max_queries(n):`` fails the test if the block runs more than n statements."""
+    return assert_max_queries
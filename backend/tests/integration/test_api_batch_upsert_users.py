@@ -0,0 +1,47 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routes import upsert_user, upsert_users_batch
+from app.db.models import Base
+from app.db.session import UnitOfWork
+from app.repositories import sqlalchemy as sqlalchemy_repositories
+from app.schemas import UsersBatchUpsertRequest, UserUpsertRequest
+
+
+@pytest.mark.asyncio
+async def test_batch_upsert_returns_record_per_unique_id(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(sqlalchemy_repositories, "UPSERT_CHUNK_SIZE", 3)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    def build_uow() -> UnitOfWork:
+        return UnitOfWork(session_factory)
+
+    existing = await upsert_user(UserUpsertRequest(telegram_id=4), build_uow())
+    payload = UsersBatchUpsertRequest(telegram_ids=[1, 2, 3, 4, 5, 2, 6, 7])
+    response = await upsert_users_batch(payload, build_uow())
+
+    assert [user.telegram_id for user in response.users] == [1, 2, 3, 4, 5, 6, 7]
+    assert [user.created for user in response.users] == [
+        True, True, True, False, True, True, True
+    ]
+    assert response.users[3].id == existing.id
+    assert len({user.id for user in response.users}) == 7
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_batch_upsert_rejects_non_positive_ids() -> None:
+    payload = UsersBatchUpsertRequest(telegram_ids=[1, 0])
+    with pytest.raises(HTTPException) as exc_info:
+        await upsert_users_batch(payload, UnitOfWork())
+    assert exc_info.value.status_code == 400
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api import routes
+from app.api.deps import get_uow_factory
+from app.db.models import Base
+from app.db.session import UnitOfWork
+from app.main import app
+from app.repositories.sqlalchemy import SqlAlchemyReferralRepository
+
+
+@pytest.mark.asyncio
+async def test_bulk_referrals_stream_per_row_results(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(routes, "BULK_REFERRALS_BATCH_SIZE", 3)
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'bulk.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    written: set[int] = set()
+
+    class RecordingRouter:
+        def mark_written(self, telegram_ids) -> None:
+            written.update(telegram_ids)
+
+    app.dependency_overrides[get_uow_factory] = lambda: lambda: UnitOfWork(
+        session_factory, router=RecordingRouter()
+    )
+
+    lines = [
+        {"referrer_telegram_id": 1, "referred_telegram_id": 2},
+        {"referrer_telegram_id": 1, "referred_telegram_id": 2},
+        {"referrer_telegram_id": 3, "referred_telegram_id": 2},
+        {"referrer_telegram_id": 4, "referred_telegram_id": 4},
+        {"referrer_telegram_id": "x"},
+        {"referrer_telegram_id": 3, "referred_telegram_id": 2},
+        {"referrer_telegram_id": 1, "referred_telegram_id": 5},
+    ]
+
+    async def body():
+        for line in lines:
+            yield (json.dumps(line) + "\n").encode()
+        yield b"\n{not json"
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.post("/referrals:bulk", content=body())
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    # Committed batches make their users sticky to the primary.
+    assert written == {1, 2, 3, 4, 5}
+    results = [json.loads(line) for line in response.text.splitlines()]
+    assert [result["line"] for result in results] == [1, 2, 3, 4, 5, 6, 7, 9]
+    assert [result["status"] for result in results] == [
+        "created",
+        "duplicate",
+        "conflict",
+        "invalid",
+        "invalid",
+        "conflict",
+        "created",
+        "invalid",
+    ]
+    assert results[0]["referral_id"] == results[1]["referral_id"]
+
+
+@pytest.mark.asyncio
+async def test_bulk_register_resolves_referrals_committed_after_its_snapshot(
+    tmp_path: Path,
+) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'race.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with session_factory() as session:
+        late = await SqlAlchemyReferralRepository(session).create(7, 20)
+        await session.commit()
+
+    class SnapshotMissRepository(SqlAlchemyReferralRepository):
+        """Neither inserts nor finds referred id 20, as if it committed mid-statement."""
+
+        async def _register_chunked(self, pairs):
+            rows = await super()._register_chunked(pairs)
+            return [row for row in rows if row.referred_telegram_id != 20]
+
+    async with session_factory() as session:
+        owners = await SnapshotMissRepository(session).register_many([(1, 10), (1, 20), (7, 30)])
+    await engine.dispose()
+
+    assert owners[20] == (late, False)
+    assert owners[10][1] is True and owners[30][1] is True
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.deps import get_read_cache, get_read_uow, get_uow
+from app.db.models import Base
+from app.db.session import UnitOfWork
+from app.main import app, http_request_db_queries, http_requests_total
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_latency_and_queries(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'metrics.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    app.dependency_overrides[get_uow] = lambda: UnitOfWork(session_factory)
+    app.dependency_overrides[get_read_uow] = lambda: UnitOfWork(session_factory, read_only=True)
+    app.dependency_overrides[get_read_cache] = lambda: None
+    route = "/users/{telegram_id}/status"
+    before_ok = http_requests_total.value(method="GET", route=route, status=200)
+    before_missing = http_requests_total.value(method="GET", route=route, status=404)
+    before_queries = http_request_db_queries.count(route=route)
+
+    try:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            await client.post("/users/upsert", json={"telegram_id": 5})
+            assert (await client.get("/users/5/status")).status_code == 200
+            assert (await client.get("/users/6/status")).status_code == 404
+            response = await client.get("/metrics")
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert http_requests_total.value(method="GET", route=route, status=200) == before_ok + 1
+    assert http_requests_total.value(method="GET", route=route, status=404) == before_missing + 1
+    assert http_request_db_queries.count(route=route) == before_queries + 2
+    assert (
+        'http_request_duration_seconds_bucket{method="GET",'
+        'route="/users/{telegram_id}/status",status="200",le="+Inf"}'
+    ) in body
+    assert "# TYPE http_requests_in_flight gauge" in body
+    assert 'db_queries_total{dialect="sqlite"}' in body
+    assert 'db_pool_connections{pool="primary",state="idle"}' in body
@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.deps import get_read_uow
+from app.db.models import Base, PriceSample
+from app.db.session import UnitOfWork
+from app.main import app
+from app.repositories.interfaces import PriceSampleRecord
+from app.repositories.sqlalchemy import SqlAlchemyPriceSampleRepository
+
+DAY = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+@pytest.mark.asyncio
+async def test_price_history_buckets_raw_samples_and_rollups(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'prices.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    app.dependency_overrides[get_read_uow] = lambda: UnitOfWork(session_factory, read_only=True)
+
+    # Two raw samples per 10s over the first minute of the day: 100, 101, ... 111.
+    async with session_factory() as session:
+        session.add_all(
+            PriceSample(
+                symbol="BTC-USD",
+                price=100.0 + index,
+                created_at=DAY + timedelta(seconds=5 * index),
+            )
+            for index in range(12)
+        )
+        await session.commit()
+    # Rollups only: two hours' worth written through the repository.
+    async with session_factory() as session:
+        repo = SqlAlchemyPriceSampleRepository(session)
+        await repo._roll_up(
+            [
+                _record(1, "ETH-USD", 10.0, DAY + timedelta(minutes=1)),
+                _record(2, "ETH-USD", 12.0, DAY + timedelta(minutes=30)),
+                _record(3, "ETH-USD", 9.0, DAY + timedelta(minutes=59)),
+                _record(4, "ETH-USD", 11.0, DAY + timedelta(hours=1, minutes=10)),
+            ]
+        )
+        await session.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            raw = await client.get(
+                "/prices/BTC-USD",
+                params={
+                    "from": "2024-05-01T00:00:03Z",
+                    "to": "2024-05-01T00:01:00Z",
+                    "resolution": "30s",
+                },
+            )
+            hourly = await client.get(
+                "/prices/ETH-USD",
+                params={"from": DAY.isoformat(), "to": (DAY + timedelta(hours=3)).isoformat()},
+            )
+            too_many = await client.get(
+                "/prices/ETH-USD",
+                params={"from": DAY.isoformat(), "resolution": "10s"},
+            )
+            backwards = await client.get(
+                "/prices/ETH-USD",
+                params={"from": DAY.isoformat(), "to": (DAY - timedelta(hours=1)).isoformat()},
+            )
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+    assert raw.status_code == 200
+    body = raw.json()
+    assert body["from"] == "2024-05-01T00:00:00+00:00"
+    assert [(p["open"], p["high"], p["low"], p["close"], p["count"]) for p in body["points"]] == [
+        (100.0, 105.0, 100.0, 105.0, 6),
+        (106.0, 111.0, 106.0, 111.0, 6),
+    ]
+
+    assert hourly.status_code == 200
+    body = hourly.json()
+    assert body["resolution"] == "1m"
+    assert len(body["points"]) == 4
+    assert sum(point["count"] for point in body["points"]) == 4
+
+    assert too_many.status_code == 400
+    assert backwards.status_code == 400
+
+
+def _record(row_id: int, symbol: str, price: float, created_at: datetime):
+    return PriceSampleRecord(row_id, symbol, price, created_at)
@@ -0,0 +1,64 @@
+from __future__ import annotations
+
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy import update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routes import get_referral_summary, list_referrals
+from app.db.models import Base, Referral
+from app.db.session import UnitOfWork
+from app.repositories.sqlalchemy import SqlAlchemyReferralRepository
+
+
+@pytest.mark.asyncio
+async def test_list_referrals_pages_through_ties(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pages.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    def build_uow() -> UnitOfWork:
+        return UnitOfWork(session_factory)
+
+    async with session_factory() as session:
+        # Server-default timestamps land in the same second, so most rows tie.
+        repo = SqlAlchemyReferralRepository(session)
+        await repo.register_many([(1, referred) for referred in range(100, 107)])
+        await repo.create(1, 200)
+        await session.execute(
+            update(Referral)
+            .where(Referral.referred_telegram_id == 200)
+            .values(created_at=datetime(2020, 1, 1, 0, 0, 0, 250000))
+        )
+        await session.commit()
+
+    summary = await get_referral_summary(1, build_uow())
+    assert summary.count == 8
+    assert len(summary.last_5_referrals) == 5
+    assert summary.next_cursor
+
+    seen: list[int] = []
+    after = None
+    while True:
+        page = await list_referrals(1, 3, after, build_uow())
+        seen.extend(item.referred_telegram_id for item in page.referrals)
+        after = page.next_cursor
+        if after is None:
+            break
+    assert seen == [106, 105, 104, 103, 102, 101, 100, 200]
+
+    rest = await list_referrals(1, 10, summary.next_cursor, build_uow())
+    assert [item.referred_telegram_id for item in rest.referrals] == [101, 100, 200]
+    assert rest.next_cursor is None
+
+    with pytest.raises(HTTPException) as exc:
+        await list_referrals(1, 3, "not-a-cursor", build_uow())
+    assert exc.value.status_code == 400
+    with pytest.raises(HTTPException) as exc:
+        await list_referrals(1, 0, None, build_uow())
+    assert exc.value.status_code == 400
+    await engine.dispose()
@@ -3,7 +3,7 @@ from __future__ import annotations
 from pathlib import Path
 
 import pytest
-from fastapi import Response
+from fastapi import HTTPException, Response
 from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
 from app.api.routes import create_referral, get_user_status
@@ -34,3 +34,32 @@ async def test_create_referral_upserts_users(tmp_path: Path) -> None:
     assert referrer_status.telegram_id == 10
     assert referred_status.telegram_id == 20
     await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_create_referral_idempotent_and_conflict(tmp_path: Path) -> None:
+    db_path = tmp_path / "referrals.db"
+    engine = create_async_engine(f"sqlite+aiosqlite:///{db_path}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    def build_uow() -> UnitOfWork:
+        return UnitOfWork(session_factory)
+
+    payload = ReferralCreateRequest(referrer_telegram_id=10, referred_telegram_id=20)
+    created = await create_referral(payload, Response(), build_uow())
+
+    response = Response()
+    repeated = await create_referral(payload, response, build_uow())
+    assert response.status_code == 200
+    assert repeated == created
+
+    conflicting = ReferralCreateRequest(referrer_telegram_id=30, referred_telegram_id=20)
+    with pytest.raises(HTTPException) as exc_info:
+        await create_referral(conflicting, Response(), build_uow())
+    assert exc_info.value.status_code == 409
+    with pytest.raises(HTTPException) as exc_info:
+        await get_user_status(30, build_uow())
+    assert exc_info.value.status_code == 404
+    await engine.dispose()
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Base, Referral
+from app.db.session import UnitOfWork
+from benchmarks.bot_replay import CapturingSession, replay, synthetic_updates
+from bot.main import build_bot, build_dispatcher
+from bot.services import BotService
+
+
+@pytest.mark.asyncio
+async def test_replay_feeds_updates_through_dispatcher(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'replay.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    def uow_factory(**kwargs) -> UnitOfWork:
+        return UnitOfWork(session_factory, **kwargs)
+
+    service = BotService(uow_factory=uow_factory, cache=None, router=None)
+    session = CapturingSession()
+    bot = build_bot("42:replay", session=session)
+    updates = list(synthetic_updates(40, referrers=5))
+    starts = sum(update["message"]["text"].startswith("/start ref_") for update in updates)
+
+    results = await replay(build_dispatcher(service), bot, updates, concurrency=4)
+
+    assert results["total"]["count"] == 40
+    assert results["total"]["errors"] == 0
+    assert results["operations"]["/start ref"]["count"] == starts
+    assert len(session.sent_messages) == 40
+    async with session_factory() as db:
+        assert (await db.execute(select(func.count(Referral.id)))).scalar_one() == starts
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_capturing_session_serves_file_downloads_in_chunks() -> None:
+    url = "https://api.telegram.org/file/bot42:replay/documents/file_0.txt"
+    session = CapturingSession(files={url: b"abcdefg"})
+
+    chunks = [chunk async for chunk in session.stream_content(url, chunk_size=3)]
+    missing = [chunk async for chunk in session.stream_content(url + "x", raise_for_status=False)]
+
+    assert chunks == [b"abc", b"def", b"g"]
+    assert missing == []
+    with pytest.raises(FileNotFoundError):
+        async for _ in session.stream_content(url + "x"):
+            pass
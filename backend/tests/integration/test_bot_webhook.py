@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Base
+from app.db.session import UnitOfWork
+from benchmarks.bot_replay import CapturingSession, synthetic_updates
+from bot.main import build_bot, build_dispatcher
+from bot.services import BotService
+from bot.webhook import SECRET_HEADER, WebhookRunner, build_webhook_router
+
+
+@pytest.mark.asyncio
+async def test_webhook_verifies_secret_and_processes_in_background(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'webhook.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    def uow_factory(**kwargs) -> UnitOfWork:
+        return UnitOfWork(session_factory, **kwargs)
+
+    session = CapturingSession()
+    dispatcher = build_dispatcher(BotService(uow_factory=uow_factory, cache=None, router=None))
+    bot = build_bot("42:webhook", session=session)
+    runner = WebhookRunner(dispatcher, bot)
+    app = FastAPI()
+    app.include_router(build_webhook_router(runner, "s3cret"))
+    full_app = FastAPI()
+    full_app.include_router(
+        build_webhook_router(WebhookRunner(dispatcher, bot, max_pending=0), "s3cret")
+    )
+    update = next(synthetic_updates(1, referrers=3))
+    headers = {SECRET_HEADER: "s3cret"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        denied = await client.post("/bot/webhook", json=update, headers={SECRET_HEADER: "nope"})
+        invalid = await client.post("/bot/webhook", json={"update_id": "x"}, headers=headers)
+        accepted = await client.post("/bot/webhook", json=update, headers=headers)
+        await runner.drain()
+    transport = httpx.ASGITransport(app=full_app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        busy = await client.post("/bot/webhook", json=update, headers=headers)
+
+    assert denied.status_code == 401
+    assert invalid.status_code == 400
+    assert accepted.status_code == 200
+    assert busy.status_code == 503
+    assert busy.headers["Retry-After"] == "1"
+    assert [message.text for message in session.sent_messages] == [
+        "Referral registered successfully. Welcome!"
+    ]
+    await engine.dispose()
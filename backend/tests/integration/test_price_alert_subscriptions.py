@@ -0,0 +1,190 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from pathlib import Path
+
+import httpx
+import pytest
+from sqlalchemy import delete
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.deps import get_read_uow, get_uow
+from app.db.models import Base, PriceAlertSubscription
+from app.db.session import UnitOfWork
+from app.main import app
+from app.repositories.sqlalchemy import SqlAlchemyPriceAlertSubscriptionRepository
+from app.usecases.price_subscriptions import ABOVE, BELOW, PriceSubscriptionAlerts
+from benchmarks.bot_replay import CapturingSession, _message_update, replay
+from bot.main import build_bot, build_dispatcher
+from bot.services import BotService
+
+
+class RecordingNotifier:
+    def __init__(self) -> None:
+        self.messages: list[tuple[int | str | None, str]] = []
+
+    async def send_message(self, text: str, chat_id: int | str | None = None) -> None:
+        self.messages.append((chat_id, text))
+
+
+async def _session_factory(tmp_path: Path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'alerts.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_crossed_subscriptions_fire_once_per_user(tmp_path: Path, max_queries) -> None:
+    engine, session_factory = await _session_factory(tmp_path)
+
+    @asynccontextmanager
+    async def subscriptions():
+        async with UnitOfWork(session_factory) as uow:
+            yield SqlAlchemyPriceAlertSubscriptionRepository(uow.session)
+
+    async with subscriptions() as repo:
+        first = await repo.create(111, "BTC-USD", ABOVE, 70_000.0)
+        second = await repo.create(111, "BTC-USD", ABOVE, 69_000.0)
+        deleted = await repo.create(222, "BTC-USD", ABOVE, 69_500.0)
+        await repo.create(222, "BTC-USD", BELOW, 60_000.0)
+        await repo.create(333, "ETH-USD", BELOW, 3_000.0)
+
+    notifier = RecordingNotifier()
+    # No re-scan window, so the incremental load below is a single page.
+    alerts = PriceSubscriptionAlerts(subscriptions, notifier, load_batch_size=2, rescan_window=0)
+    assert await alerts.evaluate([("BTC-USD", 68_000.0)]) == []
+    assert len(alerts) == 5
+
+    async with subscriptions() as repo:
+        assert await repo.delete(222, deleted.id)
+        late = await repo.create(333, "BTC-USD", ABOVE, 66_000.0)
+
+    # One query for new subscriptions, one UPDATE ... RETURNING for the crossed ones.
+    with max_queries(2):
+        fired = await alerts.evaluate([("BTC-USD", 71_000.0), ("ETH-USD", 3_100.0)])
+    assert sorted(subscription.id for subscription in fired) == [first.id, second.id, late.id]
+    assert sorted(chat_id for chat_id, _ in notifier.messages) == [111, 333]
+    text = dict(notifier.messages)[111]
+    assert text.startswith("Price alert:\n")
+    assert f"BTC-USD is 71,000.00, above your 70,000.00 alert (#{first.id})" in text
+
+    assert await alerts.evaluate([("BTC-USD", 72_000.0)]) == []
+    async with subscriptions() as repo:
+        assert [s.telegram_id for s in await repo.list_active(0, 100)] == [222, 333]
+        assert await repo.list_active_by_user(111) == []
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_subscriptions_committed_late_are_picked_up(tmp_path: Path) -> None:
+    engine, session_factory = await _session_factory(tmp_path)
+
+    @asynccontextmanager
+    async def subscriptions():
+        async with UnitOfWork(session_factory) as uow:
+            yield SqlAlchemyPriceAlertSubscriptionRepository(uow.session)
+
+    async with subscriptions() as repo:
+        first = await repo.create(111, "BTC-USD", ABOVE, 70_000.0)
+        late = await repo.create(222, "BTC-USD", ABOVE, 69_000.0)
+        last = await repo.create(333, "BTC-USD", ABOVE, 71_000.0)
+    # The middle id is not visible yet, as if its transaction were still open.
+    async with UnitOfWork(session_factory) as uow:
+        await uow.session.execute(
+            delete(PriceAlertSubscription).where(PriceAlertSubscription.id == late.id)
+        )
+
+    alerts = PriceSubscriptionAlerts(subscriptions, RecordingNotifier(), rescan_window=10)
+    assert await alerts.evaluate([("BTC-USD", 60_000.0)]) == []
+    assert len(alerts) == 2
+
+    async with UnitOfWork(session_factory) as uow:
+        uow.session.add(
+            PriceAlertSubscription(
+                id=late.id, telegram_id=222, symbol="BTC-USD", direction=ABOVE, threshold=69_000.0
+            )
+        )
+
+    fired = await alerts.evaluate([("BTC-USD", 69_500.0)])
+    assert [subscription.id for subscription in fired] == [late.id]
+    # Already indexed ids inside the window are not added twice.
+    assert len(alerts) == 2
+    fired = await alerts.evaluate([("BTC-USD", 72_000.0)])
+    assert sorted(subscription.id for subscription in fired) == [first.id, last.id]
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_price_alert_api_round_trip(tmp_path: Path) -> None:
+    engine, session_factory = await _session_factory(tmp_path)
+    app.dependency_overrides[get_uow] = lambda: UnitOfWork(session_factory)
+    app.dependency_overrides[get_read_uow] = lambda: UnitOfWork(session_factory, read_only=True)
+    transport = httpx.ASGITransport(app=app)
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            created = await client.post(
+                "/users/111/price-alerts",
+                json={"symbol": "btc-usd", "direction": "above", "threshold": 70000},
+            )
+            assert created.status_code == 201
+            alert = created.json()
+            assert (alert["symbol"], alert["direction"], alert["threshold"]) == (
+                "BTC-USD",
+                "above",
+                70000.0,
+            )
+
+            invalid = await client.post(
+                "/users/111/price-alerts",
+                json={"symbol": "BTC-USD", "direction": "sideways", "threshold": 1},
+            )
+            assert invalid.status_code == 400
+            unwatched = await client.post(
+                "/users/111/price-alerts",
+                json={"symbol": "DOGE-USD", "direction": "above", "threshold": 1},
+            )
+            assert unwatched.status_code == 400
+            assert unwatched.json()["detail"].startswith("DOGE-USD is not watched")
+
+            listed = await client.get("/users/111/price-alerts")
+            assert [item["id"] for item in listed.json()["alerts"]] == [alert["id"]]
+
+            other_user = await client.delete(f"/users/222/price-alerts/{alert['id']}")
+            assert other_user.status_code == 404
+            deleted = await client.delete(f"/users/111/price-alerts/{alert['id']}")
+            assert deleted.status_code == 204
+            assert (await client.get("/users/111/price-alerts")).json()["alerts"] == []
+    finally:
+        app.dependency_overrides.clear()
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_bot_refuses_alerts_on_unwatched_symbols(tmp_path: Path) -> None:
+    engine, session_factory = await _session_factory(tmp_path)
+
+    def uow_factory(**kwargs) -> UnitOfWork:
+        return UnitOfWork(session_factory, **kwargs)
+
+    service = BotService(
+        uow_factory=uow_factory,
+        cache=None,
+        router=None,
+        price_alert_symbols=("BTC-USD", "ETH-USD"),
+    )
+    session = CapturingSession()
+    bot = build_bot("42:alerts", session=session)
+    updates = [
+        _message_update(1, 111, "/alert DOGE-USD > 1"),
+        _message_update(2, 111, "/alert eth-usd < 3000"),
+    ]
+
+    await replay(build_dispatcher(service), bot, updates, concurrency=1)
+
+    refused, created = (message.text for message in session.sent_messages)
+    assert refused == (
+        "Couldn't create the alert: DOGE-USD is not watched; choose one of BTC-USD, ETH-USD."
+    )
+    assert created.startswith("Alert #1 ETH-USD &lt; 3,000.00 created.")
+    await engine.dispose()
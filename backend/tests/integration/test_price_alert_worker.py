@@ -0,0 +1,225 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from functools import partial
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Base
+from app.db.session import UnitOfWork
+from app.notifications.price_events import PriceEventBus
+from app.repositories.interfaces import PriceSampleRecord
+from app.repositories.sqlalchemy import (
+    SqlAlchemyPriceAlertSubscriptionRepository,
+    SqlAlchemyPriceSampleRepository,
+)
+from app.usecases.price_alerts import PriceAlertService
+from app.usecases.price_subscriptions import ABOVE
+from app.worker import main as worker_main
+
+
+class RecordingNotifier:
+    def __init__(self) -> None:
+        self.messages: list[str] = []
+
+    async def send_message(self, text: str) -> None:
+        self.messages.append(text)
+
+
+class SlowFetcher:
+    def __init__(self, prices: dict[str, float]) -> None:
+        self.prices = prices
+        self.running = 0
+        self.peak = 0
+
+    async def fetch(self, symbol: str, last_price: float | None) -> float:
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        await asyncio.sleep(0.01)
+        self.running -= 1
+        if symbol not in self.prices:
+            raise RuntimeError("quote unavailable")
+        return self.prices[symbol]
+
+
+@pytest.mark.asyncio
+async def test_cycle_reads_and_writes_all_symbols_in_bulk(tmp_path: Path, max_queries) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'prices.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def price_samples(*, read_only: bool = False):
+        async with UnitOfWork(session_factory, read_only=read_only) as uow:
+            yield SqlAlchemyPriceSampleRepository(uow.session)
+
+    symbols = [f"SYM{index}-USD" for index in range(30)]
+    fetcher = SlowFetcher({symbol: 100.0 for symbol in symbols})
+    notifier = RecordingNotifier()
+    events = PriceEventBus(buffer_size=8)
+    service = PriceAlertService(
+        price_samples,
+        notifier,
+        fetcher,
+        symbols,
+        threshold=0.01,
+        max_concurrent_fetches=4,
+        events=events,
+    )
+
+    # Warm-up read (recent window, then full history for symbols with nothing
+    # recent), the sample insert and one upsert per rollup table.
+    with max_queries(6):
+        first = await service.run_once()
+    assert len(first) == 30
+    assert fetcher.peak == 4
+    assert notifier.messages == []
+
+    fetcher.prices = {symbol: 100.0 for symbol in symbols[1:]}
+    fetcher.prices["SYM1-USD"] = 110.0
+    fetcher.prices["SYM2-USD"] = 90.0
+    stream = events.subscribe(["SYM1-USD"])
+    # Last prices come from the store; only the writes reach the database.
+    with max_queries(4):
+        second = await service.run_once()
+
+    assert [result.symbol for result in second] == symbols[1:] + ["SYM0-USD"]
+    assert second[-1].stale and second[-1].price == 100.0
+    alerted = {result.symbol for result in second if result.alerted}
+    assert alerted == {"SYM1-USD", "SYM2-USD"}
+    assert notifier.messages == [
+        "Price alert for SYM1-USD: 110.00 (10.00% change)\n"
+        "Price alert for SYM2-USD: 90.00 (10.00% change)"
+    ]
+    price_event = await stream.get(timeout=0)
+    alert_event = await stream.get(timeout=0)
+    assert (price_event.event, price_event.data["price"]) == ("price", 110.0)
+    assert alert_event.event == "alert"
+    assert alert_event.data["last_price"] == 100.0
+    assert await stream.get(timeout=0) is None
+
+    async with price_samples(read_only=True) as repo:
+        latest = await repo.get_latest_many(["SYM0-USD", "SYM1-USD", "UNKNOWN"])
+    assert set(latest) == {"SYM0-USD", "SYM1-USD"}
+    assert latest["SYM1-USD"].price == 110.0
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_write_rereads_last_prices() -> None:
+    class FlakyRepository:
+        def __init__(self) -> None:
+            self.reads: list[list[str]] = []
+            self.fail_next_write = False
+            self.rows: dict[str, PriceSampleRecord] = {}
+
+        async def get_latest_many(self, symbols):
+            self.reads.append(list(symbols))
+            return {symbol: self.rows[symbol] for symbol in symbols if symbol in self.rows}
+
+        async def create_many(self, samples):
+            if self.fail_next_write:
+                self.fail_next_write = False
+                raise ConnectionError("lost connection on commit")
+            created = [
+                PriceSampleRecord(len(self.rows) + 1, symbol, price, datetime.now(timezone.utc))
+                for symbol, price in samples
+            ]
+            self.rows.update((record.symbol, record) for record in created)
+            return created
+
+    repository = FlakyRepository()
+
+    @asynccontextmanager
+    async def price_samples(*, read_only: bool = False):
+        yield repository
+
+    fetcher = SlowFetcher({"BTC-USD": 100.0, "ETH-USD": 10.0})
+    service = PriceAlertService(
+        price_samples, RecordingNotifier(), fetcher, ["BTC-USD", "ETH-USD"]
+    )
+    await service.warm()
+    await service.run_once()
+    await service.run_once()
+    assert repository.reads == [["BTC-USD", "ETH-USD"]]
+
+    repository.fail_next_write = True
+    with pytest.raises(ConnectionError):
+        await service.run_once()
+    await service.run_once()
+    assert repository.reads[-1] == ["BTC-USD", "ETH-USD"]
+    assert len(repository.reads) == 2
+
+
+@pytest.mark.asyncio
+async def test_worker_with_event_relay_still_sends_telegram_alerts(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'worker.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    async with UnitOfWork(session_factory) as uow:
+        await SqlAlchemyPriceAlertSubscriptionRepository(uow.session).create(
+            111, "BTC-USD", ABOVE, 150.0
+        )
+
+    sent: list[tuple[int | str | None, str]] = []
+    published: list[str] = []
+    prices = iter([100.0, 200.0])
+
+    class TelegramNotifier:
+        def __init__(self, token, chat_id=None, scheduler=None) -> None:
+            pass
+
+        async def send_message(self, text: str, chat_id: int | str | None = None) -> None:
+            sent.append((chat_id, text))
+
+    class Publisher:
+        def __init__(self, engine) -> None:
+            pass
+
+        def publish(self, event: str, data: dict) -> None:
+            published.append(event)
+
+        async def run(self) -> None:
+            await asyncio.Event().wait()
+
+    class Fetcher:
+        def __init__(self, providers, session, **kwargs) -> None:
+            pass
+
+        async def fetch(self, symbol: str, last_price: float | None) -> float:
+            return next(prices, 200.0)
+
+    monkeypatch.setenv("TELEGRAM_BOT_TOKEN", "42:worker")
+    monkeypatch.setenv("TELEGRAM_ALERT_CHAT_ID", "@alerts")
+    monkeypatch.setenv("PRICE_ALERT_INTERVAL_SECONDS", "0")
+    monkeypatch.setattr(worker_main, "PRICE_ALERT_SYMBOLS", ("BTC-USD",))
+    monkeypatch.setattr(worker_main, "UnitOfWork", partial(UnitOfWork, session_factory))
+    monkeypatch.setattr(worker_main, "relay_supported", lambda engine: True)
+    monkeypatch.setattr(worker_main, "PriceEventNotifier", Publisher)
+    monkeypatch.setattr(worker_main, "AiogramTelegramNotifier", TelegramNotifier)
+    monkeypatch.setattr(worker_main, "ChainedPriceFetcher", Fetcher)
+
+    worker = asyncio.create_task(worker_main.run_price_worker())
+    try:
+        for _ in range(200):
+            if len(sent) >= 2:
+                break
+            await asyncio.sleep(0.01)
+    finally:
+        worker.cancel()
+        await asyncio.gather(worker, return_exceptions=True)
+        await engine.dispose()
+
+    channel = [text for chat_id, text in sent if chat_id is None]
+    personal = [text for chat_id, text in sent if chat_id == 111]
+    assert channel and "Price alert for BTC-USD: 200.00" in channel[0]
+    assert personal and "BTC-USD is 200.00, above your 150.00 alert" in personal[0]
+    assert "price" in published and "alert" in published
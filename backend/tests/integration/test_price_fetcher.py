@@ -0,0 +1,160 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import aiohttp
+import pytest
+from aiohttp import web
+from aiohttp.test_utils import TestServer
+
+from app.usecases.errors import PriceUnavailableError
+from app.worker.price_fetcher import (
+    ChainedPriceFetcher,
+    CircuitBreaker,
+    PriceProvider,
+    parse_providers,
+)
+
+
+class StubProvider:
+    """Local HTTP price API whose delay and status can be changed per test."""
+
+    def __init__(self, payload: dict, delay: float = 0.0, status: int = 200) -> None:
+        self.payload = payload
+        self.delay = delay
+        self.status = status
+        self.hits: list[str] = []
+        app = web.Application()
+        app.router.add_get("/{symbol}", self._handle)
+        self.server = TestServer(app)
+
+    async def _handle(self, request: web.Request) -> web.Response:
+        self.hits.append(request.match_info["symbol"])
+        await asyncio.sleep(self.delay)
+        if self.status != 200:
+            return web.Response(status=self.status)
+        return web.json_response(self.payload)
+
+    def provider(self, name: str, path: str) -> PriceProvider:
+        url = f"http://{self.server.host}:{self.server.port}/{{base}}{{quote}}"
+        return PriceProvider(name, url, tuple(path.split(".")))
+
+
+def test_parse_providers_and_json_paths() -> None:
+    coinbase, kraken = parse_providers(
+        "coinbase|https://cb.test/{symbol}|data.amount;"
+        " kraken|https://kr.test/?pair={base}{quote}|result.*.c.0"
+    )
+    assert coinbase.url("BTC-USD") == "https://cb.test/BTC-USD"
+    assert kraken.url("BTC-USD") == "https://kr.test/?pair=BTCUSD"
+    assert coinbase.parse({"data": {"amount": "63000.5"}}) == 63000.5
+    assert kraken.parse({"result": {"XXBTZUSD": {"c": ["63001.0", "0.1"]}}}) == 63001.0
+    with pytest.raises(ValueError):
+        coinbase.parse({"data": {"amount": "0"}})
+    with pytest.raises(ValueError):
+        parse_providers("coinbase|https://cb.test/{symbol}")
+
+
+def test_circuit_breaker_allows_one_trial_after_reset_timeout() -> None:
+    now = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: now[0])
+    breaker.record_failure()
+    assert breaker.allow()
+    breaker.record_failure()
+    assert not breaker.allow()
+
+    now[0] = 10.0
+    assert breaker.allow()
+    assert not breaker.allow()
+    breaker.record_failure()
+    now[0] = 15.0
+    assert not breaker.allow()
+    now[0] = 20.0
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.allow() and breaker.allow()
+
+
+@pytest.mark.asyncio
+async def test_slow_primary_is_hedged_by_the_next_provider() -> None:
+    slow = StubProvider({"data": {"amount": "100.0"}}, delay=5)
+    fast = StubProvider({"price": "101.0"})
+    await slow.server.start_server()
+    await fast.server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            fetcher = ChainedPriceFetcher(
+                [slow.provider("slow", "data.amount"), fast.provider("fast", "price")],
+                session,
+                hedge_after=0.05,
+            )
+            started = time.monotonic()
+            assert await fetcher.fetch("BTC-USD", None) == 101.0
+            assert time.monotonic() - started < 1
+        assert slow.hits == ["BTCUSD"]
+        assert fast.hits == ["BTCUSD"]
+    finally:
+        await slow.server.close()
+        await fast.server.close()
+
+
+@pytest.mark.asyncio
+async def test_failing_provider_trips_breaker_and_outage_is_reported_as_unavailable() -> None:
+    broken = StubProvider({}, status=503)
+    backup = StubProvider({"price": "50.0"})
+    await broken.server.start_server()
+    await backup.server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            fetcher = ChainedPriceFetcher(
+                [broken.provider("broken", "price"), backup.provider("backup", "price")],
+                session,
+                hedge_after=1,
+                failure_threshold=2,
+                reset_timeout=60,
+            )
+            for _ in range(3):
+                assert await fetcher.fetch("ETH-USD", 49.0) == 50.0
+            # The breaker opened after two failures; the third fetch skipped it.
+            assert len(broken.hits) == 2
+            assert len(backup.hits) == 3
+
+            backup.status = 500
+            with pytest.raises(PriceUnavailableError):
+                await fetcher.fetch("ETH-USD", 50.0)
+    finally:
+        await broken.server.close()
+        await backup.server.close()
+
+
+@pytest.mark.asyncio
+async def test_unknown_symbols_and_bad_payloads_do_not_trip_the_breaker() -> None:
+    missing = StubProvider({}, status=404)
+    garbled = StubProvider({"price": "n/a"})
+    await missing.server.start_server()
+    await garbled.server.start_server()
+    try:
+        async with aiohttp.ClientSession() as session:
+            fetcher = ChainedPriceFetcher(
+                [missing.provider("missing", "price"), garbled.provider("garbled", "price")],
+                session,
+                hedge_after=1,
+                failure_threshold=1,
+                reset_timeout=60,
+            )
+            for _ in range(3):
+                with pytest.raises(PriceUnavailableError):
+                    await fetcher.fetch("DOGE-USD", None)
+            assert len(missing.hits) == 3
+            assert len(garbled.hits) == 3
+
+            missing.status = 429
+            with pytest.raises(PriceUnavailableError):
+                await fetcher.fetch("DOGE-USD", None)
+            with pytest.raises(PriceUnavailableError):
+                await fetcher.fetch("DOGE-USD", None)
+            assert len(missing.hits) == 4
+    finally:
+        await missing.server.close()
+        await garbled.server.close()
@@ -0,0 +1,97 @@
+from __future__ import annotations
+
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import pytest
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Base, PriceRollup1d, PriceRollup1m, PriceSample
+from app.db.session import UnitOfWork
+from app.repositories.sqlalchemy import SqlAlchemyPriceSampleRepository
+from app.usecases.price_retention import PruneRawPriceSamples
+
+
+@pytest.mark.asyncio
+async def test_rollups_merge_samples_and_retention_prunes_in_batches(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'rollups.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    @asynccontextmanager
+    async def price_samples(*, read_only: bool = False):
+        async with UnitOfWork(session_factory, read_only=read_only) as uow:
+            yield SqlAlchemyPriceSampleRepository(uow.session)
+
+    async with price_samples() as repo:
+        await repo.create_many([("BTC-USD", 100.0), ("BTC-USD", 104.0), ("ETH-USD", 10.0)])
+    async with price_samples() as repo:
+        await repo.create_many([("BTC-USD", 98.0), ("BTC-USD", 101.0)])
+
+    async with session_factory() as session:
+        candles = (
+            await session.execute(select(PriceRollup1d).order_by(PriceRollup1d.symbol))
+        ).scalars().all()
+        minute_samples = await session.scalar(select(func.sum(PriceRollup1m.sample_count)))
+    btc = candles[0]
+    assert btc.symbol == "BTC-USD"
+    assert (btc.open, btc.high, btc.low, btc.close) == (100.0, 104.0, 98.0, 101.0)
+    assert btc.sample_count == 4
+    assert candles[1].sample_count == 1
+    assert minute_samples == 5
+
+    async with session_factory() as session:
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        await session.execute(
+            update(PriceSample)
+            .where(PriceSample.id <= 4)
+            .values(created_at=old)
+        )
+        await session.commit()
+
+    prune = PruneRawPriceSamples(
+        price_samples, timedelta(days=7), batch_size=3, pause_seconds=0
+    )
+    assert await prune.execute() == 4
+    async with session_factory() as session:
+        remaining = (await session.execute(select(PriceSample.id))).scalars().all()
+        rolled_up = await session.scalar(select(func.sum(PriceRollup1d.sample_count)))
+    assert remaining == [5]
+    assert rolled_up == 5
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_latest_sample_falls_back_beyond_lookback(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'latest.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    old = datetime.now(timezone.utc) - timedelta(days=30)
+
+    async with session_factory() as session:
+        session.add_all(
+            [
+                PriceSample(symbol="OLD-USD", price=1.0, created_at=old),
+                PriceSample(symbol="OLD-USD", price=2.0, created_at=old + timedelta(hours=1)),
+                PriceSample(symbol="NEW-USD", price=3.0, created_at=old),
+            ]
+        )
+        await session.commit()
+    async with session_factory() as session:
+        await SqlAlchemyPriceSampleRepository(session).create("NEW-USD", 4.0)
+        await session.commit()
+
+    async with session_factory() as session:
+        repo = SqlAlchemyPriceSampleRepository(session)
+        latest = await repo.get_latest_many(["OLD-USD", "NEW-USD", "NONE-USD"])
+        assert {symbol: sample.price for symbol, sample in latest.items()} == {
+            "OLD-USD": 2.0,
+            "NEW-USD": 4.0,
+        }
+        assert (await repo.get_latest("OLD-USD")).price == 2.0
+        assert await repo.get_latest("NONE-USD") is None
+    await engine.dispose()
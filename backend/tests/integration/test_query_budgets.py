@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import logging
+from pathlib import Path
+
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routes import get_referral_summary, get_user_status
+from app.db.instrumentation import log_query_summary, track_queries
+from app.db.models import Base
+from app.db.session import UnitOfWork
+from app.repositories.sqlalchemy import SqlAlchemyUserRepository
+from bot.services import BotService
+
+
+async def _session_factory(path: Path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_read_and_register_query_budgets(tmp_path: Path, max_queries) -> None:
+    engine, session_factory = await _session_factory(tmp_path / "budget.db")
+
+    def uow_factory(**kwargs) -> UnitOfWork:
+        return UnitOfWork(session_factory, **kwargs)
+
+    service = BotService(uow_factory=uow_factory, cache=None, router=None)
+
+    with max_queries(3):
+        await service.register_user_and_referral(20, 10)
+    with max_queries(1):
+        await service.register_user_and_referral(30, None)
+    with max_queries(3):
+        await get_user_status(20, uow_factory(read_only=True))
+    with max_queries(2):
+        await get_referral_summary(10, uow_factory(read_only=True))
+
+    with pytest.raises(AssertionError, match="at most 1 SQL statements, ran 3"):
+        with max_queries(1):
+            await get_user_status(20, uow_factory(read_only=True))
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_repeated_statements_are_reported_as_n_plus_one(
+    tmp_path: Path, caplog: pytest.LogCaptureFixture
+) -> None:
+    engine, session_factory = await _session_factory(tmp_path / "budget.db")
+    with track_queries() as stats:
+        async with UnitOfWork(session_factory) as uow:
+            users = SqlAlchemyUserRepository(uow.session)
+            for telegram_id in range(1, 7):
+                await users.get_by_telegram_id(telegram_id)
+
+    with caplog.at_level(logging.INFO, logger="app.db.instrumentation"):
+        log_query_summary(stats, "GET /test")
+
+    assert stats.count == 6
+    assert "SQL summary for GET /test: 6 statements" in caplog.text
+    assert "Possible N+1 in GET /test: statement ran 6 times" in caplog.text
+    await engine.dispose()
@@ -0,0 +1,45 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Base, Referral, ReferrerStats
+from app.repositories.sqlalchemy import SqlAlchemyReferralRepository
+
+
+@pytest.mark.asyncio
+async def test_referrer_stats_follow_every_write_path(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'stats.db'}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        repo = SqlAlchemyReferralRepository(session)
+        await repo.create(1, 2)
+        await repo.register(1, 3)
+        await repo.register(1, 3)
+        await repo.register(4, 3)
+        await repo.register_many([(1, 5), (4, 6), (1, 2)])
+        assert await repo.count_by_referrer(1) == 3
+        assert await repo.count_by_referrer(4) == 1
+        assert await repo.count_by_referrer(99) == 0
+
+        await session.execute(delete(Referral).where(Referral.referred_telegram_id == 6))
+        await session.execute(
+            ReferrerStats.__table__.update()
+            .where(ReferrerStats.referrer_telegram_id == 1)
+            .values(referral_count=42)
+        )
+        changed = await repo.reconcile_referrer_stats()
+        assert changed == 2
+        assert await repo.count_by_referrer(1) == 3
+        assert await repo.count_by_referrer(4) == 0
+        stats = (await session.execute(select(ReferrerStats.referrer_telegram_id))).all()
+        assert [row.referrer_telegram_id for row in stats] == [1]
+        assert await repo.reconcile_referrer_stats() == 0
+        await session.commit()
+    await engine.dispose()
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.api.routes import get_user_status, upsert_user
+from app.db.models import Base
+from app.db.replica import ReplicaRouter
+from app.db.session import UnitOfWork
+from app.schemas import UserUpsertRequest
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+async def _session_factory(path: Path):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}", future=True)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    return engine, async_sessionmaker(engine, expire_on_commit=False)
+
+
+@pytest.mark.asyncio
+async def test_reads_route_to_replica_with_stickiness_and_lag_fallback(
+    tmp_path: Path,
+) -> None:
+    # Two files stand in for a primary and a replica that has not caught up.
+    primary_engine, primary = await _session_factory(tmp_path / "primary.db")
+    replica_engine, replica = await _session_factory(tmp_path / "replica.db")
+    clock = FakeClock()
+    lag = {"seconds": 0.0}
+
+    async def probe(session) -> float:
+        return lag["seconds"]
+
+    router = ReplicaRouter(
+        replica,
+        max_lag_seconds=5,
+        lag_check_interval_seconds=1,
+        sticky_seconds=10,
+        lag_probe=probe,
+        clock=clock,
+    )
+
+    def read_uow() -> UnitOfWork:
+        return UnitOfWork(primary, read_only=True, router=router)
+
+    await upsert_user(UserUpsertRequest(telegram_id=7), UnitOfWork(primary, router=router))
+    status = await get_user_status(7, read_uow())
+    assert status.telegram_id == 7
+    assert router.sticky_fallbacks == 1
+
+    clock.now = 11
+    with pytest.raises(HTTPException) as exc:
+        await get_user_status(7, read_uow())
+    assert exc.value.status_code == 404
+    assert router.replica_reads == 1
+
+    lag["seconds"] = 30
+    clock.now = 12
+    status = await get_user_status(7, read_uow())
+    assert status.telegram_id == 7
+    assert router.lag_fallbacks == 1
+
+    await primary_engine.dispose()
+    await replica_engine.dispose()
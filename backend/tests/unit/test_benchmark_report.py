@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+from benchmarks.report import LatencyRecorder, compare, percentile
+
+
+def test_percentiles_and_report_comparison() -> None:
+    values = [float(value) for value in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([], 99) == 0.0
+
+    recorder = LatencyRecorder()
+    for _ in range(9):
+        recorder.record("status", 0.010)
+    recorder.record("status", 0.100, ok=False)
+    summary = recorder.summary(elapsed_seconds=2.0)
+    status = summary["operations"]["status"]
+    assert status["count"] == 10
+    assert status["errors"] == 1
+    assert status["throughput_rps"] == 5.0
+    assert status["p50_ms"] == 10.0
+    assert status["p99_ms"] == 100.0
+
+    baseline = {"results": summary}
+    slower = LatencyRecorder()
+    for _ in range(10):
+        slower.record("status", 0.020)
+    lines = compare(baseline, {"results": slower.summary(elapsed_seconds=2.0)})
+    assert any(
+        line.startswith("status") and "p50_ms" in line and "+100.0%" in line for line in lines
+    )
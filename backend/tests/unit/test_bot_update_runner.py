@@ -0,0 +1,37 @@
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from aiogram.types import User
+
+from bot.runner import UpdateRunner
+
+
+@pytest.mark.asyncio
+async def test_runner_bounds_concurrency_and_orders_each_user() -> None:
+    runner = UpdateRunner(concurrency=2, queue_size=10)
+    running = 0
+    peak = 0
+    order: dict[int, list[int]] = {}
+
+    async def handler(event, data):
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01 if event % 2 else 0.001)
+        order.setdefault(data["event_from_user"].id, []).append(event)
+        running -= 1
+
+    def data(user_id: int) -> dict:
+        return {"event_from_user": User(id=user_id, is_bot=False, first_name="u")}
+
+    updates = [(sequence, sequence % 3) for sequence in range(12)]
+    await asyncio.gather(*(runner(handler, sequence, data(user)) for sequence, user in updates))
+
+    assert peak == 2
+    for user, seen in order.items():
+        assert seen == [sequence for sequence, owner in updates if owner == user]
+    assert runner.stats()["lanes"] == 0
+    assert runner.stats()["queued"] == 0
+    assert runner.capacity == 12
@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core import config
+from app.db.pool import InstrumentedAsyncPool, engine_options, pool_stats, resolve_pool_profile
+
+
+def test_pool_profile_env_overrides(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(config, "DB_POOL_SIZE", "3")
+    monkeypatch.setattr(config, "DB_POOL_PRE_PING", "0")
+    monkeypatch.setattr(config, "DB_STATEMENT_CACHE_SIZE", "0")
+
+    profile = resolve_pool_profile("bot")
+
+    assert profile.pool_size == 3
+    assert profile.max_overflow == 4
+    assert profile.pool_pre_ping is False
+    options = engine_options("postgresql+asyncpg://u:p@db/referrals", profile)
+    assert options["poolclass"] is InstrumentedAsyncPool
+    assert options["connect_args"] == {
+        "prepared_statement_cache_size": 0,
+        "statement_cache_size": 0,
+    }
+    assert engine_options("sqlite+aiosqlite:///referrals.db") == {}
+
+
+@pytest.mark.asyncio
+async def test_pool_stats_report_checkouts_and_timeouts(tmp_path: Path) -> None:
+    engine = create_async_engine(
+        f"sqlite+aiosqlite:///{tmp_path / 'pool.db'}",
+        poolclass=InstrumentedAsyncPool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.05,
+    )
+    async with engine.connect():
+        stats = pool_stats(engine)
+        assert stats["checked_out"] == 1
+        assert stats["idle"] == 0
+        with pytest.raises(PoolTimeoutError):
+            async with engine.connect():
+                pass
+
+    stats = pool_stats(engine)
+    assert stats["checked_out"] == 0
+    assert stats["idle"] == 1
+    assert stats["checkouts"] == 1
+    assert stats["checkout_timeouts"] == 1
+    assert stats["checkout_wait_seconds_max"] >= 0.05
+    await engine.dispose()
@@ -0,0 +1,166 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from app.api.routes import stream_prices
+from app.notifications.price_events import DROPPED_EVENT, PriceEventBus
+from app.notifications.price_relay import (
+    PriceEventNotifier,
+    deliver,
+    encode_event,
+    listen_price_events,
+)
+
+
+class FakeDriverConnection:
+    def __init__(self) -> None:
+        self.listeners: dict[str, object] = {}
+        self.on_terminate = None
+
+    async def add_listener(self, channel, callback) -> None:
+        self.listeners[channel] = callback
+
+    async def remove_listener(self, channel, callback) -> None:
+        self.listeners.pop(channel, None)
+
+    def add_termination_listener(self, callback) -> None:
+        self.on_terminate = callback
+
+    def remove_termination_listener(self, callback) -> None:
+        self.on_terminate = None
+
+    def is_closed(self) -> bool:
+        return False
+
+
+class FakeEngine:
+    """Just enough of AsyncEngine for the relay: statements are recorded."""
+
+    def __init__(self) -> None:
+        self.dialect = SimpleNamespace(name="postgresql", driver="asyncpg")
+        self.driver = FakeDriverConnection()
+        self.statements: list[dict] = []
+
+    @asynccontextmanager
+    async def begin(self):
+        async def execute(statement, params):
+            self.statements.append(params)
+
+        yield SimpleNamespace(execute=execute)
+
+    @asynccontextmanager
+    async def connect(self):
+        async def get_raw_connection():
+            return SimpleNamespace(driver_connection=self.driver)
+
+        yield SimpleNamespace(get_raw_connection=get_raw_connection)
+
+
+@pytest.mark.asyncio
+async def test_publish_fans_out_to_matching_subscribers() -> None:
+    bus = PriceEventBus(buffer_size=4)
+    everything = bus.subscribe()
+    btc_only = bus.subscribe(["BTC-USD"])
+
+    bus.publish("price", {"symbol": "BTC-USD", "price": 1.0})
+    bus.publish("price", {"symbol": "ETH-USD", "price": 2.0})
+
+    assert [(await everything.get(0)).data["symbol"] for _ in range(2)] == ["BTC-USD", "ETH-USD"]
+    assert (await btc_only.get(0)).data["symbol"] == "BTC-USD"
+    assert await btc_only.get(0) is None
+
+    btc_only.close()
+    assert len(bus) == 1
+
+
+@pytest.mark.asyncio
+async def test_slow_subscriber_is_dropped_without_blocking_others() -> None:
+    bus = PriceEventBus(buffer_size=2)
+    slow = bus.subscribe()
+    fast = bus.subscribe()
+
+    for price in range(3):
+        bus.publish("price", {"symbol": "BTC-USD", "price": float(price)})
+        assert (await fast.get(0)).data["price"] == float(price)
+
+    assert len(bus) == 1
+    final = await slow.get(0)
+    assert final.event == DROPPED_EVENT
+    assert await slow.get(0) is None
+    # Later events only reach the subscribers that kept up.
+    bus.publish("price", {"symbol": "BTC-USD", "price": 9.0})
+    assert (await fast.get(0)).data["price"] == 9.0
+    assert await slow.get(0) is None
+
+
+@pytest.mark.asyncio
+async def test_stream_endpoint_writes_server_sent_events() -> None:
+    bus = PriceEventBus(buffer_size=4)
+    response = await stream_prices(symbols="BTC-USD, ETH-USD", events=bus)
+    assert response.media_type == "text/event-stream"
+    body = response.body_iterator
+
+    assert await body.__anext__() == b"retry: 3000\n\n"
+    assert len(bus) == 1
+    pending = asyncio.ensure_future(body.__anext__())
+    await asyncio.sleep(0)
+    bus.publish("price", {"symbol": "SOL-USD", "price": 1.0})
+    bus.publish("alert", {"symbol": "BTC-USD", "price": 2.0})
+    chunk = (await pending).decode()
+
+    event_id, event, data = chunk.rstrip("\n").split("\n")
+    assert event_id == "id: 2"
+    assert event == "event: alert"
+    assert json.loads(data.removeprefix("data: ")) == {"symbol": "BTC-USD", "price": 2.0}
+
+    await body.aclose()
+    assert len(bus) == 0
+
+
+@pytest.mark.asyncio
+async def test_notifier_sends_queued_events_in_one_statement() -> None:
+    engine = FakeEngine()
+    notifier = PriceEventNotifier(engine, channel="prices")
+    notifier.publish("price", {"symbol": "BTC-USD", "price": 1.0})
+    notifier.publish("alert", {"symbol": "BTC-USD", "price": 2.0})
+    notifier.publish("price", {"symbol": "BTC-USD", "blob": "x" * 9000})
+
+    task = asyncio.create_task(notifier.run())
+    await asyncio.sleep(0.01)
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    assert engine.statements == [
+        {
+            "channel": "prices",
+            "payloads": [
+                encode_event("price", {"symbol": "BTC-USD", "price": 1.0}),
+                encode_event("alert", {"symbol": "BTC-USD", "price": 2.0}),
+            ],
+        }
+    ]
+
+
+@pytest.mark.asyncio
+async def test_listener_republishes_notifications_on_the_local_bus() -> None:
+    engine = FakeEngine()
+    bus = PriceEventBus(buffer_size=4)
+    subscription = bus.subscribe()
+    task = asyncio.create_task(listen_price_events(engine, bus, channel="prices"))
+    await asyncio.sleep(0.01)
+
+    on_notify = engine.driver.listeners["prices"]
+    on_notify(None, 1, "prices", encode_event("price", {"symbol": "ETH-USD", "price": 3.0}))
+    deliver(bus, "{not json")
+    task.cancel()
+    await asyncio.gather(task, return_exceptions=True)
+
+    event = await subscription.get(0)
+    assert (event.event, event.data) == ("price", {"symbol": "ETH-USD", "price": 3.0})
+    assert await subscription.get(0) is None
+    assert engine.driver.listeners == {}
@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from datetime import date, datetime, timedelta, timezone
+
+from app.db.partitions import partition_day, partition_name, plan_partitions
+
+
+def test_plan_creates_upcoming_days_and_drops_expired_ones() -> None:
+    now = datetime(2024, 3, 10, 15, 30, tzinfo=timezone.utc)
+    existing = [
+        partition_name(date(2024, 3, 1)),
+        partition_name(date(2024, 3, 2)),
+        partition_name(date(2024, 3, 3)),
+        partition_name(date(2024, 3, 10)),
+        partition_name(date(2024, 3, 11)),
+        "price_samples_default",
+    ]
+
+    to_create, to_drop = plan_partitions(existing, now, days_ahead=3, retention=timedelta(days=7))
+
+    assert to_create == [date(2024, 3, 12), date(2024, 3, 13)]
+    # 2024-03-03 still holds samples newer than the 2024-03-03 15:30 cutoff.
+    assert to_drop == ["price_samples_p20240301", "price_samples_p20240302"]
+    assert partition_day("price_samples_default") is None
+    assert plan_partitions(existing, now, days_ahead=0, retention=None) == ([], [])
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from app.cache.invalidation import sync_read_cache
+from app.cache.memory import LRUCache, ProcessLocalCacheBackend, ReadCache
+from app.repositories.interfaces import ReferralRecord, UserRecord
+from app.usecases.referrals import RegisterReferral
+from app.usecases.users import GetUserStatus
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class FakeUnitOfWork:
+    def __init__(self) -> None:
+        self.callbacks = []
+
+    def after_commit(self, callback) -> None:
+        self.callbacks.append(callback)
+
+    async def commit(self) -> None:
+        for callback in self.callbacks:
+            await callback()
+
+
+class CountingRepository:
+    def __init__(self) -> None:
+        self.users = {42: UserRecord(id=1, telegram_id=42, created_at=datetime.now(timezone.utc))}
+        self.referrals: dict[int, ReferralRecord] = {}
+        self.reads = 0
+
+    async def get_by_telegram_id(self, telegram_id: int) -> UserRecord | None:
+        self.reads += 1
+        return self.users.get(telegram_id)
+
+    async def get_by_referred(self, referred_telegram_id: int) -> ReferralRecord | None:
+        return self.referrals.get(referred_telegram_id)
+
+    async def count_by_referrer(self, referrer_telegram_id: int) -> int:
+        return sum(
+            1
+            for referral in self.referrals.values()
+            if referral.referrer_telegram_id == referrer_telegram_id
+        )
+
+    async def register(self, referrer_telegram_id: int, referred_telegram_id: int):
+        record = ReferralRecord(
+            id=len(self.referrals) + 1,
+            referrer_telegram_id=referrer_telegram_id,
+            referred_telegram_id=referred_telegram_id,
+            created_at=datetime.now(timezone.utc),
+        )
+        self.referrals[referred_telegram_id] = record
+        return record, True, False
+
+
+def test_lru_cache_evicts_and_expires() -> None:
+    clock = FakeClock()
+    cache = LRUCache(max_entries=2, ttl_seconds=10, clock=clock)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+    assert cache.evictions == 1
+    assert cache.get("a") == 1
+    clock.now = 11
+    cache.get("a")
+    assert cache.expirations == 1
+    assert len(cache) == 1
+
+
+@pytest.mark.asyncio
+async def test_read_cache_coalesces_concurrent_misses() -> None:
+    cache = ReadCache(LRUCache(10, 60), shared=ProcessLocalCacheBackend())
+    calls = 0
+    release = asyncio.Event()
+
+    async def loader():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return {"value": calls}
+
+    tasks = [asyncio.create_task(cache.get_or_load("k", loader)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+    assert calls == 1
+    assert results == [{"value": 1}] * 5
+    assert await cache.get_or_load("k", loader) == {"value": 1}
+
+
+@pytest.mark.asyncio
+async def test_read_cache_skips_fill_invalidated_during_load() -> None:
+    shared = ProcessLocalCacheBackend()
+    cache = ReadCache(LRUCache(10, 60), shared=shared)
+
+    async def stale_loader():
+        await cache.invalidate("k")
+        return "stale"
+
+    async def fresh_loader():
+        return "fresh"
+
+    assert await cache.get_or_load("k", stale_loader) == "stale"
+    assert await shared.get("k") is None
+    assert await cache.get_or_load("k", fresh_loader) == "fresh"
+    assert cache.stats()["misses"] == 2
+
+
+@pytest.mark.asyncio
+async def test_register_referral_invalidates_cached_status() -> None:
+    repo = CountingRepository()
+    cache = ReadCache(LRUCache(10, 60))
+    status = GetUserStatus(repo, repo, cache)
+
+    first = await status.execute(42)
+    await status.execute(42)
+    assert repo.reads == 1
+    assert first["referral_count"] == 0
+
+    uow = FakeUnitOfWork()
+    await RegisterReferral(repo, cache.for_unit_of_work(uow)).execute(42, 7)
+    assert len(uow.callbacks) == 1
+    await uow.commit()
+
+    refreshed = await status.execute(42)
+    assert repo.reads == 2
+    assert refreshed["referral_count"] == 1
+    assert cache.stats()["invalidations"] == 6
+
+
+class FakeNotifyServer:
+    """Delivers pg_notify payloads to every registered listener, like one database."""
+
+    def __init__(self) -> None:
+        self.listeners: dict[str, list] = {}
+
+    def engine(self):
+        server = self
+
+        class Driver:
+            def add_termination_listener(self, callback) -> None:
+                pass
+
+            def remove_termination_listener(self, callback) -> None:
+                pass
+
+            async def add_listener(self, channel, callback) -> None:
+                server.listeners.setdefault(channel, []).append(callback)
+
+            async def remove_listener(self, channel, callback) -> None:
+                server.listeners[channel].remove(callback)
+
+            def is_closed(self) -> bool:
+                return False
+
+        driver = Driver()
+
+        class Engine:
+            @asynccontextmanager
+            async def begin(self):
+                async def execute(statement, params):
+                    for payload in params["payloads"]:
+                        for callback in list(server.listeners.get(params["channel"], [])):
+                            callback(driver, 0, params["channel"], payload)
+
+                yield SimpleNamespace(execute=execute)
+
+            @asynccontextmanager
+            async def connect(self):
+                async def get_raw_connection():
+                    return SimpleNamespace(driver_connection=driver)
+
+                yield SimpleNamespace(get_raw_connection=get_raw_connection)
+
+        return Engine()
+
+
+@pytest.mark.asyncio
+async def test_invalidations_are_broadcast_to_other_processes() -> None:
+    server = FakeNotifyServer()
+    api, bot = ReadCache(LRUCache(10, 60)), ReadCache(LRUCache(10, 60))
+    tasks = [
+        asyncio.create_task(sync_read_cache(server.engine(), cache, origin=origin))
+        for cache, origin in ((api, "api"), (bot, "bot"))
+    ]
+    await asyncio.sleep(0.01)
+
+    async def load_old():
+        return "old"
+
+    async def load_new():
+        return "new"
+
+    assert await api.get_or_load("k", load_old) == "old"
+    assert await bot.get_or_load("k", load_old) == "old"
+    await api.invalidate("k")
+    await asyncio.sleep(0.01)
+
+    assert await bot.get_or_load("k", load_new) == "new"
+    # The writer applied its own invalidation once, not again on the echo.
+    assert api.stats()["invalidations"] == 1
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    assert server.listeners["read_cache_invalidations"] == []
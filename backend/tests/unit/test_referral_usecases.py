@@ -8,7 +8,7 @@ from sqlalchemy.exc import IntegrityError
 
 from app.repositories.interfaces import ReferralRecord
 from app.usecases.errors import ConflictError, ValidationError
-from app.usecases.referrals import CreateReferral
+from app.usecases.referrals import CreateReferral, RegisterReferral
 
 
 @dataclass
@@ -34,6 +34,14 @@ class FakeReferralRepository:
         self.next_id += 1
         return record
 
+    async def register(
+        self, referrer_telegram_id: int, referred_telegram_id: int
+    ) -> tuple[ReferralRecord, bool, bool]:
+        existing = self.referrals.get(referred_telegram_id)
+        if existing:
+            return existing, False, existing.referrer_telegram_id != referrer_telegram_id
+        return await self.create(referrer_telegram_id, referred_telegram_id), True, False
+
     async def count_by_referrer(self, referrer_telegram_id: int) -> int:
         return sum(
             1
@@ -104,3 +112,31 @@ async def test_create_referral_integrity_error_returns_existing() -> None:
     referral, created = await usecase.execute(10, 20)
     assert referral == existing
     assert created is False
+
+
+@pytest.mark.asyncio
+async def test_register_referral_idempotent_same_referrer() -> None:
+    repo = FakeReferralRepository(referrals={})
+    usecase = RegisterReferral(repo)
+    created, was_created = await usecase.execute(10, 20)
+    assert was_created is True
+    existing, was_created = await usecase.execute(10, 20)
+    assert existing == created
+    assert was_created is False
+
+
+@pytest.mark.asyncio
+async def test_register_referral_conflict_different_referrer() -> None:
+    repo = FakeReferralRepository(referrals={})
+    usecase = RegisterReferral(repo)
+    await usecase.execute(10, 20)
+    with pytest.raises(ConflictError):
+        await usecase.execute(11, 20)
+
+
+@pytest.mark.asyncio
+async def test_register_referral_self_referral_rejected() -> None:
+    repo = FakeReferralRepository(referrals={})
+    usecase = RegisterReferral(repo)
+    with pytest.raises(ValidationError):
+        await usecase.execute(10, 10)
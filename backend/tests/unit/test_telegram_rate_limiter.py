@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import asyncio
+import time
+
+import pytest
+from aiogram.exceptions import TelegramRetryAfter
+
+from app.notifications.rate_limiter import (
+    BULK,
+    INTERACTIVE,
+    SendScheduler,
+    bulk_sends,
+    telegram_retry_after_total,
+)
+from benchmarks.bot_replay import CapturingSession
+from bot.main import build_bot
+
+
+class FloodOnceSession(CapturingSession):
+    """Local Bot API stub answering the first send with a 429."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.flooded = False
+
+    async def make_request(self, bot, method, timeout=None):
+        if not self.flooded:
+            self.flooded = True
+            self.calls.append(method)
+            raise TelegramRetryAfter(method=method, message="Too Many Requests", retry_after=1)
+        return await super().make_request(bot, method, timeout)
+
+
+@pytest.mark.asyncio
+async def test_interactive_sends_go_before_bulk() -> None:
+    scheduler = SendScheduler(rate_per_second=50)
+    order: list[str] = []
+
+    def send(label: str):
+        async def call() -> str:
+            order.append(label)
+            return label
+
+        return call
+
+    results = await asyncio.gather(
+        *(scheduler.submit(chat, send(f"bulk{chat}"), BULK) for chat in range(1, 4)),
+        scheduler.submit(9, send("reply"), INTERACTIVE),
+    )
+    await scheduler.close()
+
+    assert order[0] == "reply"
+    assert results == ["bulk1", "bulk2", "bulk3", "reply"]
+
+
+@pytest.mark.asyncio
+async def test_per_chat_bucket_spaces_and_orders_sends() -> None:
+    scheduler = SendScheduler(rate_per_second=100, private_chat_rate=20, private_chat_burst=1)
+    sent_at: list[tuple[int, float]] = []
+
+    def send(index: int):
+        async def call() -> None:
+            sent_at.append((index, time.monotonic()))
+
+        return call
+
+    await asyncio.gather(*(scheduler.submit(7, send(index)) for index in range(4)))
+    await scheduler.close()
+
+    assert [index for index, _ in sent_at] == [0, 1, 2, 3]
+    assert sent_at[-1][1] - sent_at[0][1] >= 0.14
+
+
+@pytest.mark.asyncio
+async def test_bot_sends_wait_out_retry_after_and_keep_order() -> None:
+    session = FloodOnceSession()
+    scheduler = SendScheduler()
+    bot = build_bot("42:limited", session=session, scheduler=scheduler)
+    retries_before = telegram_retry_after_total.value()
+
+    started = time.monotonic()
+    with bulk_sends():
+        first = asyncio.create_task(bot.send_message(chat_id=5, text="one"))
+        await asyncio.sleep(0)
+        second = asyncio.create_task(bot.send_message(chat_id=5, text="two"))
+        messages = await asyncio.gather(first, second)
+    await scheduler.close()
+
+    assert time.monotonic() - started >= 1
+    assert [message.text for message in messages] == ["one", "two"]
+    assert [call.text for call in session.sent_messages] == ["one", "one", "two"]
+    assert telegram_retry_after_total.value() == retries_before + 1
+    assert scheduler.stats()["queued"] == {"interactive": 0, "bulk": 0}
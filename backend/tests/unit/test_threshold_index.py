@@ -0,0 +1,65 @@
+from __future__ import annotations
+
+import random
+from datetime import datetime, timezone
+
+import pytest
+
+from app.repositories.interfaces import PriceAlertSubscriptionRecord
+from app.usecases.price_subscriptions import ABOVE, BELOW, ThresholdIndex
+
+NOW = datetime(2024, 5, 1, tzinfo=timezone.utc)
+
+
+def _subscription(id: int, direction: str, threshold: float, symbol: str = "BTC-USD"):
+    return PriceAlertSubscriptionRecord(id, 1000 + id, symbol, direction, threshold, NOW)
+
+
+def test_pop_crossed_returns_only_satisfied_alerts_once() -> None:
+    index = ThresholdIndex()
+    for subscription in (
+        _subscription(1, ABOVE, 100.0),
+        _subscription(2, ABOVE, 110.0),
+        _subscription(3, ABOVE, 105.0),
+        _subscription(4, BELOW, 90.0),
+        _subscription(5, BELOW, 95.0),
+        _subscription(6, ABOVE, 101.0, symbol="ETH-USD"),
+    ):
+        index.add(subscription)
+
+    assert index.pop_crossed("BTC-USD", 100.0) == []
+    assert sorted(index.pop_crossed("BTC-USD", 106.0)) == [1, 3]
+    assert index.pop_crossed("BTC-USD", 106.0) == []
+    assert sorted(index.pop_crossed("BTC-USD", 89.0)) == [4, 5]
+    assert index.pop_crossed("SOL-USD", 1.0) == []
+    assert len(index) == 2
+
+
+@pytest.mark.parametrize("bulk", [False, True])
+def test_pop_crossed_matches_a_full_scan(bulk: bool) -> None:
+    rng = random.Random(7)
+    active: dict[int, PriceAlertSubscriptionRecord] = {
+        id: _subscription(id, rng.choice((ABOVE, BELOW)), round(rng.uniform(50, 150), 1))
+        for id in range(1, 2001)
+    }
+    if bulk:
+        index = ThresholdIndex.from_subscriptions(active.values())
+    else:
+        index = ThresholdIndex()
+        for subscription in active.values():
+            index.add(subscription)
+    assert len(index) == 2000
+
+    price = 100.0
+    for _ in range(200):
+        price = max(1.0, price + rng.uniform(-5, 5))
+        expected = {
+            id
+            for id, subscription in active.items()
+            if (subscription.direction == ABOVE and price > subscription.threshold)
+            or (subscription.direction == BELOW and price < subscription.threshold)
+        }
+        assert set(index.pop_crossed("BTC-USD", price)) == expected
+        for id in expected:
+            del active[id]
+    assert len(index) == len(active)
@@ -0,0 +1,52 @@
+from __future__ import annotations
+
+from pathlib import Path
+
+import pytest
+from sqlalchemy import event, select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.db.models import Base, User
+from app.db.session import UnitOfWork
+from app.usecases.errors import DatabaseConnectionError
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_is_lazy_and_reads_skip_commit(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'uow.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+    commits: list[object] = []
+    event.listen(engine.sync_engine, "commit", commits.append)
+
+    async with UnitOfWork(session_factory) as uow:
+        assert not uow.session.in_transaction()
+    assert engine.sync_engine.pool.checkedout() == 0
+
+    async with UnitOfWork(session_factory, read_only=True) as uow:
+        await uow.session.execute(select(User))
+        connection = await uow.session.connection()
+        assert connection.sync_connection.get_execution_options()["isolation_level"] == "AUTOCOMMIT"
+        raw = await connection.get_raw_connection()
+        assert raw.driver_connection.isolation_level is None
+    assert commits == []
+
+    async with UnitOfWork(session_factory) as uow:
+        await uow.session.execute(text("INSERT INTO users (telegram_id) VALUES (1)"))
+    assert len(commits) == 1
+    await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_unit_of_work_maps_connection_failures() -> None:
+    async def refuse():
+        raise ConnectionRefusedError("database is down")
+
+    engine = create_async_engine("sqlite+aiosqlite://", async_creator=refuse)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    with pytest.raises(DatabaseConnectionError):
+        async with UnitOfWork(session_factory, read_only=True) as uow:
+            await uow.session.execute(select(User))
+    await engine.dispose()
@@ -2,10 +2,13 @@ from __future__ import annotations
 
 from dataclasses import dataclass
 from datetime import datetime, timezone
+from pathlib import Path
 
 import pytest
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
 
+from app.db.models import Base
 from app.repositories.sqlalchemy import SqlAlchemyUserRepository
 
 
@@ -17,74 +20,67 @@ class FakeUser:
 
 
 class FakeResult:
-    def __init__(self, user: FakeUser | None) -> None:
-        self._user = user
+    def __init__(self, rows: list) -> None:
+        self._rows = rows
 
-    def scalar_one_or_none(self) -> FakeUser | None:
-        return self._user
+    def __iter__(self):
+        return iter(self._rows)
 
 
-class FakeSession:
-    def __init__(self, first_user: FakeUser | None, after_user: FakeUser | None) -> None:
-        self._first_user = first_user
-        self._after_user = after_user
-        self._execute_calls = 0
-        self.rolled_back = False
-        self.begin_nested_called = False
-        self.added = []
-
-    async def execute(self, *args, **kwargs) -> FakeResult:
-        self._execute_calls += 1
-        user = self._first_user if self._execute_calls == 1 else self._after_user
-        return FakeResult(user)
-
-    def add(self, obj) -> None:
-        self.added.append(obj)
-
-    async def flush(self) -> None:
-        raise IntegrityError("insert", {}, Exception("duplicate"))
-
-    def expunge(self, obj) -> None:
-        self.added.remove(obj)
-
-    async def rollback(self) -> None:
-        self.rolled_back = True
+class FakeBind:
+    dialect = postgresql.dialect()
 
-    class _BeginNested:
-        def __init__(self, session: "FakeSession") -> None:
-            self._session = session
 
-        async def __aenter__(self) -> None:
-            self._session.begin_nested_called = True
-
-        async def __aexit__(self, exc_type, exc, tb) -> bool:
-            return False
+class FakeSession:
+    """Simulates a PostgreSQL upsert losing a race to a concurrent insert."""
 
-    def begin_nested(self) -> _BeginNested:
-        return self._BeginNested(self)
+    def __init__(self, after_user: FakeUser | None) -> None:
+        self._after_user = after_user
+        self.statements = []
 
-    class _NoAutoflush:
-        def __enter__(self) -> None:
-            return None
+    def get_bind(self) -> FakeBind:
+        return FakeBind()
 
-        def __exit__(self, exc_type, exc, tb) -> bool:
-            return False
+    async def execute(self, statement, *args, **kwargs) -> FakeResult:
+        self.statements.append(statement)
+        if len(self.statements) == 1:
+            return FakeResult([])
+        return FakeResult([self._after_user] if self._after_user else [])
 
-    @property
-    def no_autoflush(self) -> _NoAutoflush:
-        return self._NoAutoflush()
 
 @pytest.mark.asyncio
-async def test_upsert_user_handles_integrity_error() -> None:
+async def test_upsert_user_falls_back_to_select_after_race() -> None:
     existing = FakeUser(
         id=1, telegram_id=42, created_at=datetime.now(timezone.utc)
     )
-    session = FakeSession(first_user=None, after_user=existing)
+    session = FakeSession(after_user=existing)
     repo = SqlAlchemyUserRepository(session)
 
-    record = await repo.upsert(42)
+    record, created = await repo.get_or_create(42)
 
     assert record.telegram_id == 42
     assert record.id == 1
-    assert session.begin_nested_called is True
-    assert session.rolled_back is False
+    assert created is False
+    compiled = str(session.statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (telegram_id) DO NOTHING" in compiled
+    assert len(session.statements) == 2
+
+
+@pytest.mark.asyncio
+async def test_upsert_user_flags_new_rows(tmp_path: Path) -> None:
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'users.db'}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        repo = SqlAlchemyUserRepository(session)
+        first, first_created = await repo.get_or_create(7)
+        second, second_created = await repo.get_or_create(7)
+        upserted = await repo.upsert(7)
+        await session.commit()
+
+    assert first_created is True
+    assert second_created is False
+    assert first == second == upserted
+    await engine.dispose()
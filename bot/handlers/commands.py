@@ -1,20 +1,27 @@
 from __future__ import annotations
 
+import html
 import logging
 import re
 from datetime import datetime
 
-from aiogram import Router
+from aiogram import F, Router
 from aiogram.filters import Command
-from aiogram.types import Message
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, Message
 
 from app.core.logging import set_request_id
+from app.usecases.price_subscriptions import ABOVE, BELOW
 from app.usecases.errors import ConflictError, NotFoundError, ValidationError
 from bot.services import BotService
 
 logger = logging.getLogger(__name__)
 
 START_PAYLOAD_PATTERN = re.compile(r"^ref_(\d+)$", re.IGNORECASE)
+REFERRALS_PAGE_PREFIX = "refs:"
+REFERRALS_PAGE_SIZE = 10
+ALERT_ARGS_PATTERN = re.compile(r"^(\S+)\s*([<>])\s*([0-9][0-9,]*(?:\.[0-9]+)?)$")
+# Replies are sent with HTML parse mode, hence the escaping.
+ALERT_USAGE = html.escape("Usage: /alert BTC-USD > 70000 (or < to alert on a drop).")
 
 
 def _parse_start_payload(text: str | None) -> tuple[int | None, str | None]:
@@ -35,12 +42,52 @@ def _parse_start_payload(text: str | None) -> tuple[int | None, str | None]:
     return referrer_id, None
 
 
+def _parse_alert_args(text: str | None) -> tuple[str, str, float] | None:
+    """``/alert BTC-USD > 70000`` -> ``("BTC-USD", "above", 70000.0)``."""
+    parts = (text or "").strip().split(maxsplit=1)
+    if len(parts) < 2:
+        return None
+    match = ALERT_ARGS_PATTERN.match(parts[1].strip())
+    if not match:
+        return None
+    symbol, operator, threshold = match.groups()
+    direction = ABOVE if operator == ">" else BELOW
+    return symbol, direction, float(threshold.replace(",", ""))
+
+
+def _format_alert_line(alert) -> str:
+    operator = ">" if alert.direction == ABOVE else "<"
+    return html.escape(f"#{alert.id} {alert.symbol} {operator} {alert.threshold:,.2f}")
+
+
 def _format_datetime(value: datetime | None) -> str:
     if not value:
         return "unknown"
     return value.isoformat(timespec="seconds")
 
 
+def _format_referral_lines(referrals: list[dict]) -> list[str]:
+    return [
+        f"- {referral['referred_telegram_id']} at "
+        f"{_format_datetime(referral['created_at'])}"
+        for referral in referrals
+    ]
+
+
+def _next_page_markup(cursor: str | None) -> InlineKeyboardMarkup | None:
+    if not cursor:
+        return None
+    return InlineKeyboardMarkup(
+        inline_keyboard=[
+            [
+                InlineKeyboardButton(
+                    text="Next page", callback_data=f"{REFERRALS_PAGE_PREFIX}{cursor}"
+                )
+            ]
+        ]
+    )
+
+
 def build_router(service: BotService) -> Router:
     router = Router()
 
@@ -150,11 +197,110 @@ def build_router(service: BotService) -> Router:
             f"Total referrals: {summary['count']}",
             "Last 5 referrals:",
         ]
-        for referral in summary["last_5_referrals"]:
-            lines.append(
-                f"- {referral['referred_telegram_id']} at "
-                f"{_format_datetime(referral['created_at'])}"
-            )
+        lines.extend(_format_referral_lines(summary["last_5_referrals"]))
+        await message.answer(
+            "\n".join(lines),
+            reply_markup=_next_page_markup(summary.get("next_cursor")),
+        )
+
+    @router.message(Command("alert"))
+    async def alert_handler(message: Message) -> None:
+        set_request_id(str(message.message_id))
+        telegram_id = message.from_user.id if message.from_user else None
+        if not telegram_id:
+            await message.answer("Sorry, I couldn't read your Telegram ID.")
+            return
+        args = _parse_alert_args(message.text)
+        if args is None:
+            await message.answer(ALERT_USAGE)
+            return
+        try:
+            alert = await service.create_price_alert(telegram_id, *args)
+        except ValidationError as exc:
+            await message.answer(f"Couldn't create the alert: {html.escape(str(exc))}.")
+            return
+        except Exception:
+            logger.exception("Unexpected error on /alert")
+            await message.answer("Sorry, something went wrong. Please try again later.")
+            return
+        await message.answer(
+            f"Alert {_format_alert_line(alert)} created. It fires once; "
+            "see /alerts, remove with /unalert ID."
+        )
+
+    @router.message(Command("alerts"))
+    async def alerts_handler(message: Message) -> None:
+        set_request_id(str(message.message_id))
+        telegram_id = message.from_user.id if message.from_user else None
+        if not telegram_id:
+            await message.answer("Sorry, I couldn't read your Telegram ID.")
+            return
+        try:
+            alerts = await service.list_price_alerts(telegram_id)
+        except ValidationError:
+            await message.answer("Sorry, I couldn't process your request.")
+            return
+        except Exception:
+            logger.exception("Unexpected error on /alerts")
+            await message.answer("Sorry, something went wrong. Please try again later.")
+            return
+        if not alerts:
+            await message.answer(f"You have no price alerts. {ALERT_USAGE}")
+            return
+        lines = ["Your price alerts:", *(_format_alert_line(alert) for alert in alerts)]
         await message.answer("\n".join(lines))
 
+    @router.message(Command("unalert"))
+    async def unalert_handler(message: Message) -> None:
+        set_request_id(str(message.message_id))
+        telegram_id = message.from_user.id if message.from_user else None
+        if not telegram_id:
+            await message.answer("Sorry, I couldn't read your Telegram ID.")
+            return
+        parts = (message.text or "").split(maxsplit=1)
+        alert_id = parts[1].strip().lstrip("#") if len(parts) > 1 else ""
+        if not alert_id.isdigit():
+            await message.answer("Usage: /unalert ID (ids are listed by /alerts).")
+            return
+        try:
+            await service.delete_price_alert(telegram_id, int(alert_id))
+        except NotFoundError:
+            await message.answer("No such alert. See /alerts.")
+            return
+        except ValidationError:
+            await message.answer("Sorry, I couldn't process your request.")
+            return
+        except Exception:
+            logger.exception("Unexpected error on /unalert")
+            await message.answer("Sorry, something went wrong. Please try again later.")
+            return
+        await message.answer(f"Alert #{alert_id} removed.")
+
+    @router.callback_query(F.data.startswith(REFERRALS_PAGE_PREFIX))
+    async def ref_page_handler(callback: CallbackQuery) -> None:
+        set_request_id(callback.id)
+        telegram_id = callback.from_user.id if callback.from_user else None
+        cursor = callback.data[len(REFERRALS_PAGE_PREFIX):]
+        if not telegram_id or not isinstance(callback.message, Message):
+            await callback.answer("Sorry, I couldn't process your request.")
+            return
+        try:
+            page = await service.list_referrals(telegram_id, REFERRALS_PAGE_SIZE, cursor)
+        except ValidationError:
+            await callback.answer("This page is no longer available.")
+            return
+        except Exception:
+            logger.exception("Unexpected error on referrals page")
+            await callback.answer("Sorry, something went wrong. Please try again later.")
+            return
+
+        lines = ["Older referrals:", *_format_referral_lines(page["referrals"])]
+        if not page["referrals"]:
+            lines = ["No more referrals."]
+        await callback.message.edit_text(
+            "\n".join(lines),
+            reply_markup=_next_page_markup(page["next_cursor"]),
+        )
+        await callback.answer()
+
     return router
@@ -12,6 +12,7 @@ from pathlib import Path
 
 from aiogram import Bot, Dispatcher
 from aiogram.client.default import DefaultBotProperties
+from aiogram.client.session.base import BaseSession
 from aiogram.enums import ParseMode
 
 PROJECT_ROOT = Path(__file__).resolve().parents[1]
@@ -19,8 +20,21 @@ for path in (PROJECT_ROOT, PROJECT_ROOT / "backend"):
     if path.exists():
         sys.path.insert(0, str(path))
 
+from app.cache.invalidation import sync_read_cache
+from app.cache.memory import read_cache
+from app.core.config import DB_POOL_LOG_INTERVAL_SECONDS
 from app.core.logging import setup_logging
+from app.db.instrumentation import track_queries
+from app.db.notify import notify_supported
+from app.db.pool import log_pool_stats
+from app.db.session import engine
+from app.notifications.rate_limiter import (
+    SendScheduler,
+    build_send_scheduler,
+    install_rate_limiter,
+)
 from bot.handlers import build_router
+from bot.runner import UpdateRunner, log_runner_stats
 from bot.services import BotService
 
 logger = logging.getLogger(__name__)
@@ -37,22 +51,67 @@ def _is_dry_run() -> bool:
     return os.getenv("BOT_DRY_RUN", "0") == "1"
 
 
+async def _track_update_queries(handler, event, data):
+    with track_queries(f"update {event.update_id}"):
+        return await handler(event, data)
+
+
+def build_dispatcher(
+    service: BotService | None = None, runner: UpdateRunner | None = None
+) -> Dispatcher:
+    runner = runner or UpdateRunner.from_env()
+    dispatcher = Dispatcher(update_runner=runner)
+    dispatcher.update.outer_middleware(runner)
+    dispatcher.update.outer_middleware(_track_update_queries)
+    dispatcher.include_router(build_router(service or BotService()))
+    return dispatcher
+
+
+def build_bot(
+    token: str,
+    session: BaseSession | None = None,
+    scheduler: SendScheduler | None = None,
+) -> Bot:
+    """``scheduler`` rate limits chat-bound calls (replies, edits) through it."""
+    bot_defaults = DefaultBotProperties(parse_mode=ParseMode.HTML)
+    if "default" in inspect.signature(Bot.__init__).parameters:
+        bot = Bot(token=token, session=session, default=bot_defaults)
+    else:
+        bot = Bot(token=token, session=session, parse_mode=ParseMode.HTML)
+    if scheduler is not None:
+        install_rate_limiter(bot, scheduler)
+    return bot
+
+
 async def main() -> None:
     setup_logging()
-    dispatcher = Dispatcher()
-    service = BotService()
-    dispatcher.include_router(build_router(service))
+    dispatcher = build_dispatcher()
     if _is_dry_run():
         logger.info("BOT_DRY_RUN enabled; bot startup completed without polling.")
         return
-    token = _load_bot_token()
-    bot_defaults = DefaultBotProperties(parse_mode=ParseMode.HTML)
-    if "default" in inspect.signature(Bot.__init__).parameters:
-        bot = Bot(token=token, default=bot_defaults)
-    else:
-        bot = Bot(token=token, parse_mode=ParseMode.HTML)
+    if os.getenv("BOT_MODE", "polling") == "webhook":
+        logger.info("BOT_MODE=webhook; updates are served by the API at /bot/webhook.")
+        return
+    bot = build_bot(_load_bot_token(), scheduler=build_send_scheduler())
+    runner: UpdateRunner = dispatcher["update_runner"]
+    # Held so the background tasks are not garbage-collected; cancelled on exit.
+    background: list[asyncio.Task] = []
+    if read_cache is not None and notify_supported(engine):
+        background.append(asyncio.create_task(sync_read_cache(engine, read_cache)))
+    if DB_POOL_LOG_INTERVAL_SECONDS > 0:
+        background.append(
+            asyncio.create_task(log_pool_stats(engine, DB_POOL_LOG_INTERVAL_SECONDS))
+        )
+    stats_interval = float(os.getenv("BOT_STATS_LOG_INTERVAL_SECONDS", "0"))
+    if stats_interval > 0:
+        background.append(asyncio.create_task(log_runner_stats(runner, stats_interval)))
     logger.info("Starting Telegram bot polling")
-    await dispatcher.start_polling(bot)
+    try:
+        # Polling stops fetching while `capacity` updates are admitted: backpressure.
+        await dispatcher.start_polling(bot, tasks_concurrency_limit=runner.capacity)
+    finally:
+        for task in background:
+            task.cancel()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,162 @@
+"""Bounded, per-user ordered update processing for the dispatcher.
+
+``UpdateRunner`` is an outer update middleware: every update first waits
+on its user's lane (a FIFO lock, so one user's updates run strictly in
+arrival order), then on a shared slot semaphore capping how many handlers
+touch the database at once. Admission is bounded by ``capacity``; polling
+passes it as aiogram's ``tasks_concurrency_limit`` so ``getUpdates`` stops
+while the queue is full, and webhook mode rejects beyond its pending cap.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import os
+import time
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any
+
+from aiogram.types import TelegramObject, Update
+
+from app.core.metrics import registry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 16
+DEFAULT_QUEUE_SIZE = 256
+
+bot_updates_total = registry.counter(
+    "bot_updates_total", "Bot updates processed.", ("update_type", "outcome")
+)
+bot_updates_in_flight = registry.gauge(
+    "bot_updates_in_flight", "Bot updates currently running a handler."
+)
+bot_updates_queued = registry.gauge(
+    "bot_updates_queued", "Bot updates admitted and waiting for their lane or a slot."
+)
+bot_update_wait_seconds = registry.histogram(
+    "bot_update_wait_seconds", "Time an update waited before its handler started."
+)
+bot_update_duration_seconds = registry.histogram(
+    "bot_update_duration_seconds", "Handler time per update.", ("update_type",)
+)
+
+
+@dataclass
+class _Lane:
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    users: int = 0
+
+
+class UpdateRunner:
+    def __init__(
+        self, concurrency: int = DEFAULT_CONCURRENCY, queue_size: int = DEFAULT_QUEUE_SIZE
+    ) -> None:
+        if concurrency < 1 or queue_size < 0:
+            raise ValueError("concurrency must be >= 1 and queue_size >= 0")
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self._slots = asyncio.Semaphore(concurrency)
+        self._lanes: dict[int, _Lane] = {}
+        self.queued = 0
+        self.in_flight = 0
+        self.max_wait_seconds = 0.0
+
+    @classmethod
+    def from_env(cls) -> "UpdateRunner":
+        return cls(
+            concurrency=int(os.getenv("BOT_UPDATE_CONCURRENCY", str(DEFAULT_CONCURRENCY))),
+            queue_size=int(os.getenv("BOT_UPDATE_QUEUE_SIZE", str(DEFAULT_QUEUE_SIZE))),
+        )
+
+    @property
+    def capacity(self) -> int:
+        """Updates that may be admitted at once: running plus queued."""
+        return self.concurrency + self.queue_size
+
+    def stats(self) -> dict[str, float | int]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "lanes": len(self._lanes),
+            "concurrency": self.concurrency,
+            "capacity": self.capacity,
+            "max_wait_seconds": round(self.max_wait_seconds, 6),
+        }
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: dict[str, Any],
+    ) -> Any:
+        user = data.get("event_from_user")
+        update_type = event.event_type if isinstance(event, Update) else type(event).__name__
+        started = time.perf_counter()
+        self._set_queued(+1)
+        waiting = True
+        lane = self._enter_lane(user.id) if user is not None else None
+        try:
+            if lane is not None:
+                await lane.lock.acquire()
+            try:
+                async with self._slots:
+                    waiting = False
+                    self._set_queued(-1)
+                    return await self._run(
+                        handler, event, data, update_type, time.perf_counter() - started
+                    )
+            finally:
+                if lane is not None:
+                    lane.lock.release()
+        finally:
+            if waiting:
+                self._set_queued(-1)
+            if user is not None:
+                self._leave_lane(user.id)
+
+    async def _run(self, handler, event, data, update_type: str, waited: float) -> Any:
+        bot_update_wait_seconds.observe(waited)
+        self.max_wait_seconds = max(self.max_wait_seconds, waited)
+        self.in_flight += 1
+        bot_updates_in_flight.inc()
+        started = time.perf_counter()
+        outcome = "ok"
+        try:
+            return await handler(event, data)
+        except Exception:
+            outcome = "error"
+            raise
+        finally:
+            self.in_flight -= 1
+            bot_updates_in_flight.dec()
+            bot_update_duration_seconds.observe(
+                time.perf_counter() - started, update_type=update_type
+            )
+            bot_updates_total.inc(update_type=update_type, outcome=outcome)
+
+    def _set_queued(self, delta: int) -> None:
+        self.queued += delta
+        bot_updates_queued.inc(delta)
+
+    def _enter_lane(self, user_id: int) -> _Lane:
+        lane = self._lanes.get(user_id)
+        if lane is None:
+            lane = self._lanes[user_id] = _Lane()
+        lane.users += 1
+        return lane
+
+    def _leave_lane(self, user_id: int) -> None:
+        lane = self._lanes[user_id]
+        lane.users -= 1
+        if lane.users == 0:
+            del self._lanes[user_id]
+
+
+async def log_runner_stats(runner: UpdateRunner, interval_seconds: float) -> None:
+    """Log ``runner.stats()`` every ``interval_seconds`` until cancelled."""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        logger.info("Bot update runner stats: %s", runner.stats())
@@ -1,17 +1,46 @@
 from __future__ import annotations
 
-from app.db.session import UnitOfWork
-from app.repositories.sqlalchemy import SqlAlchemyReferralRepository, SqlAlchemyUserRepository
-from app.usecases.referrals import CreateReferral, GetReferralSummary
+from collections.abc import Collection
+
+from app.cache.memory import ReadCache, read_cache
+from app.core.config import PRICE_ALERT_SYMBOLS
+from app.db.replica import ReplicaRouter
+from app.db.session import UnitOfWork, replica_router
+from app.repositories.sqlalchemy import (
+    SqlAlchemyPriceAlertSubscriptionRepository,
+    SqlAlchemyReferralRepository,
+    SqlAlchemyUserRepository,
+)
+from app.usecases.price_subscriptions import (
+    CreatePriceAlertSubscription,
+    DeletePriceAlertSubscription,
+    ListPriceAlertSubscriptions,
+)
+from app.usecases.referrals import GetReferralSummary, ListReferrals, RegisterReferral
 from app.usecases.users import GetUserStatus, UpsertUser
 
 
 class BotService:
-    def __init__(self, uow_factory: type[UnitOfWork] = UnitOfWork) -> None:
+    def __init__(
+        self,
+        uow_factory: type[UnitOfWork] = UnitOfWork,
+        cache: ReadCache | None = read_cache,
+        router: ReplicaRouter | None = replica_router,
+        price_alert_symbols: Collection[str] = PRICE_ALERT_SYMBOLS,
+    ) -> None:
         self._uow_factory = uow_factory
+        self._cache = cache
+        self._router = router
+        self._price_alert_symbols = price_alert_symbols
+
+    def _write_uow(self, *telegram_ids: int) -> UnitOfWork:
+        return self._uow_factory(router=self._router).for_user(*telegram_ids)
+
+    def _read_uow(self, *telegram_ids: int) -> UnitOfWork:
+        return self._uow_factory(read_only=True, router=self._router).for_user(*telegram_ids)
 
     async def upsert_user(self, telegram_id: int):
-        async with self._uow_factory() as uow:
+        async with self._write_uow(telegram_id) as uow:
             users_repo = SqlAlchemyUserRepository(uow.session)
             usecase = UpsertUser(users_repo)
             return await usecase.execute(telegram_id)
@@ -19,26 +48,54 @@ class BotService:
     async def register_user_and_referral(
         self, telegram_id: int, referrer_telegram_id: int | None
     ):
-        async with self._uow_factory() as uow:
-            users_repo = SqlAlchemyUserRepository(uow.session)
-            referrals_repo = SqlAlchemyReferralRepository(uow.session)
-            upsert_user = UpsertUser(users_repo)
-            create_referral = CreateReferral(referrals_repo)
-            await upsert_user.execute(telegram_id)
-            if referrer_telegram_id:
-                await upsert_user.execute(referrer_telegram_id)
-                return await create_referral.execute(referrer_telegram_id, telegram_id)
+        if not referrer_telegram_id:
+            await self.upsert_user(telegram_id)
             return None
+        async with self._write_uow(telegram_id, referrer_telegram_id) as uow:
+            referrals_repo = SqlAlchemyReferralRepository(uow.session)
+            register_referral = RegisterReferral(
+                referrals_repo, self._cache.for_unit_of_work(uow) if self._cache else None
+            )
+            return await register_referral.execute(referrer_telegram_id, telegram_id)
 
     async def get_status(self, telegram_id: int):
-        async with self._uow_factory() as uow:
+        async with self._read_uow(telegram_id) as uow:
             users_repo = SqlAlchemyUserRepository(uow.session)
             referrals_repo = SqlAlchemyReferralRepository(uow.session)
-            usecase = GetUserStatus(users_repo, referrals_repo)
+            usecase = GetUserStatus(users_repo, referrals_repo, self._cache)
             return await usecase.execute(telegram_id)
 
     async def get_referral_summary(self, telegram_id: int):
-        async with self._uow_factory() as uow:
+        async with self._read_uow(telegram_id) as uow:
             referrals_repo = SqlAlchemyReferralRepository(uow.session)
-            usecase = GetReferralSummary(referrals_repo)
+            usecase = GetReferralSummary(referrals_repo, self._cache)
             return await usecase.execute(telegram_id)
+
+    async def list_referrals(self, telegram_id: int, limit: int, after: str | None):
+        async with self._read_uow(telegram_id) as uow:
+            referrals_repo = SqlAlchemyReferralRepository(uow.session)
+            usecase = ListReferrals(referrals_repo)
+            return await usecase.execute(telegram_id, limit, after)
+
+    async def create_price_alert(
+        self, telegram_id: int, symbol: str, direction: str, threshold: float
+    ):
+        async with self._write_uow(telegram_id) as uow:
+            usecase = CreatePriceAlertSubscription(
+                SqlAlchemyPriceAlertSubscriptionRepository(uow.session), self._price_alert_symbols
+            )
+            return await usecase.execute(telegram_id, symbol, direction, threshold)
+
+    async def list_price_alerts(self, telegram_id: int):
+        async with self._read_uow(telegram_id) as uow:
+            usecase = ListPriceAlertSubscriptions(
+                SqlAlchemyPriceAlertSubscriptionRepository(uow.session)
+            )
+            return await usecase.execute(telegram_id)
+
+    async def delete_price_alert(self, telegram_id: int, subscription_id: int) -> None:
+        async with self._write_uow(telegram_id) as uow:
+            usecase = DeletePriceAlertSubscription(
+                SqlAlchemyPriceAlertSubscriptionRepository(uow.session)
+            )
+            await usecase.execute(telegram_id, subscription_id)
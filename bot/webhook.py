@@ -0,0 +1,126 @@
+"""Webhook mode: Telegram pushes updates to ``POST /bot/webhook`` on the API.
+
+Each API replica behind the load balancer verifies the secret token, acks
+the update immediately and processes it in the background on its own
+dispatcher, so bot load scales with API replicas. Updates still in flight
+when a replica dies are lost, as with polling.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hmac
+import logging
+import os
+from typing import Any
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from fastapi import APIRouter, FastAPI, HTTPException, Request, status
+from pydantic import ValidationError as PayloadValidationError
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+WEBHOOK_PATH = "/bot/webhook"
+DEFAULT_MAX_PENDING = 1000
+
+
+class WebhookRunner:
+    """Processes webhook updates as background tasks, up to ``max_pending`` at once."""
+
+    def __init__(self, dispatcher: Dispatcher, bot: Bot, max_pending: int = DEFAULT_MAX_PENDING):
+        self.dispatcher = dispatcher
+        self.bot = bot
+        self._max_pending = max_pending
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    @property
+    def pending(self) -> int:
+        return len(self._tasks)
+
+    def accept(self, data: dict[str, Any]) -> bool:
+        """Schedule ``data``; ``False`` means the runner is full and it was not taken."""
+        if len(self._tasks) >= self._max_pending:
+            return False
+        update = Update.model_validate(data, context={"bot": self.bot})
+        task = asyncio.create_task(self._process(update))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return True
+
+    async def _process(self, update: Update) -> None:
+        try:
+            await self.dispatcher.feed_update(self.bot, update)
+        except Exception:
+            logger.exception("Webhook update %s failed", update.update_id)
+
+    async def drain(self, timeout: float | None = None) -> None:
+        """Wait for in-flight updates, e.g. before shutdown."""
+        if self._tasks:
+            await asyncio.wait(set(self._tasks), timeout=timeout)
+
+
+def build_webhook_router(runner: WebhookRunner, secret: str) -> APIRouter:
+    router = APIRouter()
+
+    @router.post(WEBHOOK_PATH, include_in_schema=False)
+    async def telegram_webhook(request: Request):
+        token = request.headers.get(SECRET_HEADER, "")
+        if not hmac.compare_digest(token.encode(), secret.encode()):
+            raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="bad secret")
+        try:
+            data = await request.json()
+            accepted = runner.accept(data)
+        except (ValueError, PayloadValidationError) as exc:
+            raise HTTPException(status_code=400, detail="invalid update") from exc
+        if not accepted:
+            # Telegram redelivers non-2xx updates later, which gives us backpressure.
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="bot is busy",
+                headers={"Retry-After": "1"},
+            )
+        return {"ok": True}
+
+    return router
+
+
+def setup_webhook(app: FastAPI) -> WebhookRunner:
+    """Mount the webhook on ``app`` and register the webhook with Telegram on startup."""
+    from app.notifications.rate_limiter import build_send_scheduler
+    from bot.main import build_bot, build_dispatcher
+
+    secret = os.getenv("WEBHOOK_SECRET")
+    token = os.getenv("TELEGRAM_BOT_TOKEN")
+    if not secret or not token:
+        raise RuntimeError("Webhook mode needs TELEGRAM_BOT_TOKEN and WEBHOOK_SECRET")
+    dispatcher = build_dispatcher()
+    capacity = dispatcher["update_runner"].capacity
+    runner = WebhookRunner(
+        dispatcher,
+        build_bot(token, scheduler=build_send_scheduler()),
+        max_pending=int(os.getenv("BOT_WEBHOOK_MAX_PENDING", str(capacity))),
+    )
+    app.include_router(build_webhook_router(runner, secret))
+    public_url = os.getenv("BOT_WEBHOOK_URL")
+
+    async def register_webhook() -> None:
+        if not public_url:
+            logger.info("BOT_WEBHOOK_URL not set; assuming the webhook is registered elsewhere")
+            return
+        # Idempotent, so every replica may do it on startup.
+        await runner.bot.set_webhook(
+            public_url,
+            secret_token=secret,
+            allowed_updates=dispatcher.resolve_used_update_types(),
+        )
+        logger.info("Telegram webhook registered")
+
+    async def shutdown() -> None:
+        await runner.drain(timeout=10)
+        await runner.bot.session.close()
+
+    app.add_event_handler("startup", register_webhook)
+    app.add_event_handler("shutdown", shutdown)
+    return runner
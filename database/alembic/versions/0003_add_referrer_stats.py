@@ -0,0 +1,37 @@
+"""add referrer stats counters
+
+Revision ID: 0003_add_referrer_stats
+Revises: 0002_add_price_samples_refchk
+Create Date: 2024-01-03 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0003_add_referrer_stats"
+down_revision = "0002_add_price_samples_refchk"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "referrer_stats",
+        sa.Column("referrer_telegram_id", sa.BigInteger, primary_key=True),
+        sa.Column("referral_count", sa.BigInteger, server_default="0", nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+    )
+    op.execute(
+        "INSERT INTO referrer_stats (referrer_telegram_id, referral_count) "
+        "SELECT referrer_telegram_id, COUNT(*) FROM referrals GROUP BY referrer_telegram_id"
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("referrer_stats")
@@ -0,0 +1,28 @@
+"""replace referrer index with keyset pagination index
+
+Revision ID: 0004_referrals_keyset_index
+Revises: 0003_add_referrer_stats
+Create Date: 2024-01-04 00:00:00.000000
+"""
+
+from alembic import op
+
+
+revision = "0004_referrals_keyset_index"
+down_revision = "0003_add_referrer_stats"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_referrals_referrer_created_id",
+        "referrals",
+        ["referrer_telegram_id", "created_at", "id"],
+    )
+    op.drop_index("ix_referrals_referrer", table_name="referrals")
+
+
+def downgrade() -> None:
+    op.create_index("ix_referrals_referrer", "referrals", ["referrer_telegram_id"])
+    op.drop_index("ix_referrals_referrer_created_id", table_name="referrals")
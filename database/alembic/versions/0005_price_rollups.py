@@ -0,0 +1,58 @@
+"""add 1m/1h/1d price rollup tables
+
+Revision ID: 0005_price_rollups
+Revises: 0004_referrals_keyset_index
+Create Date: 2024-01-05 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0005_price_rollups"
+down_revision = "0004_referrals_keyset_index"
+branch_labels = None
+depends_on = None
+
+ROLLUPS = (
+    ("price_rollups_1m", "minute"),
+    ("price_rollups_1h", "hour"),
+    ("price_rollups_1d", "day"),
+)
+
+
+def upgrade() -> None:
+    for table, _ in ROLLUPS:
+        op.create_table(
+            table,
+            sa.Column("symbol", sa.String(length=32), primary_key=True),
+            sa.Column("bucket_start", sa.DateTime(timezone=True), primary_key=True),
+            sa.Column("open", sa.Float, nullable=False),
+            sa.Column("high", sa.Float, nullable=False),
+            sa.Column("low", sa.Float, nullable=False),
+            sa.Column("close", sa.Float, nullable=False),
+            sa.Column("sample_count", sa.Integer, nullable=False),
+        )
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    # Backfill from the raw samples collected so far; buckets are UTC.
+    for table, unit in ROLLUPS:
+        op.execute(
+            f"""
+            INSERT INTO {table} (symbol, bucket_start, open, high, low, close, sample_count)
+            SELECT symbol,
+                   date_trunc('{unit}', created_at AT TIME ZONE 'UTC') AT TIME ZONE 'UTC',
+                   (array_agg(price ORDER BY created_at, id))[1],
+                   max(price),
+                   min(price),
+                   (array_agg(price ORDER BY created_at DESC, id DESC))[1],
+                   count(*)
+            FROM price_samples
+            GROUP BY 1, 2
+            """
+        )
+
+
+def downgrade() -> None:
+    for table, _ in reversed(ROLLUPS):
+        op.drop_table(table)
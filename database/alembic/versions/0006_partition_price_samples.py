@@ -0,0 +1,102 @@
+"""range-partition price_samples by created_at (daily, PostgreSQL only)
+
+Revision ID: 0006_partition_price_samples
+Revises: 0005_price_rollups
+Create Date: 2024-01-06 00:00:00.000000
+"""
+
+from alembic import op
+
+
+revision = "0006_partition_price_samples"
+down_revision = "0005_price_rollups"
+branch_labels = None
+depends_on = None
+
+# Partitions are named price_samples_pYYYYMMDD and cover one UTC day; the
+# worker keeps creating upcoming ones (app/db/partitions.py). The default
+# partition only catches rows if that maintenance falls behind.
+CREATE_DAILY_PARTITIONS = """
+DO $$
+DECLARE
+    day date;
+    last_day date := (now() AT TIME ZONE 'UTC')::date + 7;
+BEGIN
+    SELECT coalesce(
+        min((created_at AT TIME ZONE 'UTC')::date), (now() AT TIME ZONE 'UTC')::date
+    )
+    INTO day
+    FROM price_samples_legacy;
+    WHILE day <= last_day LOOP
+        EXECUTE format(
+            'CREATE TABLE %I PARTITION OF price_samples FOR VALUES FROM (%L) TO (%L)',
+            'price_samples_p' || to_char(day, 'YYYYMMDD'),
+            day::timestamp AT TIME ZONE 'UTC',
+            (day + 1)::timestamp AT TIME ZONE 'UTC'
+        );
+        day := day + 1;
+    END LOOP;
+END $$;
+"""
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute("ALTER TABLE price_samples RENAME TO price_samples_legacy")
+    op.execute(
+        "ALTER TABLE price_samples_legacy "
+        "RENAME CONSTRAINT price_samples_pkey TO price_samples_legacy_pkey"
+    )
+    op.execute(
+        "ALTER INDEX ix_price_samples_symbol_created "
+        "RENAME TO ix_price_samples_legacy_symbol_created"
+    )
+    # The partition key has to be part of the primary key.
+    op.execute(
+        """
+        CREATE TABLE price_samples (
+            id INTEGER NOT NULL DEFAULT nextval('price_samples_id_seq'),
+            symbol VARCHAR(32) NOT NULL,
+            price DOUBLE PRECISION NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT price_samples_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE price_samples_id_seq OWNED BY price_samples.id")
+    op.execute("CREATE INDEX ix_price_samples_symbol_created ON price_samples (symbol, created_at)")
+    op.execute(CREATE_DAILY_PARTITIONS)
+    op.execute("CREATE TABLE price_samples_default PARTITION OF price_samples DEFAULT")
+    op.execute(
+        "INSERT INTO price_samples (id, symbol, price, created_at) "
+        "SELECT id, symbol, price, created_at FROM price_samples_legacy"
+    )
+    op.execute("DROP TABLE price_samples_legacy")
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+    op.execute(
+        """
+        CREATE TABLE price_samples_plain (
+            id INTEGER NOT NULL DEFAULT nextval('price_samples_id_seq'),
+            symbol VARCHAR(32) NOT NULL,
+            price DOUBLE PRECISION NOT NULL,
+            created_at TIMESTAMP WITH TIME ZONE NOT NULL DEFAULT now(),
+            CONSTRAINT price_samples_plain_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute(
+        "INSERT INTO price_samples_plain (id, symbol, price, created_at) "
+        "SELECT id, symbol, price, created_at FROM price_samples"
+    )
+    op.execute("ALTER SEQUENCE price_samples_id_seq OWNED BY price_samples_plain.id")
+    op.execute("DROP TABLE price_samples")
+    op.execute("ALTER TABLE price_samples_plain RENAME TO price_samples")
+    op.execute(
+        "ALTER TABLE price_samples RENAME CONSTRAINT price_samples_plain_pkey TO price_samples_pkey"
+    )
+    op.execute("CREATE INDEX ix_price_samples_symbol_created ON price_samples (symbol, created_at)")
@@ -0,0 +1,60 @@
+"""add price_alert_subscriptions
+
+Revision ID: 0007_price_alert_subscriptions
+Revises: 0006_partition_price_samples
+Create Date: 2024-01-07 00:00:00.000000
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "0007_price_alert_subscriptions"
+down_revision = "0006_partition_price_samples"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "price_alert_subscriptions",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("telegram_id", sa.BigInteger, nullable=False),
+        sa.Column("symbol", sa.String(length=32), nullable=False),
+        sa.Column("direction", sa.String(length=8), nullable=False),
+        sa.Column("threshold", sa.Float, nullable=False),
+        sa.Column("active", sa.Boolean, server_default=sa.text("true"), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.func.now(),
+            nullable=False,
+        ),
+        sa.Column("triggered_at", sa.DateTime(timezone=True)),
+        sa.CheckConstraint(
+            "direction IN ('above', 'below')", name="ck_price_alert_subscriptions_direction"
+        ),
+        sa.CheckConstraint("threshold > 0", name="ck_price_alert_subscriptions_threshold"),
+    )
+    op.create_index(
+        "ix_price_alert_subscriptions_telegram_id",
+        "price_alert_subscriptions",
+        ["telegram_id", "id"],
+    )
+    op.create_index(
+        "ix_price_alert_subscriptions_active_id",
+        "price_alert_subscriptions",
+        ["id"],
+        postgresql_where=sa.text("active"),
+        sqlite_where=sa.text("active"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(
+        "ix_price_alert_subscriptions_active_id", table_name="price_alert_subscriptions"
+    )
+    op.drop_index(
+        "ix_price_alert_subscriptions_telegram_id", table_name="price_alert_subscriptions"
+    )
+    op.drop_table("price_alert_subscriptions")